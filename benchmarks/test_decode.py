@@ -53,6 +53,14 @@ class TestGeoCodeDecode(object):
 
         benchmark(get)
 
+    def test_geo_code_lazy(self, benchmark):
+        r = GeoCodeResponseData(self.RAW_DATA, static_mode='lazy')
+
+        def get():
+            return r.data[0]
+
+        benchmark(get)
+
 
 class TestGeoCodeDecodeInit(object):
     RAW_DATA = TestGeoCodeDecode.RAW_DATA
@@ -164,6 +172,22 @@ class TestSearchDecode(object):
 
         benchmark(get)
 
+    def test_search_lazy(self, benchmark):
+        r = SearchResponseData(self.RAW_DATA, static_mode='lazy')
+
+        def get():
+            return r.data[0].photos[0].url
+
+        benchmark(get)
+
+    def test_search_compact(self, benchmark):
+        r = SearchResponseData(self.RAW_DATA, static_mode='compact')
+
+        def get():
+            return r.data[0].photos[0].url
+
+        benchmark(get)
+
 
 class TestSearchDecodeInit(object):
     RAW_DATA = TestSearchDecode.RAW_DATA
@@ -174,6 +198,12 @@ class TestSearchDecodeInit(object):
     def test_static_init(self, benchmark):
         benchmark(SearchResponseData, self.RAW_DATA, static_mode=True)
 
+    def test_compact_init(self, benchmark):
+        benchmark(SearchResponseData, self.RAW_DATA, static_mode='compact')
+
+    def test_lazy_init(self, benchmark):
+        benchmark(SearchResponseData, self.RAW_DATA, static_mode='lazy')
+
 
 class TestSuggestDecode(object):
     """http://restapi.amap.com/v3/assistant/inputtips?
@@ -245,3 +275,11 @@ class TestSuggestDecodeInit(object):
 
     def test_static_init(self, benchmark):
         benchmark(SuggestResponseData, self.RAW_DATA, static_mode=True)
+
+
+class TestJsonLoad(object):
+    RAW_DATA = TestSearchDecode.RAW_DATA
+
+    def test_json_load(self, benchmark):
+        from thrall.amap.common import json_load_and_fix_amap_empty
+        benchmark(json_load_and_fix_amap_empty, self.RAW_DATA)
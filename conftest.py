@@ -0,0 +1,14 @@
+# coding: utf-8
+import sys
+
+collect_ignore = []
+
+if sys.version_info < (3, 5):
+    # asyncio support uses async/await syntax, requires python 3.5+
+    collect_ignore.extend([
+        'thrall/aio.py',
+        'thrall/amap/aio_dispatcher.py',
+        'thrall/amap/aio_request.py',
+        'thrall/amap/aio_session.py',
+        'tests/test_amap/test_aio_session.py',
+    ])
@@ -12,8 +12,11 @@ install_requires = ['six',
                     'requests<3.0.0',
                     'future']
 
+extras_require = {'async': ['aiohttp>=3.0']}
+
 if sys.version_info == (2, 7):
     install_requires.append('functools32')
+    install_requires.append('futures')
 
 setup(
     name='thrall',
@@ -24,4 +27,5 @@ setup(
     packages=find_packages(exclude=('benchmarks',)),
     tests_require=test_requirements,
     install_requires=install_requires,
+    extras_require=extras_require,
 )
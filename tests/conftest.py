@@ -0,0 +1,17 @@
+# coding: utf-8
+# flake8: noqa
+import pytest
+
+
+class FakeClock(object):
+    def __init__(self, now=0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    """ time function returns `clock.now`, set or advance it in test. """
+    return FakeClock()
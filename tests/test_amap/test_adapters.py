@@ -207,3 +207,53 @@ def test_amap_json_batch_decode_adapter_func():
     assert r.status == 1
 
     assert isinstance(r, BatchResponseData)
+
+
+class TestAMapSpatialCacheAdapter(object):
+    def test_make_key_geohash(self):
+        from thrall.amap.adapters import AMapSpatialCacheAdapter
+
+        model = AMapSpatialCacheAdapter(precision=8)
+
+        k1 = model.make_key('regeo_code', {'location': '116.307490,39.984154'})
+        k2 = model.make_key('regeo_code', {'location': '116.307495,39.984150'})
+        k3 = model.make_key('regeo_code', {'location': '116.317490,39.984154'})
+
+        assert k1 == k2
+        assert k1 != k3
+
+    def test_make_key_meters(self):
+        from thrall.amap.adapters import AMapSpatialCacheAdapter
+
+        model = AMapSpatialCacheAdapter(grid_meters=100)
+
+        assert model.quantize('116.307490,39.984154') == \
+            model.quantize('116.307500,39.984160')
+        assert model.quantize('116.307490,39.984154') != \
+            model.quantize('116.309490,39.984154')
+
+    def test_other_route_not_quantized(self):
+        from thrall.amap.adapters import AMapSpatialCacheAdapter
+
+        model = AMapSpatialCacheAdapter(precision=5)
+
+        assert model.make_key('search_around',
+                              {'location': '116.307490,39.984154'}) == \
+            u'search_around:location=116.307490,39.984154'
+
+    def test_session_nearby_hit(self, mock_regeo_code_result):
+        import responses
+        from thrall.amap.adapters import AMapSpatialCacheAdapter
+        from thrall.amap.session import AMapSession
+
+        model = AMapSession(default_key='xxx')
+        model.mount('cache', AMapSpatialCacheAdapter(grid_meters=50))
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(mock_regeo_code_result)
+            model.regeo_code(location='116.307490,39.984154')
+            model.regeo_code(location=(116.307492, 39.984158))
+
+            assert len(rsps.calls) == 1
+
+        assert model.cache.hit_rate == 0.5
@@ -0,0 +1,529 @@
+# coding: utf-8
+# flake8: noqa
+import asyncio
+import re
+
+import pytest
+
+aiohttp = pytest.importorskip('aiohttp')
+aioresponses = pytest.importorskip('aioresponses').aioresponses
+
+from thrall.exceptions import VendorConnectionError, VendorHTTPError
+from thrall.amap.aio_request import AsyncAMapRequest, AsyncAMapBatchRequest
+from thrall.amap.aio_session import AsyncAMapSession
+from thrall.amap.request import AMapRequest
+from thrall.amap.urls import GEO_CODING_URL, REGEO_CODING_URL
+
+
+def run(coro):
+    return asyncio.new_event_loop().run_until_complete(coro)
+
+
+def _body(data_dir, name):
+    return open(str(data_dir.join(name))).read()
+
+
+class TestAsyncAMapSession(object):
+    def test_init(self):
+        model = AsyncAMapSession(default_key='xxx')
+
+        assert isinstance(model.request, AsyncAMapRequest)
+        assert isinstance(model.brequest, AsyncAMapBatchRequest)
+        assert model.brequest._pool_owner is model.request
+
+    def test_mount_sync_request_error(self):
+        model = AsyncAMapSession()
+
+        with pytest.raises(TypeError):
+            model.mount('request', AMapRequest())
+
+    def test_geo_code(self, data_dir):
+        hooked = []
+
+        async def go():
+            with aioresponses() as m:
+                m.get(re.compile('{}.*'.format(GEO_CODING_URL.url)),
+                      body=_body(data_dir, 'geo_code_result.json'))
+                async with AsyncAMapSession(default_key='xxx') as session:
+                    return await session.geo_code(
+                        address='xxxx',
+                        prepared_hook=hooked.append,
+                        response_hook=hooked.append)
+
+        r = run(go())
+        r.raise_for_status()
+
+        assert r.data
+        assert len(hooked) == 2
+
+    def test_regeo_code(self, data_dir):
+        async def go():
+            with aioresponses() as m:
+                m.get(re.compile('{}.*'.format(REGEO_CODING_URL.url)),
+                      body=_body(data_dir, 'regeo_code_result.json'))
+                async with AsyncAMapSession(default_key='xxx') as session:
+                    return await session.regeo_code(location='1,2')
+
+        run(go()).raise_for_status()
+
+    def test_concurrent_calls(self, data_dir):
+        async def go():
+            with aioresponses() as m:
+                m.get(re.compile('{}.*'.format(GEO_CODING_URL.url)),
+                      body=_body(data_dir, 'geo_code_result.json'),
+                      repeat=True)
+                async with AsyncAMapSession(default_key='xxx') as session:
+                    return await asyncio.gather(
+                        *[session.geo_code(address=str(i))
+                          for i in range(10)])
+
+        r = run(go())
+        assert len(r) == 10
+
+    def test_batch(self, data_dir):
+        from thrall.amap.models import (GeoCodeRequestParams,
+                                        ReGeoCodeRequestParams)
+
+        async def go():
+            with aioresponses() as m:
+                m.post(re.compile('http://restapi.amap.com/v3/batch.*'),
+                       body=_body(data_dir, 'batch_result.json'))
+                async with AsyncAMapSession(default_key='x') as session:
+                    return await session.batch(batch_list=[
+                        GeoCodeRequestParams(address='xx', key='xxx'),
+                        ReGeoCodeRequestParams(location='1,2', key='xss')])
+
+        r = run(go())
+        r.raise_for_status()
+        assert len(r.data) == 2
+
+    def test_http_error(self):
+        async def go():
+            with aioresponses() as m:
+                m.get(re.compile('{}.*'.format(GEO_CODING_URL.url)),
+                      status=500)
+                async with AsyncAMapSession(default_key='xxx') as session:
+                    return await session.geo_code(address='xxxx')
+
+        with pytest.raises(VendorHTTPError):
+            run(go())
+
+    def test_connection_error(self):
+        async def go():
+            with aioresponses() as m:
+                m.get(re.compile('{}.*'.format(GEO_CODING_URL.url)),
+                      exception=aiohttp.ClientConnectionError('x'))
+                async with AsyncAMapSession(default_key='xxx') as session:
+                    return await session.geo_code(address='xxxx')
+
+        with pytest.raises(VendorConnectionError):
+            run(go())
+
+    def test_batch_chunked(self):
+        import json
+        from aioresponses import CallbackResult
+        from thrall.amap.models import GeoCodeRequestParams
+
+        def callback(url, **kwargs):
+            ops = json.loads(kwargs['data'])['ops']
+            return CallbackResult(body=json.dumps(
+                [{"status": 200, "body": {"status": "1", "infocode": "10000",
+                                          "geocodes": [{"adcode": o['url'].split('?')[1]}]}}
+                 for o in ops]))
+
+        async def go():
+            with aioresponses() as m:
+                m.post(re.compile('http://restapi.amap.com/v3/batch.*'),
+                       callback=callback, repeat=True)
+                async with AsyncAMapSession(default_key='x') as session:
+                    return await session.batch(batch_list=[
+                        GeoCodeRequestParams(address=str(i), key='x')
+                        for i in range(45)])
+
+        r = run(go())
+
+        assert r.count == 45
+        assert ['address={}'.format(i) in d.data[0].adcode.split('&')
+                for i, d in enumerate(r.data)] == [True] * 45
+
+    def test_batch_chunk_error(self):
+        import json
+        from aioresponses import CallbackResult
+        from thrall.amap.models import GeoCodeRequestParams
+
+        def callback(url, **kwargs):
+            ops = json.loads(kwargs['data'])['ops']
+            return CallbackResult(body=json.dumps(
+                [{"status": 200, "body": {"status": "1", "infocode": "10000",
+                                          "geocodes": [{"adcode": "1"}]}}
+                 for o in ops]))
+
+        async def go():
+            url = re.compile('http://restapi.amap.com/v3/batch.*')
+
+            with aioresponses() as m:
+                m.post(url, callback=callback)
+                m.post(url, exception=aiohttp.ClientConnectionError('x'))
+                m.post(url, callback=callback)
+                async with AsyncAMapSession(default_key='x') as session:
+                    return await session.batch(batch_list=[
+                        GeoCodeRequestParams(address=str(i), key='x')
+                        for i in range(45)])
+
+        r = run(go())
+
+        assert r.count == 45
+        assert sorted(op['status'] for op in r.raw_ops) == \
+            [200] * 25 + [503] * 20
+
+    def test_geo_code_many(self):
+        import json
+        from aioresponses import CallbackResult
+        from six.moves.urllib.parse import parse_qs, urlparse
+
+        def callback(url, **kwargs):
+            ops = json.loads(kwargs['data'])['ops']
+            bodies = []
+            for o in ops:
+                a = parse_qs(urlparse(o['url']).query)['address'][0]
+                bodies.append({"status": 200, "body": {
+                    "status": "1", "infocode": "10000",
+                    "geocodes": [{"formatted_address": i}
+                                 for i in a.split('|')]}})
+            return CallbackResult(body=json.dumps(bodies))
+
+        async def go():
+            with aioresponses() as m:
+                m.post(re.compile('http://restapi.amap.com/v3/batch.*'),
+                       callback=callback, repeat=True)
+                async with AsyncAMapSession(default_key='x') as session:
+                    return [d async for d in session.geo_code_many(
+                        str(i) for i in range(205))]
+
+        r = run(go())
+
+        assert [i.formatted_address for i in r] == \
+            [str(i) for i in range(205)]
+
+    def test_geo_code_many_post_error(self):
+        async def go():
+            with aioresponses() as m:
+                m.post(re.compile('http://restapi.amap.com/v3/batch.*'),
+                       body='{"status": "0", "infocode": "10001"}')
+                async with AsyncAMapSession(default_key='x') as session:
+                    return [d async for d in session.geo_code_many(
+                        str(i) for i in range(25))]
+
+        assert run(go()) == [None] * 25
+
+    def test_regeo_code_many(self):
+        import json
+        from aioresponses import CallbackResult
+        from six.moves.urllib.parse import parse_qs
+
+        def callback(url, **kwargs):
+            locations = parse_qs(url.query_string)['location'][0]
+            return CallbackResult(body=json.dumps({
+                "status": "1", "infocode": "10000",
+                "regeocodes": [{"formatted_address": i}
+                               for i in locations.split('|')]}))
+
+        async def go():
+            with aioresponses() as m:
+                m.get(re.compile('{}.*'.format(REGEO_CODING_URL.url)),
+                      callback=callback, repeat=True)
+                async with AsyncAMapSession(default_key='x') as session:
+                    return [d async for d in session.regeo_code_many(
+                        ((116, 39 + i * 1e-3) for i in range(45)),
+                        concurrency=2)]
+
+        r = run(go())
+
+        assert [i.formatted_address for i in r] == \
+            ['116.000000,{:.6f}'.format(39 + i * 1e-3) for i in range(45)]
+
+    def test_template(self, data_dir):
+        async def go():
+            with aioresponses() as m:
+                m.get(re.compile('{}.*'.format(REGEO_CODING_URL.url)),
+                      body=_body(data_dir, 'regeo_code_result.json'),
+                      repeat=True)
+                async with AsyncAMapSession(default_key='xxx') as session:
+                    template = session.template('regeo_code', radius=100)
+                    return await asyncio.gather(
+                        *[template((116, 39 + i)) for i in range(3)])
+
+        r = run(go())
+
+        assert len(r) == 3
+        r[0].raise_for_status()
+
+    def test_key_pool(self):
+        from thrall.amap.key_pool import AMapKeyPool
+
+        async def go():
+            with aioresponses() as m:
+                m.get(re.compile('{}.*'.format(GEO_CODING_URL.url)),
+                      body='{"status": "0", "infocode": "10001"}')
+                m.get(re.compile('{}.*'.format(GEO_CODING_URL.url)),
+                      body='{"status": "1", "infocode": "10000"}',
+                      repeat=True)
+                async with AsyncAMapSession() as session:
+                    session.mount('key_pool', AMapKeyPool(['a', 'b']))
+                    for _ in range(3):
+                        await session.geo_code(address='xx')
+                    return session.key_pool.stats()
+
+        r = run(go())
+
+        assert [i['used_today'] for i in r] == [1, 2]
+        assert r[0]['disabled']
+
+    def test_rate_limiter(self, mocker):
+        from thrall.ratelimit import RateLimiter
+
+        sleep = mocker.patch('asyncio.sleep', mocker.AsyncMock())
+        limiter = RateLimiter(default_rate=10)
+
+        async def go():
+            with aioresponses() as m:
+                m.get(re.compile('{}.*'.format(GEO_CODING_URL.url)),
+                      body='{"status": "1", "infocode": "10000"}',
+                      repeat=True)
+                async with AsyncAMapSession(default_key='x') as session:
+                    session.mount('rate_limiter', limiter)
+                    for _ in range(3):
+                        await session.geo_code(address='xx')
+
+        run(go())
+
+        assert sleep.await_count == 2
+
+    def test_retry(self, mocker):
+        from thrall.retry import RetryPolicy
+
+        sleep = mocker.patch('asyncio.sleep', mocker.AsyncMock())
+
+        async def go():
+            with aioresponses() as m:
+                m.get(re.compile('{}.*'.format(GEO_CODING_URL.url)),
+                      exception=aiohttp.ClientConnectionError('x'))
+                m.get(re.compile('{}.*'.format(GEO_CODING_URL.url)),
+                      status=503)
+                m.get(re.compile('{}.*'.format(GEO_CODING_URL.url)),
+                      body='{"status": "1", "infocode": "10000"}')
+                async with AsyncAMapSession(default_key='x') as session:
+                    session.mount('retry', RetryPolicy())
+                    return await session.geo_code(address='xx')
+
+        run(go()).raise_for_status()
+
+        assert sleep.await_count == 2
+
+    def test_pool_options(self):
+        async def go():
+            async with AsyncAMapSession(
+                    pool_options=dict(pool_maxsize=7,
+                                      keep_alive=False)) as session:
+                connector = session.brequest.session.connector
+                return connector.limit, connector.force_close
+
+        assert run(go()) == (7, True)
+
+    def test_sync_pool_options(self):
+        async def go():
+            async with AsyncAMapSession(
+                    pool_options=dict(pool_connections=3, pool_block=True,
+                                      max_retries=0)) as session:
+                return session.request.session.connector.limit
+
+        assert run(go()) == 100
+
+    def test_single_flight(self, data_dir):
+        from aioresponses import CallbackResult
+        from thrall.aio import AsyncSingleFlight
+
+        calls = []
+
+        async def callback(url, **kwargs):
+            calls.append(url)
+            await asyncio.sleep(0.01)
+            return CallbackResult(body=_body(data_dir,
+                                             'geo_code_result.json'))
+
+        async def go():
+            with aioresponses() as m:
+                m.get(re.compile('{}.*'.format(GEO_CODING_URL.url)),
+                      callback=callback, repeat=True)
+                async with AsyncAMapSession(default_key='xxx') as session:
+                    session.mount('single_flight', AsyncSingleFlight())
+                    return await asyncio.gather(
+                        *[session.geo_code(address='xx', key=str(i))
+                          for i in range(5)]), session.single_flight
+
+        r, flight = run(go())
+
+        assert len(calls) == 1
+        assert all(i is r[0] for i in r)
+        assert flight.shared == 4
+        assert len(flight) == 0
+
+    def test_single_flight_error(self):
+        from thrall.aio import AsyncSingleFlight
+
+        async def fail():
+            await asyncio.sleep(0)
+            raise ValueError('x')
+
+        async def go():
+            flight = AsyncSingleFlight()
+            return await asyncio.gather(
+                *[flight.do('a', fail) for _ in range(3)],
+                return_exceptions=True)
+
+        assert all(isinstance(i, ValueError) for i in run(go()))
+
+    def test_dispatcher(self):
+        import json
+        from thrall.amap.aio_dispatcher import AsyncBatchDispatcher
+        from thrall.amap.dispatcher import BatchDispatcher
+
+        body = {"status": "1", "infocode": "10000",
+                "regeocode": {"formatted_address": "xx"}}
+
+        async def go():
+            with aioresponses() as m:
+                m.post(re.compile('http://restapi.amap.com/v3/batch.*'),
+                       body=json.dumps([{"status": 200, "body": body}] * 3))
+                async with AsyncAMapSession(default_key='xxx') as session:
+                    with pytest.raises(TypeError):
+                        session.mount('dispatcher', BatchDispatcher())
+
+                    session.mount('dispatcher',
+                                  AsyncBatchDispatcher(max_wait=5, max_ops=3))
+                    return await asyncio.gather(
+                        *[session.regeo_code(location='1,{}'.format(i))
+                          for i in range(3)]), session.dispatcher
+
+        r, dispatcher = run(go())
+
+        assert all(i.status == 1 for i in r)
+        assert (dispatcher.posts, dispatcher.ops) == (1, 3)
+
+    def test_hedge(self, data_dir):
+        from aioresponses import CallbackResult
+        from thrall.hedge import HedgePolicy
+        from thrall.latency import LatencyTracker
+        from thrall.amap.urls import POI_SUGGEST_URL
+
+        tracker = LatencyTracker(min_samples=1)
+        tracker.observe('suggest', 0.01)
+        policy = HedgePolicy(tracker=tracker, min_delay=0, max_ratio=1)
+        calls = []
+
+        async def callback(url, **kwargs):
+            calls.append(url)
+            if len(calls) == 1:
+                await asyncio.sleep(5)
+            return CallbackResult(body=_body(data_dir,
+                                             'suggest_result.json'))
+
+        async def go():
+            with aioresponses() as m:
+                m.get(re.compile('{}.*'.format(POI_SUGGEST_URL.url)),
+                      callback=callback, repeat=True)
+                async with AsyncAMapSession(default_key='xxx') as session:
+                    session.mount('hedge', policy)
+                    return await asyncio.wait_for(
+                        session.suggest(keyword='a'), 1)
+
+        r = run(go())
+
+        assert r.status == 1
+        assert len(calls) == 2
+        assert policy.hedges == 1
+
+    def test_client_timeout(self):
+        timeout = AsyncAMapRequest._client_timeout((0.3, 2))
+
+        assert (timeout.sock_connect, timeout.sock_read) == (0.3, 2)
+        assert AsyncAMapRequest._client_timeout(1).total == 1
+
+    def test_adaptive_timeout(self, data_dir):
+        from thrall.latency import AdaptiveTimeout, LatencyTracker
+
+        adaptive = AdaptiveTimeout(tracker=LatencyTracker(min_samples=1))
+
+        async def go():
+            with aioresponses() as m:
+                m.get(re.compile('{}.*'.format(GEO_CODING_URL.url)),
+                      body=_body(data_dir, 'geo_code_result.json'))
+                async with AsyncAMapSession(default_key='xxx') as session:
+                    session.mount('timeout', adaptive)
+                    return await session.geo_code(address='xx')
+
+        assert run(go()).status == 1
+        assert adaptive.tracker.count('geo_code') == 1
+
+    def test_circuit_breaker(self):
+        from thrall.breaker import CircuitBreaker
+        from thrall.exceptions import VendorCircuitOpenError
+
+        breaker = CircuitBreaker(min_requests=1, failure_rate=1)
+
+        async def go():
+            with aioresponses() as m:
+                m.get(re.compile('{}.*'.format(GEO_CODING_URL.url)),
+                      status=500, repeat=True)
+                async with AsyncAMapSession(default_key='xxx') as session:
+                    session.mount('circuit_breaker', breaker)
+
+                    with pytest.raises(VendorHTTPError):
+                        await session.geo_code(address='xx')
+                    with pytest.raises(VendorCircuitOpenError):
+                        await session.geo_code(address='xx')
+
+        run(go())
+        assert breaker.state('geo_code') == 'open'
+
+    def test_metrics(self, data_dir):
+        from thrall.metrics import MetricsCollector
+
+        metrics = MetricsCollector(key_label=None)
+
+        async def go():
+            with aioresponses() as m:
+                m.get(re.compile('{}.*'.format(GEO_CODING_URL.url)),
+                      body=_body(data_dir, 'geo_code_result.json'))
+                async with AsyncAMapSession(default_key='xxx') as session:
+                    session.mount('metrics', metrics)
+                    return await session.geo_code(address='xx')
+
+        run(go())
+        item = metrics.snapshot()['geo_code']['']
+
+        assert item['requests'] == 1
+        assert item['bytes'] > 0
+        assert item['latency']['request']['count'] == 1
+
+    def test_timing(self, data_dir):
+        async def go():
+            with aioresponses() as m:
+                m.get(re.compile('{}.*'.format(GEO_CODING_URL.url)),
+                      body=_body(data_dir, 'geo_code_result.json'))
+                m.get(re.compile('{}.*'.format(GEO_CODING_URL.url)),
+                      status=404)
+                async with AsyncAMapSession(default_key='xxx',
+                                            record_timing=True) as session:
+                    r = await session.geo_code(address='xx')
+
+                    with pytest.raises(VendorHTTPError) as err:
+                        await session.geo_code(address='yy')
+
+                    return r, err.value
+
+        r, err = run(go())
+
+        assert r.timing.responses == 1
+        assert r.timing.network > 0
+        assert err.timing.network > 0
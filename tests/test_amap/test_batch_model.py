@@ -108,7 +108,8 @@ class TestPreparedBatchParams(object):
         assert r['url'] == GEO_CODING_URL.path
         assert r['params']['key'] == 'xxx'
         assert r['params']['address'] == 'xx'
-        assert len(r.keys()) == 2
+        assert r['query'] == mock_p.query
+        assert len(r.keys()) == 3
 
     def test_package_all_params(self, mocker):
         from thrall.amap._models._geo_code_model import GeoCodeRequestParams
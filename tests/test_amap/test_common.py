@@ -0,0 +1,69 @@
+# coding: utf-8
+# flake8: noqa
+from __future__ import absolute_import
+
+import json
+
+import pytest
+from six import iteritems
+
+from thrall.utils import camelcase_to_snakecase, is_list_empty
+from thrall.amap.common import json_load_and_fix_amap_empty
+
+
+def _origin_json_load_and_fix_amap_empty(raw_data):
+    """ the reference implementation of amap json loading. """
+    def _json_load_hook(obj):
+        if obj == {}:
+            return
+
+        new_obj = {}
+        poped_items = []
+
+        for k, w in iteritems(obj):
+            if is_list_empty(w):
+                obj[k] = None
+
+            renamed_k = camelcase_to_snakecase(k)
+
+            if renamed_k != k:
+                new_obj[renamed_k] = obj.get(k)
+                poped_items.append(k)
+
+        obj.update(new_obj)
+
+        for i in poped_items:
+            obj.pop(i)
+
+        return obj
+
+    return json.loads(raw_data, object_hook=_json_load_hook)
+
+
+MOCK_FILES = ['batch_result.json', 'distance_result.json',
+              'district_result.json', 'driving_result.json',
+              'geo_code_result.json', 'regeo_code_result.json',
+              'riding_result.json', 'search_around_result.json',
+              'search_text_result.json', 'suggest_result.json',
+              'walking_result.json']
+
+
+@pytest.mark.parametrize('name', MOCK_FILES)
+def test_json_load_identical(data_dir, name):
+    raw_data = open(str(data_dir.join(name)), 'rb').read()
+
+    r = json_load_and_fix_amap_empty(raw_data)
+    origin = _origin_json_load_and_fix_amap_empty(raw_data)
+
+    assert r == origin
+    assert json.dumps(r) == json.dumps(origin)
+
+
+@pytest.mark.parametrize('raw_data', [
+    '{}', '[]', '[{}]', '{"a": [[], [[]]]}', '{"a": [{}]}',
+    '{"aB": {"cD": []}, "a_b": 1}', '{"Type": [], "id": {"x": {}}}',
+])
+def test_json_load_edge_cases(raw_data):
+    origin = _origin_json_load_and_fix_amap_empty(raw_data)
+
+    assert json_load_and_fix_amap_empty(raw_data) == origin
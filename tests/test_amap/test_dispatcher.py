@@ -0,0 +1,116 @@
+# coding: utf-8
+# flake8: noqa
+import json
+import threading
+
+import pytest
+
+from thrall.exceptions import VendorHTTPError, VendorRequestError
+from thrall.amap.dispatcher import (BatchDispatcher, BatchOpResponse,
+                                    PreparedOp, split_batch_response)
+
+
+class _Response(object):
+    def __init__(self, raw, status_code=200):
+        self.content = json.dumps(raw).encode('utf-8')
+        self.status_code = status_code
+
+
+class TestSplitBatchResponse(object):
+    def test_split(self):
+        r = _Response([{'status': 200, 'body': {'a': 1}},
+                       {'status': 500, 'body': {}}])
+
+        ops = split_batch_response(r, 2)
+
+        assert [i.status_code for i in ops] == [200, 500]
+        assert json.loads(ops[0].content.decode('utf-8')) == {'a': 1}
+        assert all(i.batch_response is r for i in ops)
+
+    def test_whole_post_error(self):
+        r = _Response({'status': '0', 'infocode': '10001'})
+
+        ops = split_batch_response(r, 3)
+
+        assert len(ops) == 3
+        assert all(i.content == r.content for i in ops)
+
+
+class TestBatchDispatcher(object):
+    def test_prepared_op(self, mocker):
+        p = mocker.Mock(ROUTE_KEY='geo_code')
+        op = PreparedOp(p)
+
+        assert op.ROUTE_KEY == 'geo_code'
+        assert op.prepare() is p
+
+    def test_is_enabled(self):
+        from thrall.consts import RouteKey
+
+        assert BatchDispatcher(routes=None).is_enabled('suggest')
+
+        d = BatchDispatcher(routes=[RouteKey.GEO_CODE])
+        assert d.is_enabled('geo_code')
+        assert not d.is_enabled('regeo_code')
+
+    def test_single_call(self):
+        d = BatchDispatcher(max_wait=0)
+        posted = []
+
+        def post(items):
+            posted.append(items)
+            return _Response([{'status': 200, 'body': {'v': i}}
+                              for i in items])
+
+        r = d.call(post, 1)
+
+        assert isinstance(r, BatchOpResponse)
+        assert json.loads(r.content.decode('utf-8')) == {'v': 1}
+        assert posted == [[1]]
+        assert (d.posts, d.ops) == (1, 1)
+
+    def test_concurrent_calls(self):
+        d = BatchDispatcher(max_wait=5, max_ops=4)
+        results = {}
+
+        def post(items):
+            return _Response([{'status': 200, 'body': {'v': i}}
+                              for i in items])
+
+        def worker(i):
+            r = d.call(post, i)
+            results[i] = json.loads(r.content.decode('utf-8'))['v']
+
+        threads = [threading.Thread(target=worker, args=(i,))
+                   for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        # batch is posted once full, not after max_wait
+        assert results == {i: i for i in range(4)}
+        assert (d.posts, d.ops) == (1, 4)
+
+    def test_op_error(self):
+        d = BatchDispatcher(max_wait=0)
+
+        with pytest.raises(VendorHTTPError) as err:
+            d.call(lambda items: _Response([{'status': 500, 'body': {}}]), 1)
+
+        assert err.value.data.status_code == 500
+
+    def test_post_error(self):
+        d = BatchDispatcher(max_wait=0)
+
+        def post(items):
+            raise VendorRequestError('x')
+
+        with pytest.raises(VendorRequestError):
+            d.call(post, 1)
+
+    def test_misaligned(self):
+        d = BatchDispatcher(max_wait=0)
+
+        with pytest.raises(VendorRequestError):
+            d.call(lambda items: _Response([]), 1)
@@ -0,0 +1,115 @@
+# coding: utf-8
+# flake8: noqa
+import threading
+
+import pytest
+
+from thrall.amap.key_pool import AMapKeyPool
+from thrall.exceptions import VendorKeyExhaustedError
+
+
+@pytest.fixture
+def clock(clock):
+    clock.now = 1e9
+    return clock
+
+
+class TestAMapKeyPool(object):
+    def test_init(self):
+        pool = AMapKeyPool(['a', ('b', 'pb')])
+
+        assert len(pool) == 2
+        assert [(k.key, k.private_key) for k in pool.keys] == \
+            [('a', None), ('b', 'pb')]
+
+        with pytest.raises(ValueError):
+            AMapKeyPool([])
+
+    def test_round_robin(self):
+        pool = AMapKeyPool(['a', 'b', 'c'])
+
+        assert [pool.acquire().key for _ in range(5)] == \
+            ['a', 'b', 'c', 'a', 'b']
+
+    def test_qps(self, clock):
+        pool = AMapKeyPool(['a', 'b'], qps=2, clock=clock)
+
+        assert [pool.acquire().key for _ in range(4)] == ['a', 'b', 'a', 'b']
+
+        # all keys over qps, least used one is returned.
+        assert pool.acquire().key in ('a', 'b')
+        assert pool.keys[0].used_this_second == 3 or \
+            pool.keys[1].used_this_second == 3
+
+        clock.now += 1
+        assert pool.acquire(ops=2).used_this_second == 2
+
+    def test_daily_quota(self, clock):
+        pool = AMapKeyPool(['a', 'b'], daily_quota=3, clock=clock)
+
+        assert pool.acquire(ops=3).key == 'a'
+        assert pool.acquire().key == 'b'
+        assert pool.acquire(ops=2).key == 'b'
+
+        with pytest.raises(VendorKeyExhaustedError):
+            pool.acquire()
+
+        clock.now += 86400
+        assert pool.acquire().key in ('a', 'b')
+
+    def test_release(self):
+        pool = AMapKeyPool(['a'], daily_quota=1)
+
+        k = pool.acquire()
+        pool.release(k)
+
+        assert pool.acquire() is k
+
+    def test_report_qps_limit(self, clock):
+        pool = AMapKeyPool(['a', 'b'], cooldown=2, clock=clock)
+
+        pool.report(pool.keys[0], 10004)
+        assert [pool.acquire().key for _ in range(3)] == ['b', 'b', 'b']
+
+        clock.now += 2
+        assert 'a' in [pool.acquire().key for _ in range(2)]
+
+    def test_report_daily_limit(self, clock):
+        # clock starts at 2001-09-09 09:46:40 (UTC+8), resets at
+        # 2001-09-10 00:00 (UTC+8)
+        pool = AMapKeyPool(['a'], clock=clock)
+
+        pool.report(pool.keys[0], 10003)
+        assert pool.stats()[0]['blocked']
+
+        clock.now = 1e9 + 14 * 3600 + 13 * 60 + 19
+        with pytest.raises(VendorKeyExhaustedError):
+            pool.acquire()
+
+        clock.now += 1
+        assert pool.acquire().key == 'a'
+
+    def test_report_invalid_key(self, clock):
+        pool = AMapKeyPool(['a', 'b'], clock=clock)
+
+        pool.report(pool.keys[1], 10001)
+        pool.report(pool.keys[0], 10000)
+        clock.now += 86400 * 10
+
+        assert [pool.acquire().key for _ in range(2)] == ['a', 'a']
+        assert pool.stats()[1]['disabled']
+
+    def test_threads(self):
+        pool = AMapKeyPool(['a', 'b', 'c', 'd'], daily_quota=250)
+
+        def worker():
+            for _ in range(100):
+                pool.acquire()
+
+        threads = [threading.Thread(target=worker) for _ in range(10)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert [i['used_today'] for i in pool.stats()] == [250] * 4
@@ -175,6 +175,66 @@ class TestBasePrepareModel(object):
         assert model.sig.unhash_sig == 'key=xxx&output=jsonhahaha'
         assert model.prepared_sig is not None
 
+    def test_params_cached(self, mocker):
+        model = self._MockModel()
+        model.prepare(key='xxx', output='json', pkey='aaa')
+        mocker.spy(model, 'generate_params')
+
+        p = model.params
+        p['key'] = 'changed'
+
+        assert model.params == model.params
+        assert model.params['key'] == 'xxx'
+        assert model.params['sig'] == model.prepared_sig
+        assert model.query == model.query
+        assert model.generate_params.call_count == 1
+
+    def test_params_invalidated(self, mocker):
+        model = self._MockModel()
+        model.prepare(key='xxx', output='json', pkey='aaa')
+
+        sig, query = model.prepared_sig, model.query
+        model.prepare_key('yyy')
+
+        assert model.params['key'] == 'yyy'
+        assert model.prepared_sig != sig
+        assert model.query != query
+        assert 'key=yyy' in model.query
+
+        model._raw_params = {'a': 1}
+        assert model.params['a'] == 1
+
+        raw = model._raw_params
+        raw['a'] = 2
+        assert model.params['a'] == 1
+        model.invalidate()
+        assert model.params['a'] == 2
+
+    def test_rekey(self, mocker):
+        model = self._MockModel()
+        model.prepare(key='xxx', output='json')
+        mocker.spy(model, 'generate_params')
+        _ = model.params
+
+        model.rekey('yyy', pkey='aaa')
+
+        assert model.params['key'] == 'yyy'
+        assert model.prepared_sig == _base_model.Sig(
+            pkey='aaa', kwargs={'key': 'yyy', 'output': 'json'}).hashed_sig
+        assert model.generate_params.call_count == 1
+
+        model._raw_params = {'key': 'zzz'}
+        model.rekey('yyy')
+        assert model.params['key'] == 'zzz'
+        assert 'sig' not in model.params
+
+    def test_repr_without_cache(self):
+        model = self._MockModel()
+        model.prepare(key='xxx')
+        _ = model.params
+
+        assert '_cached' not in repr(model)
+
     @pytest.mark.parametrize('kwargs, params', [
         (dict(key='xxx'),
          {'key': 'xxx'}),
@@ -0,0 +1,483 @@
+# coding: utf-8
+# flake8: noqa
+from __future__ import absolute_import
+
+import json
+import re
+
+import pytest
+import responses
+
+from thrall.compat import urlparse
+from thrall.exceptions import AMapBatchStatusError
+from thrall.amap.models import GeoCodeRequestParams
+from thrall.amap.request import AMapBatchRequest, MergedBatchResponse
+from thrall.amap.session import AMapSession
+
+BATCH_URL = re.compile('http://restapi.amap.com/v3/batch.*')
+
+
+def _geo_body(address):
+    return {"status": "1", "info": "OK", "infocode": "10000", "count": "1",
+            "geocodes": [{"formatted_address": address}]}
+
+
+def batch_callback(request):
+    from six.moves.urllib.parse import parse_qs
+
+    ops = json.loads(request.body)['ops']
+    body = [{"status": 200, "body": _geo_body(
+        parse_qs(urlparse(o['url']).query)['address'][0])} for o in ops]
+    return 200, {}, json.dumps(body)
+
+
+class TestAMapBatchRequest(object):
+    def test_split_ops(self):
+        model = AMapBatchRequest(max_ops=20)
+
+        assert [len(i) for i in model.split_ops(range(45))] == [20, 20, 5]
+        assert model.split_ops([]) == []
+
+    def test_batch_chunked(self):
+        session = AMapSession(default_key='x')
+        addresses = [str(i) for i in range(45)]
+
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(responses.POST, BATCH_URL,
+                              callback=batch_callback)
+            r = session.batch(batch_list=[
+                GeoCodeRequestParams(address=i, key='x') for i in addresses])
+
+            assert len(rsps.calls) == 3
+
+        assert r.count == 45
+        assert [i.data[0].formatted_address for i in r.data] == addresses
+
+    def test_batch_not_chunked(self):
+        session = AMapSession(default_key='x')
+
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(responses.POST, BATCH_URL,
+                              callback=batch_callback)
+            r = session.batch(batch_list=[
+                GeoCodeRequestParams(address=str(i), key='x')
+                for i in range(20)])
+
+            assert len(rsps.calls) == 1
+
+        assert r.count == 20
+
+    def test_batch_chunk_error(self):
+        class _R(object):
+            def __init__(self, content):
+                self.content = content
+
+        err = b'{"status":"0","info":"INVALID_USER_KEY","infocode":"10001"}'
+        ok = json.dumps([{"status": 200, "body": _geo_body('a')}]).encode()
+
+        r = MergedBatchResponse([[1], [2, 3]], [_R(ok), _R(err)])
+        data = json.loads(r.content.decode('utf-8'))
+
+        assert len(data) == 3
+        assert data[0]['body']['status'] == '1'
+        assert data[1]['body']['infocode'] == data[2]['body']['infocode'] \
+            == '10001'
+
+    def test_batch_chunk_error_per_item(self):
+        session = AMapSession(default_key='x')
+        calls = []
+
+        def callback(request):
+            calls.append(request)
+            if len(calls) == 2:
+                return 200, {}, json.dumps(
+                    {"status": "0", "info": "INVALID_USER_KEY",
+                     "infocode": "10001"})
+            return batch_callback(request)
+
+        session.brequest.max_workers = 1
+
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(responses.POST, BATCH_URL, callback=callback)
+            r = session.batch(batch_list=[
+                GeoCodeRequestParams(address=str(i), key='x')
+                for i in range(25)])
+
+        with pytest.raises(AMapBatchStatusError) as e:
+            r.raise_for_status()
+
+        assert e.value.errors[:20] == [None] * 20
+        assert all(i is not None for i in e.value.errors[20:])
+
+    def test_batch_chunk_request_error(self):
+        from requests.exceptions import ConnectionError
+
+        session = AMapSession(default_key='x')
+        calls = []
+
+        def callback(request):
+            calls.append(request)
+            if len(calls) == 2:
+                raise ConnectionError('x')
+            return batch_callback(request)
+
+        session.brequest.max_workers = 1
+
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(responses.POST, BATCH_URL, callback=callback)
+            r = session.batch(batch_list=[
+                GeoCodeRequestParams(address=str(i), key='x')
+                for i in range(45)])
+
+        assert r.count == 45
+        assert [i.data[0].formatted_address for i in r.data[:20]] == \
+            [str(i) for i in range(20)]
+        assert [i.status_msg.code for i in r.data[20:40]] == [-1] * 20
+        assert [op['status'] for op in r.raw_ops[20:40]] == [503] * 20
+        assert len(r.data[40].data) == 1
+
+    def test_batch_all_chunks_error(self):
+        from requests.exceptions import ConnectionError
+        from thrall.exceptions import VendorConnectionError
+
+        session = AMapSession(default_key='x')
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.POST, BATCH_URL, body=ConnectionError('x'))
+
+            with pytest.raises(VendorConnectionError):
+                session.batch(batch_list=[
+                    GeoCodeRequestParams(address=str(i), key='x')
+                    for i in range(25)])
+
+    def test_batch_chunk_http_error(self):
+        from requests import HTTPError, Response
+        from thrall.exceptions import VendorHTTPError
+
+        response = Response()
+        response.status_code = 502
+        err = VendorHTTPError('x', data=HTTPError(response=response))
+        ok = json.dumps([{"status": 200, "body": _geo_body('a')}]).encode()
+
+        class _R(object):
+            content = ok
+
+        data = json.loads(MergedBatchResponse(
+            [[1], [2, 3]], [_R(), err]).content.decode('utf-8'))
+
+        assert [op['status'] for op in data] == [200, 502, 502]
+        assert data[1]['body']['info'] == 'VendorHTTPError: x'
+
+
+class TestRateLimit(object):
+    def test_get_data(self, mocker):
+        from thrall.amap.models import GeoCodeRequestParams
+        from thrall.amap.request import AMapRequest
+        from thrall.consts import RouteKey
+
+        limiter = mocker.MagicMock()
+        model = AMapRequest(rate_limiter=limiter)
+        mocker.patch.object(model, 'get')
+
+        model.get_geo_code(GeoCodeRequestParams(address='a', key='x')
+                           .prepare())
+
+        limiter.wait.assert_called_once_with(RouteKey.GEO_CODE, key='x',
+                                             ops=1)
+
+    def test_batch_ops(self, mocker):
+        from thrall.consts import RouteKey
+        from thrall.ratelimit import RateLimiter
+
+        limiter = RateLimiter(key_rate=10)
+        mocker.spy(limiter, 'wait')
+        sleep = mocker.patch('thrall.ratelimit.time.sleep')
+
+        session = AMapSession(default_key='x')
+        session.mount('rate_limiter', limiter)
+
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(responses.POST, BATCH_URL,
+                              callback=batch_callback)
+            session.batch(batch_list=[
+                GeoCodeRequestParams(address=str(i), key='x')
+                for i in range(25)])
+
+        assert sorted(c[1]['ops'] for c in limiter.wait.call_args_list) == \
+            [5, 20]
+        assert all(c[0][0] == RouteKey.BATCH
+                   for c in limiter.wait.call_args_list)
+        assert sleep.called
+
+
+class TestHedge(object):
+    def _model(self, mocker, **kwargs):
+        from thrall.amap.request import AMapRequest
+        from thrall.hedge import HedgePolicy
+        from thrall.latency import LatencyTracker
+
+        tracker = LatencyTracker(min_samples=1)
+        tracker.observe('suggest', 0.01)
+        policy = HedgePolicy(tracker=tracker, min_delay=0, **kwargs)
+        return AMapRequest(hedge_policy=policy)
+
+    def _p(self):
+        from thrall.amap.models import SuggestRequestParams
+
+        return SuggestRequestParams(keyword='a', key='x').prepare()
+
+    def test_first_answer(self, mocker):
+        import threading
+        import time
+
+        model = self._model(mocker, max_ratio=1)
+        threads = []
+        release = threading.Event()
+
+        def get(url, params, **kwargs):
+            threads.append(threading.current_thread())
+            if len(threads) == 1:
+                release.wait(5)
+                return 'slow'
+            return 'fast'
+
+        mocker.patch.object(model, 'get', side_effect=get)
+
+        start = time.time()
+        try:
+            assert model.get_suggest(self._p()) == 'fast'
+            assert time.time() - start < 1
+        finally:
+            release.set()
+
+        assert model.get.call_count == 2
+        assert threading.current_thread() not in threads
+        assert model.hedge_policy.hedges == 1
+
+    def test_no_free_worker(self, mocker):
+        import threading
+
+        model = self._model(mocker, max_ratio=1, max_workers=1)
+        threads = []
+
+        def get(url, params, **kwargs):
+            threads.append(threading.current_thread())
+            return 'r'
+
+        mocker.patch.object(model, 'get', side_effect=get)
+
+        assert model._acquire_hedge_worker()
+        try:
+            assert model.get_suggest(self._p()) == 'r'
+        finally:
+            model._hedge_slots.release()
+
+        assert threads == [threading.current_thread()]
+        assert model.hedge_policy.hedges == 0
+
+        assert model.get_suggest(self._p()) == 'r'
+        assert threads[1] is not threading.current_thread()
+
+    def test_original_error(self, mocker):
+        import threading
+        from thrall.exceptions import VendorConnectionError
+
+        model = self._model(mocker, max_ratio=1)
+        hedged = threading.Event()
+        results = iter(['timeout', 'fast'])
+
+        def get(url, params, **kwargs):
+            r = next(results)
+            if r == 'timeout':
+                hedged.wait(5)
+                raise VendorConnectionError('timeout')
+            hedged.set()
+            return r
+
+        mocker.patch.object(model, 'get', side_effect=get)
+
+        assert model.get_suggest(self._p()) == 'fast'
+        assert model.get.call_count == 2
+        assert model.hedge_policy.hedges == 1
+
+    def test_original_error_not_hedged(self, mocker):
+        from thrall.exceptions import VendorConnectionError
+
+        model = self._model(mocker, max_ratio=1)
+        model.hedge_policy.min_delay = 5
+        mocker.patch.object(model, 'get',
+                            side_effect=VendorConnectionError('x'))
+
+        with pytest.raises(VendorConnectionError):
+            model.get_suggest(self._p())
+
+        assert model.get.call_count == 1
+        assert model.hedge_policy.hedges == 0
+
+    def test_fast_not_hedged(self, mocker):
+        model = self._model(mocker, max_ratio=1)
+        model.hedge_policy.min_delay = 5
+        mocker.patch.object(model, 'get', return_value='r')
+
+        assert model.get_suggest(self._p()) == 'r'
+        assert model.get.call_count == 1
+        assert model.hedge_policy.hedges == 0
+
+    def test_max_ratio(self, mocker):
+        import time
+
+        model = self._model(mocker, max_ratio=0)
+        mocker.patch.object(model, 'get',
+                            side_effect=lambda *a, **kw: time.sleep(0.05))
+
+        model.get_suggest(self._p())
+
+        assert model.get.call_count == 1
+        assert model.hedge_policy.requests == 1
+
+    def test_hedge_error(self, mocker):
+        import time
+        from thrall.exceptions import VendorConnectionError
+
+        model = self._model(mocker, max_ratio=1)
+        results = iter(['slow', 'error'])
+
+        def get(url, params, **kwargs):
+            r = next(results)
+            if r == 'error':
+                raise VendorConnectionError('x')
+            time.sleep(0.05)
+            return r
+
+        mocker.patch.object(model, 'get', side_effect=get)
+
+        assert model.get_suggest(self._p()) == 'slow'
+
+    def test_session_mount(self):
+        from thrall.hedge import HedgePolicy
+
+        session = AMapSession()
+        policy = HedgePolicy()
+        session.mount('hedge', policy)
+
+        assert session.request.hedge_policy is policy
+
+        session.mount('request', session.REQUEST_CLASS())
+        assert session.request.hedge_policy is policy
+
+        with pytest.raises(TypeError):
+            session.mount('hedge', 1)
+
+
+class TestAdaptiveTimeout(object):
+    def _adaptive(self):
+        from thrall.latency import AdaptiveTimeout, LatencyTracker
+
+        return AdaptiveTimeout(tracker=LatencyTracker(min_samples=1),
+                               connect_timeout=0.3, default_timeout=1)
+
+    def test_get_data(self, mocker):
+        from thrall.amap.request import AMapRequest
+
+        model = AMapRequest(adaptive_timeout=self._adaptive())
+        mocker.patch.object(model, 'get')
+
+        model.get_geo_code(GeoCodeRequestParams(address='a', key='x')
+                           .prepare())
+
+        assert model.get.call_args[1]['timeout'] == (0.3, 1)
+        assert model.adaptive_timeout.tracker.count('geo_code') == 1
+
+    def test_timeout_given(self, mocker):
+        from thrall.amap.request import AMapRequest
+
+        model = AMapRequest(adaptive_timeout=self._adaptive())
+        mocker.patch.object(model, 'get')
+
+        model.get_geo_code(GeoCodeRequestParams(address='a', key='x')
+                           .prepare(), timeout=5)
+
+        assert model.get.call_args[1]['timeout'] == 5
+        assert model.adaptive_timeout.tracker.count('geo_code') == 0
+
+    def test_batch_ops(self, mocker):
+        model = AMapBatchRequest(adaptive_timeout=self._adaptive())
+        mocker.patch.object(model, 'post')
+
+        model.get_batch_data([{'url': 'http://a', 'params': {}}] * 11,
+                             key='x')
+
+        assert model.post.call_args[1]['timeout'] == (0.3, 2)
+        assert model.adaptive_timeout.tracker.count('batch') == 1
+
+    def test_session_mount(self):
+        session = AMapSession()
+        adaptive = self._adaptive()
+        session.mount('timeout', adaptive)
+
+        assert session.request.adaptive_timeout is adaptive
+        assert session.brequest.adaptive_timeout is adaptive
+
+        session.mount('batch_request', AMapBatchRequest())
+        assert session.brequest.adaptive_timeout is adaptive
+
+        with pytest.raises(TypeError):
+            session.mount('timeout', 1)
+
+
+class TestCircuitBreaker(object):
+    def test_fail_fast(self):
+        from thrall.amap.request import AMapRequest
+        from thrall.amap.urls import GEO_CODING_URL
+        from thrall.breaker import CircuitBreaker
+        from thrall.exceptions import VendorCircuitOpenError, VendorHTTPError
+
+        breaker = CircuitBreaker(min_requests=2, failure_rate=1)
+        model = AMapRequest(circuit_breaker=breaker)
+        p = GeoCodeRequestParams(address='a', key='x').prepare()
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.GET, GEO_CODING_URL.url, status=503)
+
+            for _ in range(2):
+                with pytest.raises(VendorHTTPError):
+                    model.get_geo_code(p)
+
+            with pytest.raises(VendorCircuitOpenError):
+                model.get_geo_code(p)
+
+            assert len(rsps.calls) == 2
+
+    def test_batch(self, mocker):
+        from thrall.breaker import CircuitBreaker
+        from thrall.consts import RouteKey
+        from thrall.exceptions import VendorCircuitOpenError
+
+        breaker = CircuitBreaker()
+        mocker.patch.object(breaker, 'acquire',
+                            side_effect=VendorCircuitOpenError('x'))
+        model = AMapBatchRequest(circuit_breaker=breaker)
+        mocker.patch.object(model, 'post')
+
+        with pytest.raises(VendorCircuitOpenError):
+            model.get_batch_data([{'url': 'http://a', 'params': {}}],
+                                 key='x')
+
+        assert breaker.acquire.call_args[0][0] == RouteKey.BATCH
+        assert not model.post.called
+
+    def test_session_mount(self):
+        from thrall.breaker import CircuitBreaker
+
+        session = AMapSession()
+        breaker = CircuitBreaker()
+        session.mount('circuit_breaker', breaker)
+
+        assert session.request.circuit_breaker is breaker
+        assert session.brequest.circuit_breaker is breaker
+
+        session.mount('request', session.REQUEST_CLASS())
+        assert session.request.circuit_breaker is breaker
+
+        with pytest.raises(TypeError):
+            session.mount('circuit_breaker', 1)
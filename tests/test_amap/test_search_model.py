@@ -503,6 +503,41 @@ class TestSearchResponseData(object):
         assert model.get_suggestions.call_count == 0
         assert model.get_data.call_count == 0
 
+    def test_compact_mode(self):
+        static = _search_model.SearchResponseData(self.RAW_DATA,
+                                                  static_mode=True)
+        model = _search_model.SearchResponseData(self.RAW_DATA,
+                                                 static_mode='compact')
+
+        assert model.data
+        assert [repr(i) for i in model.data] == \
+            [repr(i) for i in static.data]
+
+        for i in model.data:
+            assert isinstance(i, _search_model.SearchData)
+            assert i._compact
+            assert all(p._compact for p in i.photos)
+
+        assert [i.longitude for i in model.data] == \
+            [i.longitude for i in static.data]
+
+    def test_lazy_mode(self, mocker):
+        model = _search_model.SearchResponseData(self.RAW_DATA,
+                                                 static_mode='lazy')
+
+        mocker.spy(model, 'get_suggestions')
+        mocker.spy(model, 'get_data')
+        mocker.spy(_search_model.SearchData, 'decode_photos')
+
+        assert model.suggestions is model.suggestions
+        assert model.data is model.data
+        assert model.data[0].photos is model.data[0].photos
+
+        assert model.get_suggestions.call_count == 1
+        assert model.get_data.call_count == 1
+        assert _search_model.SearchData.decode_photos.call_count == 1
+        assert model.data[0].biz_ext._static == 'lazy'
+
 
 class TestSearchSuggestion(object):
     def test_init(self):
@@ -1,5 +1,8 @@
 # coding: utf-8
 # flake8: noqa
+import json
+import re
+
 import pytest
 import responses
 
@@ -7,6 +10,8 @@ from thrall.amap.session import AMapSession, SessionHookMixin
 from thrall.amap.adapters import AMapEncodeAdapter, AMapJsonDecoderAdapter
 from thrall.amap.request import AMapRequest
 
+BATCH_URL = re.compile('http://restapi.amap.com/v3/batch.*')
+
 
 class TestHookMixin(object):
     @pytest.mark.parametrize('func_name, prefix, hook', [
@@ -228,3 +233,929 @@ class TestAMapSession(object):
                 response_hook=self.repsonse_hook,
             )
             result.raise_for_status()
+
+
+class TestAMapSessionCache(object):
+    def test_mount_cache(self):
+        from thrall.amap.adapters import AMapCacheAdapter
+
+        model = AMapSession()
+        assert model.cache is None
+
+        adapter = AMapCacheAdapter()
+        model.mount('cache', adapter)
+        assert model.cache == adapter
+
+        with pytest.raises(TypeError):
+            model.mount('cache', 'xxx')
+
+    def test_cached_route(self, mock_geo_code_result):
+        from thrall.amap.adapters import AMapCacheAdapter
+
+        model = AMapSession(default_key='xxx')
+        model.mount('cache', AMapCacheAdapter())
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(mock_geo_code_result)
+            r1 = model.geo_code(address='xxxx')
+            r2 = model.geo_code(address='xxxx', key='yyy')
+
+            assert len(rsps.calls) == 1
+
+        assert r1.data[0].location == r2.data[0].location
+        assert model.cache.hits == 1
+        assert model.cache.misses == 1
+
+    def test_status_error_not_cached(self):
+        from thrall.amap.adapters import AMapCacheAdapter
+        from thrall.amap.urls import GEO_CODING_URL
+
+        model = AMapSession(default_key='xxx')
+        model.mount('cache', AMapCacheAdapter())
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.GET, GEO_CODING_URL.url,
+                     body='{"status": "0", "infocode": "10001"}')
+            model.geo_code(address='xxxx')
+            model.geo_code(address='xxxx')
+
+            assert len(rsps.calls) == 2
+
+
+def _geo_body(request_url):
+    from six.moves.urllib.parse import parse_qs, urlparse
+
+    query = parse_qs(urlparse(request_url).query)
+    addresses = query['address'][0].split('|')
+    return {"status": "1", "info": "OK", "infocode": "10000",
+            "count": str(len(addresses)),
+            "geocodes": [{"formatted_address": a,
+                          "city": query.get('city', [None])[0]}
+                         for a in addresses]}
+
+
+def _batch_geo_callback(request):
+    import json
+
+    ops = json.loads(request.body)['ops']
+    return 200, {}, json.dumps(
+        [{"status": 200, "body": _geo_body(o['url'])} for o in ops])
+
+
+class TestAMapSessionGeoCodeMany(object):
+    def test_iter_geo_code_packs(self):
+        addresses = ['a', 'b', ('c', 'x'), ('d', 'x')] + list('efghijklmno')
+
+        r = list(AMapSession._iter_geo_code_packs(addresses, city='y'))
+
+        assert r == [('y', ['a', 'b']), ('x', ['c', 'd']),
+                     ('y', list('efghijklmn')), ('y', ['o'])]
+
+    def test_geo_code_many_batch_post(self):
+        import re
+
+        addresses = [str(i) for i in range(215)]
+        model = AMapSession(default_key='xxx')
+
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(
+                responses.POST,
+                re.compile('http://restapi.amap.com/v3/batch.*'),
+                callback=_batch_geo_callback)
+            r = model.geo_code_many(iter(addresses), city='bj')
+
+            first = next(r)
+            assert len(rsps.calls) == 1
+
+            r = [first] + list(r)
+            assert len(rsps.calls) == 2
+
+        assert [i.formatted_address for i in r] == addresses
+        assert all(i.city == 'bj' for i in r)
+
+    def test_geo_code_many_single(self):
+        import json
+        from thrall.amap.urls import GEO_CODING_URL
+
+        addresses = [str(i) for i in range(15)]
+        model = AMapSession(default_key='xxx')
+
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(
+                responses.GET, GEO_CODING_URL.url,
+                callback=lambda r: (200, {}, json.dumps(_geo_body(r.url))))
+            r = list(model.geo_code_many(addresses, batch_post=False))
+
+            assert len(rsps.calls) == 2
+
+        assert [i.formatted_address for i in r] == addresses
+
+    def test_geo_code_many_error(self):
+        from thrall.amap.urls import GEO_CODING_URL
+        from thrall.exceptions import AMapStatusError
+
+        model = AMapSession(default_key='xxx')
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.GET, GEO_CODING_URL.url,
+                     body='{"status": "0", "infocode": "10001"}')
+
+            assert list(model.geo_code_many(['a', 'b'], batch_post=False)) \
+                == [None, None]
+
+            with pytest.raises(AMapStatusError):
+                list(model.geo_code_many(['a'], batch_post=False,
+                                         raise_error=True))
+
+    def test_geo_code_many_post_error(self):
+        import re
+        from thrall.exceptions import AMapStatusError
+
+        addresses = [str(i) for i in range(25)]
+        model = AMapSession(default_key='xxx')
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.POST,
+                     re.compile('http://restapi.amap.com/v3/batch.*'),
+                     body='{"status": "0", "infocode": "10001"}')
+
+            assert list(model.geo_code_many(addresses)) == [None] * 25
+
+            with pytest.raises(AMapStatusError):
+                list(model.geo_code_many(addresses, raise_error=True))
+
+
+def _regeo_callback(request):
+    import json
+    from six.moves.urllib.parse import parse_qs, urlparse
+
+    locations = parse_qs(urlparse(request.url).query)['location'][0]
+    return 200, {}, json.dumps({
+        "status": "1", "info": "OK", "infocode": "10000",
+        "regeocodes": [{"formatted_address": i}
+                       for i in locations.split('|')]})
+
+
+class TestAMapSessionReGeoCodeMany(object):
+    def test_regeo_code_many(self):
+        from thrall.amap.common import merge_location
+        from thrall.amap.urls import REGEO_CODING_URL
+
+        consumed = []
+        locations = [(116 + i * 1e-4, 39.9) for i in range(205)]
+
+        def _iter_locations():
+            for i in locations:
+                consumed.append(i)
+                yield i
+
+        model = AMapSession(default_key='xxx')
+
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(responses.GET, REGEO_CODING_URL.url,
+                              callback=_regeo_callback)
+            r = model.regeo_code_many(_iter_locations(), concurrency=2)
+
+            first = next(r)
+            assert len(consumed) <= 2 * 20
+
+            r = [first] + list(r)
+            assert len(rsps.calls) == 11
+
+        assert [i.formatted_address for i in r] == \
+            [merge_location(*i) for i in locations]
+
+    def test_regeo_code_many_error(self):
+        from thrall.amap.urls import REGEO_CODING_URL
+
+        model = AMapSession(default_key='xxx')
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.GET, REGEO_CODING_URL.url,
+                     body='{"status": "0", "infocode": "10001"}')
+
+            assert list(model.regeo_code_many(['1,2', '3,4'])) == \
+                [None, None]
+
+
+class TestAMapSessionTemplate(object):
+    @pytest.mark.parametrize('func_name, fields, constants, calls', [
+        ('regeo_code', ('location',),
+         dict(radius=1000, extensions={'poi_type': 'a|b', 'road_level': 1}),
+         [dict(location=(116.1, 39.2)), dict(location='116.3,39.1'),
+          dict(location=[(1, 2), (3, 4)])]),
+        ('search_around', ('location',), dict(keywords='abc', radius=500),
+         [dict(location=(116.1, 39.2)), dict(location='1,2')]),
+        ('geo_code', ('address',), dict(city='xx'),
+         [dict(address='a'), dict(address=['a', 'b'])]),
+        ('search_text', ('keywords', 'page'), dict(city='xx'),
+         [dict(keywords='a', page=1), dict(keywords='b', page=3),
+          dict(keywords='c')]),
+        ('regeo_code', ('location', 'radius'), dict(radius=1000),
+         [dict(location=(116.1, 39.2), radius=1000),
+          dict(location=(116.1, 39.2), radius=500)]),
+        ('search_around', ('location', 'page'), dict(page=1),
+         [dict(location='1,2', page=1), dict(location='1,2', page=2)]),
+    ])
+    def test_same_params(self, func_name, fields, constants, calls):
+        from thrall.amap.models import Extensions
+
+        if 'extensions' in constants:
+            constants['extensions'] = Extensions(True,
+                                                 **constants['extensions'])
+
+        model = AMapSession(default_key='xxx', default_private_key='yyy')
+        template = model.template(func_name, fields, **constants)
+
+        for c in calls:
+            kwargs = dict(constants, **c)
+            p = getattr(model.encoder, 'encode_' + func_name)(
+                key='xxx', private_key='yyy', **kwargs)
+
+            assert template.prepare(**c).params == p.params
+
+        assert template._getters
+
+    def test_validation_kept(self, mocker):
+        from thrall.utils import params_validation
+
+        mocker.patch.object(params_validation, 'skip',
+                            side_effect=AssertionError)
+        model = AMapSession()
+        template = model.template('regeo_code', radius=100)
+
+        assert template._proto.location is None
+        assert template._proto.key is None
+        assert template.prepare((1, 2)).params['location'] == \
+            '1.000000,2.000000'
+
+    def test_unknown_field(self):
+        model = AMapSession(default_key='xxx')
+
+        with pytest.raises(TypeError):
+            model.template('regeo_code', ('xxx',))
+
+    def test_request(self, mocker):
+        from thrall.amap.urls import REGEO_CODING_URL
+
+        model = AMapSession(default_key='xxx')
+        hook = mocker.MagicMock()
+        template = model.template('regeo_code', radius=100,
+                                  response_hook=hook)
+
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(responses.GET, REGEO_CODING_URL.url,
+                              callback=_regeo_callback)
+            r = [template((116, 39 + i)) for i in range(3)]
+
+            assert 'radius=100' in rsps.calls[-1].request.url
+            assert 'key=xxx' in rsps.calls[-1].request.url
+
+        assert [i.data[0].formatted_address for i in r] == \
+            ['116.000000,{:.6f}'.format(39 + i) for i in range(3)]
+        assert hook.call_count == 3
+
+
+class TestAMapSessionKeyPool(object):
+    def test_mount_key_pool(self):
+        from thrall.amap.key_pool import AMapKeyPool
+
+        model = AMapSession()
+        assert model.key_pool is None
+
+        pool = AMapKeyPool(['a'])
+        model.mount('key_pool', pool)
+        assert model.key_pool is pool
+
+        with pytest.raises(TypeError):
+            model.mount('key_pool', ['a'])
+
+    def test_rotate_keys(self):
+        import re
+        from thrall.amap.key_pool import AMapKeyPool
+        from thrall.amap.urls import GEO_CODING_URL
+
+        model = AMapSession()
+        model.mount('key_pool', AMapKeyPool(['a', ('b', 'pb')]))
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.GET, re.compile(GEO_CODING_URL.url + '.*'),
+                     body='{"status": "1", "infocode": "10000"}')
+            for _ in range(3):
+                model.geo_code(address='xx')
+            model.geo_code(address='xx', key='c')
+
+            urls = [c.request.url for c in rsps.calls]
+
+        assert ['key=a' in urls[0], 'key=b' in urls[1], 'key=a' in urls[2],
+                'key=c' in urls[3]] == [True] * 4
+        assert 'sig=' in urls[1] and 'sig=' not in urls[0]
+
+    def test_route_away_from_limited_key(self):
+        import json
+        from thrall.amap.key_pool import AMapKeyPool
+        from thrall.amap.urls import GEO_CODING_URL
+        from six.moves.urllib.parse import parse_qs, urlparse
+
+        def callback(request):
+            key = parse_qs(urlparse(request.url).query)['key'][0]
+            infocode = '10003' if key == 'a' else '10000'
+            return 200, {}, json.dumps({"status": "1", "infocode": infocode})
+
+        model = AMapSession()
+        model.mount('key_pool', AMapKeyPool(['a', 'b']))
+
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(responses.GET, GEO_CODING_URL.url,
+                              callback=callback)
+            for _ in range(4):
+                model.geo_code(address='xx')
+
+        assert [i['used_today'] for i in model.key_pool.stats()] == [1, 3]
+        assert model.key_pool.stats()[0]['blocked']
+
+    def test_cached_response_released(self, mock_geo_code_result):
+        from thrall.amap.adapters import AMapCacheAdapter
+        from thrall.amap.key_pool import AMapKeyPool
+
+        model = AMapSession()
+        model.mount('cache', AMapCacheAdapter())
+        model.mount('key_pool', AMapKeyPool(['a']))
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(mock_geo_code_result)
+            model.geo_code(address='xxxx')
+            model.geo_code(address='xxxx')
+
+        assert model.key_pool.stats()[0]['used_today'] == 1
+
+    def test_geo_code_many_batch_post(self):
+        import re
+        from thrall.amap.key_pool import AMapKeyPool
+
+        model = AMapSession()
+        model.mount('key_pool', AMapKeyPool(['a', 'b']))
+
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(
+                responses.POST,
+                re.compile('http://restapi.amap.com/v3/batch.*'),
+                callback=_batch_geo_callback)
+            r = list(model.geo_code_many(str(i) for i in range(215)))
+
+            urls = [c.request.url for c in rsps.calls]
+
+        assert len(r) == 215
+        assert ['key=a' in urls[0], 'key=b' in urls[1]] == [True, True]
+        assert [i['used_today'] for i in model.key_pool.stats()] == [20, 2]
+
+    def test_template(self):
+        from thrall.amap.key_pool import AMapKeyPool
+        from thrall.amap.urls import REGEO_CODING_URL
+
+        model = AMapSession()
+        model.mount('key_pool', AMapKeyPool([('a', 'pa'), 'b']))
+        template = model.template('regeo_code', radius=100)
+
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(responses.GET, REGEO_CODING_URL.url,
+                              callback=_regeo_callback)
+            r = [template((116, 39 + i)) for i in range(3)]
+
+            urls = [c.request.url for c in rsps.calls]
+
+        assert ['key=a' in urls[0], 'key=b' in urls[1], 'key=a' in urls[2]] \
+            == [True] * 3
+        assert 'sig=' in urls[2] and 'sig=' not in urls[1]
+        assert r[2].data[0].formatted_address == '116.000000,41.000000'
+
+
+class TestAMapSessionRateLimiter(object):
+    def test_mount_rate_limiter(self):
+        from thrall.ratelimit import RateLimiter
+
+        model = AMapSession()
+        limiter = RateLimiter(default_rate=10)
+
+        model.mount('rate_limiter', limiter)
+        assert model.request.rate_limiter is limiter
+        assert model.brequest.rate_limiter is limiter
+
+        model.mount('request', AMapRequest())
+        assert model.request.rate_limiter is limiter
+
+        model.mount('rate_limiter', None)
+        assert model.request.rate_limiter is None
+        assert model.brequest.rate_limiter is None
+
+        with pytest.raises(TypeError):
+            model.mount('rate_limiter', 10)
+
+
+class TestAMapSessionRetry(object):
+    @pytest.fixture
+    def sleep(self, mocker):
+        return mocker.patch('thrall.amap.session.time.sleep')
+
+    def _session(self, **kwargs):
+        from thrall.retry import RetryPolicy
+
+        model = AMapSession(default_key='xxx')
+        model.mount('retry', RetryPolicy(**kwargs))
+        return model
+
+    def test_mount_retry(self):
+        model = AMapSession()
+        assert model.retry_policy is None
+
+        with pytest.raises(TypeError):
+            model.mount('retry', 3)
+
+    def test_retry_connection_error(self, sleep):
+        from requests.exceptions import ConnectionError
+        from thrall.amap.urls import GEO_CODING_URL
+
+        model = self._session()
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.GET, GEO_CODING_URL.url,
+                     body=ConnectionError('x'))
+            rsps.add(responses.GET, GEO_CODING_URL.url, status=502)
+            rsps.add(responses.GET, GEO_CODING_URL.url,
+                     body='{"status": "1", "infocode": "10000"}')
+            r = model.geo_code(address='xx')
+
+            assert len(rsps.calls) == 3
+
+        r.raise_for_status()
+        assert sleep.call_count == 2
+
+    def test_not_retry(self, sleep):
+        from thrall.amap.urls import GEO_CODING_URL
+        from thrall.exceptions import VendorHTTPError
+
+        model = self._session()
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.GET, GEO_CODING_URL.url, status=404)
+
+            with pytest.raises(VendorHTTPError):
+                model.geo_code(address='xx')
+
+            assert len(rsps.calls) == 1
+
+    def test_give_up(self, sleep):
+        from thrall.amap.urls import GEO_CODING_URL
+        from thrall.exceptions import VendorHTTPError
+
+        model = self._session(max_retries=2)
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.GET, GEO_CODING_URL.url, status=500)
+
+            with pytest.raises(VendorHTTPError):
+                model.geo_code(address='xx')
+
+            assert len(rsps.calls) == 3
+
+    def test_retry_infocode(self, sleep):
+        from thrall.amap.consts import QPS_LIMIT_INFOCODES
+        from thrall.amap.urls import GEO_CODING_URL
+
+        model = self._session(retry_infocodes=QPS_LIMIT_INFOCODES)
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.GET, GEO_CODING_URL.url,
+                     body='{"status": "0", "infocode": "10004"}')
+            rsps.add(responses.GET, GEO_CODING_URL.url,
+                     body='{"status": "0", "infocode": "10001"}')
+            r = model.geo_code(address='xx')
+
+            assert len(rsps.calls) == 2
+
+        assert r.status_msg.code == 10001
+
+    def test_retry_infocode_with_key_pool(self, sleep):
+        from thrall.amap.consts import QPS_LIMIT_INFOCODES
+        from thrall.amap.key_pool import AMapKeyPool
+        from thrall.amap.urls import GEO_CODING_URL
+        from thrall.retry import RetryPolicy
+
+        model = AMapSession()
+        model.mount('key_pool', AMapKeyPool(['a', 'b']))
+        model.mount('retry', RetryPolicy(retry_infocodes=QPS_LIMIT_INFOCODES))
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.GET, GEO_CODING_URL.url,
+                     body='{"status": "0", "infocode": "10004"}')
+            rsps.add(responses.GET, GEO_CODING_URL.url,
+                     body='{"status": "1", "infocode": "10000"}')
+            model.geo_code(address='xx').raise_for_status()
+
+            urls = [c.request.url for c in rsps.calls]
+
+        assert ['key=a' in urls[0], 'key=b' in urls[1]] == [True, True]
+
+    def test_retry_batch_ops(self, sleep):
+        import json
+        import re
+        from thrall.amap.consts import QPS_LIMIT_INFOCODES
+        from thrall.amap.models import GeoCodeRequestParams
+        from six.moves.urllib.parse import parse_qs, urlparse
+
+        posted = []
+
+        def callback(request):
+            ops = json.loads(request.body)['ops']
+            addresses = [parse_qs(urlparse(o['url']).query)['address'][0]
+                         for o in ops]
+            posted.append(addresses)
+            # odd ops fail at first post
+            return 200, {}, json.dumps([
+                {"status": 200, "body": {
+                    "status": "0", "infocode": "10004"}}
+                if len(posted) == 1 and int(a) % 2 else
+                {"status": 200, "body": {
+                    "status": "1", "infocode": "10000",
+                    "geocodes": [{"formatted_address": a}]}}
+                for a in addresses])
+
+        model = self._session(retry_infocodes=QPS_LIMIT_INFOCODES)
+
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(
+                responses.POST,
+                re.compile('http://restapi.amap.com/v3/batch.*'),
+                callback=callback)
+            r = model.batch(batch_list=[
+                GeoCodeRequestParams(address=str(i), key='xxx')
+                for i in range(6)])
+
+        r.raise_for_status()
+        assert posted == [[str(i) for i in range(6)], ['1', '3', '5']]
+        assert [i.data[0].formatted_address for i in r.data] == \
+            [str(i) for i in range(6)]
+        assert sleep.call_count == 1
+
+    def test_retry_batch_ops_give_up(self, sleep):
+        import json
+        import re
+        from thrall.amap.models import GeoCodeRequestParams
+        from thrall.exceptions import AMapBatchStatusError
+
+        def callback(request):
+            ops = json.loads(request.body)['ops']
+            return 200, {}, json.dumps(
+                [{"status": 503, "body": {"status": "0", "infocode": "-1"}}] +
+                [{"status": 200, "body": {"status": "1", "infocode": "10000"}}
+                 for _ in ops[1:]])
+
+        model = self._session(max_retries=2)
+
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(
+                responses.POST,
+                re.compile('http://restapi.amap.com/v3/batch.*'),
+                callback=callback)
+            r = model.batch(batch_list=[
+                GeoCodeRequestParams(address=str(i), key='xxx')
+                for i in range(3)])
+
+            assert len(rsps.calls) == 3
+
+        with pytest.raises(AMapBatchStatusError):
+            r.raise_for_status()
+
+
+class TestAMapSessionPool(object):
+    def test_share_pool(self):
+        from thrall.amap.request import AMapBatchRequest
+
+        model = AMapSession(pool_options=dict(pool_maxsize=100))
+
+        assert model.brequest.session is model.request.session
+        assert model.request.session.get_adapter(
+            'https://x')._pool_maxsize == 100
+
+        request = AMapRequest()
+        model.mount('request', request)
+        assert model.brequest.session is request.session
+
+    def test_not_share_given_session(self):
+        from requests import Session
+        from thrall.amap.request import AMapBatchRequest
+
+        model = AMapSession()
+        session = Session()
+        model.mount('batch_request', AMapBatchRequest(session=session))
+
+        assert model.brequest.session is session
+
+
+class TestAMapSessionSingleFlight(object):
+    def test_mount_single_flight(self):
+        from thrall.singleflight import SingleFlight
+
+        model = AMapSession()
+        assert model.single_flight is None
+
+        model.mount('single_flight', SingleFlight())
+        assert isinstance(model.single_flight, SingleFlight)
+
+        with pytest.raises(TypeError):
+            model.mount('single_flight', 1)
+
+    def test_coalesce(self):
+        import threading
+        import time
+        from thrall.amap.urls import GEO_CODING_URL
+        from thrall.singleflight import SingleFlight
+
+        model = AMapSession(default_key='xxx')
+        model.mount('single_flight', SingleFlight())
+        release = threading.Event()
+        results = []
+
+        def callback(request):
+            release.wait()
+            return 200, {}, '{"status": "1", "infocode": "10000"}'
+
+        def worker(key):
+            results.append(model.geo_code(address='xx', key=key))
+
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(responses.GET, GEO_CODING_URL.url,
+                              callback=callback)
+            threads = [threading.Thread(target=worker, args=(str(i),))
+                       for i in range(5)]
+            for t in threads:
+                t.start()
+
+            while model.single_flight.shared < 4:
+                time.sleep(0.001)
+            release.set()
+            for t in threads:
+                t.join()
+
+            assert len(rsps.calls) == 1
+
+        assert len(results) == 5
+        assert all(r is results[0] for r in results)
+
+    def test_not_coalesce_other_route(self, mock_regeo_code_result):
+        from thrall.singleflight import SingleFlight
+
+        model = AMapSession(default_key='xxx')
+        model.mount('single_flight', SingleFlight(routes=['geo_code']))
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(mock_regeo_code_result)
+            model.regeo_code(location='1,2')
+            model.regeo_code(location='1,2')
+
+            assert len(rsps.calls) == 2
+
+        assert model.single_flight.shared == 0
+
+
+class TestAMapSessionDispatcher(object):
+    def _body(self, n, status=200):
+        body = {"status": "1", "infocode": "10000",
+                "regeocode": {"formatted_address": "xx"}}
+        return json.dumps([{"status": status, "body": body}] * n)
+
+    def test_mount_dispatcher(self):
+        from thrall.amap.dispatcher import BatchDispatcher
+
+        model = AMapSession()
+        assert model.dispatcher is None
+
+        model.mount('dispatcher', BatchDispatcher())
+        assert isinstance(model.dispatcher, BatchDispatcher)
+
+        with pytest.raises(TypeError):
+            model.mount('dispatcher', 1)
+
+    def test_dispatch(self):
+        import threading
+        from thrall.amap.dispatcher import BatchDispatcher
+
+        model = AMapSession(default_key='xxx')
+        model.mount('dispatcher', BatchDispatcher(max_wait=5, max_ops=4))
+        results = []
+        bodies = []
+
+        def callback(request):
+            bodies.append(json.loads(request.body))
+            return 200, {}, self._body(4)
+
+        def worker(i):
+            results.append(model.regeo_code(location='1,{}'.format(i)))
+
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(responses.POST, BATCH_URL, callback=callback)
+            threads = [threading.Thread(target=worker, args=(i,))
+                       for i in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+            assert len(rsps.calls) == 1
+
+        assert len(bodies[0]['ops']) == 4
+        assert all('/v3/geocode/regeo' in i['url'] for i in bodies[0]['ops'])
+        assert len(results) == 4
+        assert all(r.status == 1 for r in results)
+        assert model.dispatcher.posts == 1
+
+    def test_not_dispatch_other_route(self, mock_geo_code_result):
+        from thrall.amap.dispatcher import BatchDispatcher
+
+        model = AMapSession(default_key='xxx')
+        model.mount('dispatcher', BatchDispatcher(routes=['regeo_code']))
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(mock_geo_code_result)
+            model.geo_code(address='xx')
+
+            assert len(rsps.calls) == 1
+
+        assert model.dispatcher.posts == 0
+
+    def test_retry_op_error(self, mocker):
+        from thrall.amap.dispatcher import BatchDispatcher
+        from thrall.retry import RetryPolicy
+
+        mocker.patch('thrall.amap.session.time.sleep')
+        model = AMapSession(default_key='xxx')
+        model.mount('dispatcher', BatchDispatcher(max_wait=0))
+        model.mount('retry', RetryPolicy())
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.POST, BATCH_URL, body=self._body(1, 500))
+            rsps.add(responses.POST, BATCH_URL, body=self._body(1))
+            r = model.regeo_code(location='1,2')
+
+            assert len(rsps.calls) == 2
+
+        assert r.status == 1
+
+
+class TestAMapSessionMetrics(object):
+    def test_mount_metrics(self):
+        from thrall.metrics import MetricsCollector
+
+        model = AMapSession()
+        assert model.metrics is None
+
+        model.mount('metrics', MetricsCollector())
+        assert isinstance(model.metrics, MetricsCollector)
+
+        with pytest.raises(TypeError):
+            model.mount('metrics', 1)
+
+    def test_route(self, mock_geo_code_result):
+        from thrall.amap.adapters import AMapCacheAdapter
+        from thrall.metrics import MetricsCollector
+
+        model = AMapSession(default_key='xxxx')
+        model.mount('metrics', MetricsCollector(key_label=None))
+        model.mount('cache', AMapCacheAdapter())
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(mock_geo_code_result)
+            model.geo_code(address='xx')
+            model.geo_code(address='xx')
+
+        item = model.metrics.snapshot()['geo_code']['']
+
+        assert item['requests'] == 2
+        assert item['cache_hits'] == 1
+        assert item['bytes'] == len(mock_geo_code_result.body.encode('utf-8'))
+        assert item['infocodes'] == {10000: 1}
+        assert item['latency']['encode']['count'] == 2
+        assert item['latency']['request']['count'] == 1
+        assert item['latency']['decode']['count'] == 1
+
+    def test_retries(self, mocker):
+        from thrall.amap.urls import GEO_CODING_URL
+        from thrall.metrics import MetricsCollector
+        from thrall.retry import RetryPolicy
+
+        mocker.patch('thrall.amap.session.time.sleep')
+        model = AMapSession(default_key='xxxx')
+        model.mount('metrics', MetricsCollector())
+        model.mount('retry', RetryPolicy())
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.GET, GEO_CODING_URL.url, status=500)
+            rsps.add(responses.GET, GEO_CODING_URL.url,
+                     body='{"status": "1", "infocode": "10000"}')
+            model.geo_code(address='xx')
+
+        item = model.metrics.snapshot()['geo_code']['***xxxx']
+
+        assert (item['requests'], item['errors'], item['retries']) == \
+            (1, 1, 1)
+        assert item['latency']['request']['count'] == 2
+
+    def test_batch(self, mock_batch_result):
+        from thrall.amap.models import GeoCodeRequestParams
+        from thrall.metrics import MetricsCollector
+
+        model = AMapSession(default_key='xxxx')
+        model.mount('metrics', MetricsCollector(key_label=None))
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(mock_batch_result)
+            d = model.batch(batch_list=[
+                GeoCodeRequestParams(address='xx', key='xxxx')])
+
+        item = model.metrics.snapshot()['batch']['']
+
+        assert item['requests'] == 1
+        assert sum(item['infocodes'].values()) == len(d.data)
+        assert item['latency']['request']['count'] == 1
+
+
+class TestAMapSessionTiming(object):
+    def test_disabled(self, mock_geo_code_result):
+        model = AMapSession(default_key='xxx')
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(mock_geo_code_result)
+            r = model.geo_code(address='xx')
+
+        assert r.timing is None
+
+    def test_route(self, mock_geo_code_result):
+        from thrall.timing import PhaseTiming
+
+        model = AMapSession(default_key='xxx', record_timing=True)
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(mock_geo_code_result)
+            r = model.geo_code(address='xx')
+
+        timing = r.timing
+        assert isinstance(timing, PhaseTiming)
+        assert timing.responses == 1
+        assert timing.bytes_received == len(
+            mock_geo_code_result.body.encode('utf-8'))
+        assert all(getattr(timing, i) > 0
+                   for i in ('encode', 'network', 'parse', 'decode_total'))
+
+    def test_cached(self, mock_geo_code_result):
+        from thrall.amap.adapters import AMapCacheAdapter
+
+        model = AMapSession(default_key='xxx', record_timing=True)
+        model.mount('cache', AMapCacheAdapter())
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(mock_geo_code_result)
+            model.geo_code(address='xx')
+            r = model.geo_code(address='xx')
+
+        assert r.timing.responses == 0
+        assert r.timing.network == 0
+        assert r.timing.parse > 0
+
+    def test_error(self):
+        from thrall.amap.urls import GEO_CODING_URL
+        from thrall.exceptions import VendorHTTPError
+
+        model = AMapSession(default_key='xxx', record_timing=True)
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.GET, GEO_CODING_URL.url, status=500)
+
+            with pytest.raises(VendorHTTPError) as err:
+                model.geo_code(address='xx')
+
+        assert err.value.timing.network > 0
+        assert err.value.timing.responses == 0
+
+    def test_template(self, mock_regeo_code_result):
+        model = AMapSession(default_key='xxx', record_timing=True)
+        regeo = model.template('regeo_code')
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(mock_regeo_code_result)
+            r = regeo(location='1,2')
+
+        assert r.timing.encode > 0
+        assert r.timing.responses == 1
+
+    def test_batch(self, mock_batch_result):
+        from thrall.amap.models import GeoCodeRequestParams
+
+        model = AMapSession(default_key='xxx', record_timing=True)
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(mock_batch_result)
+            d = model.batch(batch_list=[
+                GeoCodeRequestParams(address='xx', key='xxx')])
+
+        assert d.timing.responses == 1
+        assert d.timing.parse > 0
@@ -20,6 +20,40 @@ class TestBaseRequest(object):
         model = BaseRequest(session=session)
 
         assert id(model.session) == id(session)
+        assert not model.pool_shareable
+
+    @pytest.mark.parametrize('prefix', ['http://', 'https://'])
+    def test_request_pool_options(self, prefix):
+        model = BaseRequest(pool_connections=3, pool_maxsize=20,
+                            pool_block=True)
+        adapter = model.session.get_adapter(prefix + 'example.com')
+
+        assert adapter._pool_connections == 3
+        assert adapter._pool_maxsize == 20
+        assert adapter._pool_block is True
+        assert adapter.max_retries.total == 0
+        assert model.pool_shareable
+
+    def test_request_max_retries(self):
+        model = BaseRequest(max_retries=2)
+        adapter = model.session.get_adapter('http://example.com')
+
+        assert adapter.max_retries.total == 2
+
+    def test_request_keep_alive(self):
+        assert BaseRequest().session.headers['Connection'] == 'keep-alive'
+        assert BaseRequest(keep_alive=False).session.headers[
+            'Connection'] == 'close'
+
+    def test_share_pool(self):
+        owner = BaseRequest()
+        model = BaseRequest()
+
+        model.share_pool(owner)
+        assert model.session is owner.session
+
+        with pytest.raises(TypeError):
+            model.share_pool(model)
 
     @responses.activate
     def test_get(self):
@@ -166,6 +200,99 @@ class TestBaseData(object):
 
         assert model.decode_param.call_count == 0
 
+    def test_compact_data(self):
+        class Mock(BaseData):
+            _properties = ('a', 'b', 'type', 'a')
+
+            @property
+            def double_a(self):
+                return self.a * 2
+
+        raw_data = {'a': 1, 'b': '2', 'type_': 'x'}
+
+        model = Mock(raw_data, static='compact')
+
+        assert isinstance(model, Mock)
+        assert type(model) is Mock.compact_class()
+        assert type(model).__name__ == 'Mock'
+        assert model.__dict__ == {}
+        assert (model.a, model.b, model.type, model.double_a) == \
+            (1, '2', 'x', 2)
+        assert repr(model) == repr(Mock(raw_data, static=True))
+
+        with pytest.raises(AttributeError):
+            print(model.xx)
+
+    def test_compact_data_set_and_del_attr(self):
+        class Mock(BaseData):
+            _properties = ('a', 'b')
+
+        raw_data = {'a': 1, 'b': '2'}
+        model = Mock(raw_data, static='compact')
+
+        model.a = 'xxx'
+        model.other = 1
+
+        assert model.a == 'xxx'
+        assert model.other == 1
+        assert model._data['a'] == 1
+
+        del model.b
+
+        assert model.b is None
+        assert 'b' not in model._data
+
+    def test_compact_data_children(self):
+        class Child(BaseData):
+            _properties = ('c',)
+
+        class Mock(BaseData):
+            _properties = ('a', 'children')
+
+            def decode_param(self, p, data):
+                if p == 'children':
+                    return [Child(i, self._static) for i in data[p]]
+
+        model = Mock({'a': 1, 'children': [{'c': 1}, {'c': 2}]},
+                     static='compact')
+
+        assert [type(i) for i in model.children] == \
+            [Child.compact_class()] * 2
+        assert [i.c for i in model.children] == [1, 2]
+
+    def test_lazy_data(self, mocker):
+        class Mock(BaseData):
+            _properties = ('a', 'b', 'type')
+
+        raw_data = {'a': 1, 'b': '2', 'type_': 'x'}
+
+        mocker.spy(Mock, 'decode_param')
+        model = Mock(raw_data, static='lazy')
+
+        assert Mock.decode_param.call_count == 0
+        assert 'a' not in model.__dict__
+
+        assert model.a == model.a == 1
+        assert model.type == model.type == 'x'
+        assert Mock.decode_param.call_count == 2
+        assert model.__dict__['a'] == 1
+
+        with pytest.raises(AttributeError):
+            print(model.xx)
+
+    def test_lazy_data_set_attr(self):
+        class Mock(BaseData):
+            _properties = ('a', 'b')
+
+        raw_data = {'a': 1, 'b': '2'}
+        model = Mock(raw_data, static='lazy')
+
+        model.a = 'xxx'
+
+        assert model.a == 'xxx'
+        assert model._data['a'] == 1
+        assert model.b == '2'
+
 
 class TestBaseAdapterMixin(object):
     class MockAdapter(BaseAdapterMixin):
@@ -0,0 +1,123 @@
+# coding: utf-8
+# flake8: noqa
+import pytest
+
+from thrall.breaker import CircuitBreaker
+from thrall.consts import RouteKey
+from thrall.exceptions import (
+    VendorCircuitOpenError,
+    VendorConnectionError,
+    VendorHTTPError,
+    VendorParamError,
+)
+
+
+class _Response(object):
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+def _fail(breaker, route_key='suggest', key=None, err=None):
+    with pytest.raises(type(err) if err else VendorConnectionError):
+        with breaker.guard(route_key, key):
+            raise err or VendorConnectionError('x')
+
+
+def _succeed(breaker, route_key='suggest', key=None):
+    with breaker.guard(route_key, key):
+        pass
+
+
+class TestCircuitBreaker(object):
+    def _breaker(self, **kwargs):
+        kwargs.setdefault('min_requests', 4)
+        kwargs.setdefault('window', 4)
+        return CircuitBreaker(**kwargs)
+
+    def test_open(self):
+        breaker = self._breaker(failure_rate=0.5)
+
+        _succeed(breaker)
+        _succeed(breaker)
+        _fail(breaker)
+        assert breaker.state('suggest') == 'closed'
+
+        _fail(breaker)
+        assert breaker.state(RouteKey.SUGGEST) == 'open'
+        assert breaker.stats() == {'suggest': 'open'}
+
+        with pytest.raises(VendorCircuitOpenError):
+            _succeed(breaker)
+
+        assert breaker.rejected == 1
+        _succeed(breaker, route_key='geo_code')
+
+    def test_window(self):
+        breaker = self._breaker(failure_rate=0.75)
+
+        for _ in range(2):
+            _fail(breaker)
+        for _ in range(4):
+            _succeed(breaker)
+        _fail(breaker)
+        _fail(breaker)
+
+        assert breaker.state('suggest') == 'closed'
+
+    def test_half_open(self, clock):
+        breaker = self._breaker(failure_rate=1, open_seconds=5, clock=clock)
+
+        for _ in range(4):
+            _fail(breaker)
+        assert breaker.state('suggest') == 'open'
+
+        clock.now = 5
+        circuit = breaker.acquire('suggest')
+        assert breaker.state('suggest') == 'half_open'
+
+        # one probe at a time
+        with pytest.raises(VendorCircuitOpenError):
+            breaker.acquire('suggest')
+
+        breaker.record(circuit, False)
+        assert breaker.state('suggest') == 'open'
+
+        clock.now = 10
+        _succeed(breaker)
+        assert breaker.state('suggest') == 'closed'
+
+    def test_half_open_release(self, clock):
+        breaker = self._breaker(failure_rate=1, clock=clock)
+
+        for _ in range(4):
+            _fail(breaker)
+
+        clock.now = 100
+        _fail(breaker, err=VendorParamError('x'))
+        assert breaker.state('suggest') == 'half_open'
+
+        _succeed(breaker)
+        assert breaker.state('suggest') == 'closed'
+
+    def test_is_failure(self):
+        assert CircuitBreaker.is_failure(VendorConnectionError('x'))
+        assert CircuitBreaker.is_failure(
+            VendorHTTPError('x', data=_Response(502)))
+        assert not CircuitBreaker.is_failure(
+            VendorHTTPError('x', data=_Response(404)))
+        assert not CircuitBreaker.is_failure(ValueError('x'))
+
+    def test_by_key(self):
+        breaker = self._breaker(failure_rate=1, by_key=True)
+
+        for _ in range(4):
+            _fail(breaker, key='a')
+
+        assert breaker.state('suggest', 'a') == 'open'
+        _succeed(breaker, key='b')
+
+    def test_routes(self):
+        breaker = CircuitBreaker(routes=[RouteKey.SUGGEST])
+
+        assert breaker.is_enabled('suggest')
+        assert not breaker.is_enabled('geo_code')
@@ -0,0 +1,123 @@
+# coding: utf-8
+# flake8: noqa
+import pytest
+
+from thrall.base import BaseCacheAdapter
+from thrall.cache import MemoryCache, SQLiteCache
+from thrall.consts import RouteKey
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def backend(request, tmpdir):
+    if request.param == 'memory':
+        return MemoryCache(max_size=3)
+    return SQLiteCache(str(tmpdir.join('cache.db')), max_size=3)
+
+
+class TestCacheBackend(object):
+    def test_get_set(self, backend):
+        assert backend.get('a') is None
+
+        backend.set('a', b'1')
+
+        assert backend.get('a') == b'1'
+        assert len(backend) == 1
+
+    def test_ttl(self, backend, mocker):
+        backend.set('a', b'1', ttl=10)
+        backend.set('b', b'2')
+
+        mocker.patch('thrall.cache.time.time', return_value=1e11)
+
+        assert backend.get('a') is None
+        assert backend.get('b') == b'2'
+
+    def test_lru_evict(self, backend):
+        for i in 'abc':
+            backend.set(i, i.encode())
+
+        backend.get('a')
+        backend.set('d', b'd')
+
+        assert backend.get('b') is None
+        assert backend.get('a') == b'a'
+        assert len(backend) == 3
+        assert backend.evictions == 1
+
+    def test_delete_and_clear(self, backend):
+        backend.set('a', b'1')
+        backend.set('b', b'2')
+
+        backend.delete('a')
+        assert backend.get('a') is None
+        assert len(backend) == 1
+
+        backend.clear()
+        assert len(backend) == 0
+
+    def test_replace(self, backend):
+        for i in 'abcb':
+            backend.set(i, i.encode() * 2)
+
+        backend.set('a', b'x')
+
+        assert backend.get('a') == b'x'
+        assert len(backend) == 3
+        assert backend.evictions == 0
+
+    def test_expired_len(self, backend, mocker):
+        backend.set('a', b'1', ttl=10)
+
+        mocker.patch('thrall.cache.time.time', return_value=1e11)
+
+        assert backend.get('a') is None
+        assert len(backend) == 0
+
+
+def test_sqlite_persisted(tmpdir):
+    path = str(tmpdir.join('cache.db'))
+    SQLiteCache(path).set('a', b'1')
+    cache = SQLiteCache(path)
+
+    assert len(cache) == 1
+    assert cache.get('a') == b'1'
+
+
+class _Prepared(object):
+    def __init__(self, **params):
+        self.params = params
+
+
+class TestBaseCacheAdapter(object):
+    def test_make_key_ignore_key_and_sig(self):
+        model = BaseCacheAdapter()
+
+        assert model.make_key('geo_code', {'key': 1, 'sig': 2, 'b': 1,
+                                           'a': u'x'}) == u'geo_code:a=x&b=1'
+
+    def test_get_set(self):
+        model = BaseCacheAdapter()
+
+        assert model.get('geo_code', _Prepared(a=1, key='x')) is None
+        model.set('geo_code', _Prepared(a=1, key='x'), b'data')
+        assert model.get('geo_code', _Prepared(a=1, key='y')) == b'data'
+
+        assert model.hits == 1
+        assert model.misses == 1
+        assert model.hit_rate == 0.5
+
+        stats = model.stats()
+        assert stats['size'] == 1
+        assert stats['routes']['geo_code'] == {'hits': 1, 'misses': 1}
+
+    def test_route_ttl(self):
+        model = BaseCacheAdapter(default_ttl=10,
+                                 ttls={RouteKey.SUGGEST: 0, 'district': 100})
+
+        assert model.get_ttl('suggest') == 0
+        assert model.get_ttl('district') == 100
+        assert model.get_ttl('geo_code') == 10
+
+        model.set('suggest', _Prepared(a=1), b'data')
+        assert model.get('suggest', _Prepared(a=1)) is None
+        assert model.misses == 0
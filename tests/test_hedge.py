@@ -0,0 +1,81 @@
+# coding: utf-8
+# flake8: noqa
+import pytest
+
+from thrall.consts import RouteKey
+from thrall.hedge import HedgePolicy
+from thrall.latency import LatencyTracker
+
+
+class TestHedgePolicy(object):
+    def _policy(self, **kwargs):
+        tracker = LatencyTracker(min_samples=1)
+
+        for _ in range(10):
+            tracker.observe('suggest', 0.2)
+
+        return HedgePolicy(tracker=tracker, **kwargs)
+
+    def test_is_enabled(self):
+        policy = HedgePolicy(routes=[RouteKey.SUGGEST])
+
+        assert policy.is_enabled('suggest')
+        assert policy.is_enabled(RouteKey.SUGGEST)
+        assert not policy.is_enabled('geo_code')
+        assert HedgePolicy(routes=None).is_enabled('geo_code')
+
+    def test_start(self):
+        policy = self._policy(min_delay=0.5)
+
+        assert policy.start('suggest') == 0.5
+        assert policy.start('regeo_code') is None
+        assert policy.requests == 2
+
+        policy.min_delay = 0
+        assert policy.start('suggest') == 0.2
+
+    def test_try_hedge(self):
+        policy = self._policy(max_ratio=0.1)
+
+        for _ in range(19):
+            policy.start('suggest')
+
+        assert policy.try_hedge()
+        assert not policy.try_hedge()
+
+        policy.start('suggest')
+        assert policy.try_hedge()
+        assert policy.hedges == 2
+
+    def test_burst(self):
+        policy = self._policy(max_ratio=0.5, burst=2)
+
+        for _ in range(100):
+            policy.start('suggest')
+
+        assert [policy.try_hedge() for _ in range(3)] == [True, True, False]
+
+        for _ in range(4):
+            policy.start('suggest')
+            policy.try_hedge()
+
+        assert policy.hedges == 4
+
+    def test_no_hedge(self):
+        policy = self._policy(max_ratio=0)
+        policy.start('suggest')
+
+        assert not policy.try_hedge()
+
+    def test_timed(self, clock):
+        policy = HedgePolicy(tracker=LatencyTracker(min_samples=1),
+                             clock=clock)
+
+        def slow():
+            clock.now += 0.3
+            raise ValueError('x')
+
+        with pytest.raises(ValueError):
+            policy.timed('suggest', slow)
+
+        assert policy.tracker.percentile('suggest', 50) == 0.3
@@ -112,3 +112,53 @@ class TestSetD(object):
         assert _SetDefault.__call__.call_count == 0
         assert _SetDefaultWithParams.__init__.call_count == 1
         assert _SetDefaultWithParams.__call__.call_count == 1
+
+
+class TestSetDefaultBound(object):
+    class Mock(object):
+        def __init__(self, name):
+            self.name = name
+
+        @_SetDefault
+        def mock(self, **kwargs):
+            return self.name, kwargs
+
+    def test_bound_cached(self):
+        a = self.Mock('a')
+
+        assert a.mock is a.mock
+        assert a.mock.__self__ is a
+        assert a.mock.__name__ == 'mock'
+        assert self.Mock.__dict__['mock'] is self.Mock.mock
+
+    def test_set_default_shared(self):
+        a, b = self.Mock('a'), self.Mock('b')
+
+        a.mock.set_default(x=1)
+
+        assert a.mock() == ('a', {'x': 1})
+        assert b.mock(x=2) == ('b', {'x': 2})
+        assert b.mock.default_kwargs == {'x': 1}
+
+        self.Mock.mock.set_default(x=None)
+
+    def test_thread_safe(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        instances = [self.Mock(str(i)) for i in range(50)]
+
+        def call(i):
+            return i.mock()[0] == i.name
+
+        with ThreadPoolExecutor(16) as executor:
+            r = list(executor.map(call, instances * 20))
+
+        assert all(r)
+
+
+def test_set_default_with_params_call():
+    hook = _SetDefaultWithParams(a=1)
+    hook.set_default(b=2)
+
+    assert hook.call(lambda **kw: kw, b=3) == {'a': 1, 'b': 3}
+    assert hook.default_kwargs == {'a': 1, 'b': 2}
@@ -0,0 +1,101 @@
+# coding: utf-8
+# flake8: noqa
+import pytest
+
+from thrall.consts import RouteKey
+from thrall.latency import AdaptiveTimeout, LatencyTracker
+
+
+class TestLatencyTracker(object):
+    def test_not_enough_samples(self):
+        tracker = LatencyTracker(min_samples=3)
+        tracker.observe('geo_code', 0.1)
+        tracker.observe('geo_code', 0.2)
+
+        assert tracker.percentile('geo_code', 50) is None
+        assert tracker.percentile('suggest', 50) is None
+
+    def test_window(self):
+        tracker = LatencyTracker(window=3, min_samples=1)
+
+        for i in (5, 1, 2, 3):
+            tracker.observe(RouteKey.GEO_CODE, i)
+
+        assert tracker.count('geo_code') == 3
+        assert tracker.percentile('geo_code', 100) == 3
+        assert tracker.percentile(RouteKey.GEO_CODE, 0) == 1
+
+
+class TestAdaptiveTimeout(object):
+    def _adaptive(self, **kwargs):
+        return AdaptiveTimeout(tracker=LatencyTracker(min_samples=1),
+                               **kwargs)
+
+    def test_default(self):
+        adaptive = self._adaptive(connect_timeout=0.3, default_timeout=2)
+
+        assert adaptive.timeout(RouteKey.DISTRICT) == (0.3, 2)
+        assert adaptive.timeout(RouteKey.BATCH, ops=11) == (0.3, 4)
+
+    def test_follow_latency(self):
+        adaptive = self._adaptive(multiplier=2)
+
+        for _ in range(10):
+            adaptive.observe('suggest', 0.15)
+
+        assert adaptive.timeout('suggest') == (0.5, 0.3)
+        assert adaptive.timeout('district') == (0.5, 1)
+
+    def test_bounds(self):
+        adaptive = self._adaptive(min_timeout=0.5, max_timeout=3)
+        adaptive.observe('suggest', 0.01)
+        adaptive.observe('district', 100)
+
+        assert adaptive.timeout('suggest')[1] == 0.5
+        assert adaptive.timeout('district')[1] == 3
+
+    def test_batch_ops(self):
+        adaptive = self._adaptive(multiplier=1, op_scale=0.5)
+        adaptive.observe('batch', 3, ops=5)
+
+        assert adaptive.tracker.percentile('batch', 50) == 1
+        assert adaptive.timeout('batch', ops=3) == (0.5, 2)
+
+    def test_measure(self, clock):
+        adaptive = AdaptiveTimeout(tracker=LatencyTracker(min_samples=1),
+                                   clock=clock)
+
+        with adaptive.measure('suggest'):
+            clock.now += 0.4
+
+        with pytest.raises(ValueError):
+            with adaptive.measure('suggest'):
+                clock.now += 5
+                raise ValueError('x')
+
+        assert adaptive.tracker.count('suggest') == 1
+        assert adaptive.tracker.percentile('suggest', 50) == 0.4
+
+    def test_stable_with_hung_requests(self, clock):
+        from thrall.exceptions import VendorConnectionError
+
+        adaptive = AdaptiveTimeout(tracker=LatencyTracker(min_samples=20),
+                                   clock=clock)
+        timeouts = set()
+
+        # 3 of every 100 requests hang until the read timeout
+        for i in range(1000):
+            read = adaptive.timeout('suggest')[1]
+            timeouts.add(read)
+
+            try:
+                with adaptive.measure('suggest'):
+                    if i % 100 < 3:
+                        clock.now += read
+                        raise VendorConnectionError('timeout')
+                    clock.now += 0.1
+            except VendorConnectionError:
+                pass
+
+        assert timeouts == {1.0, 0.2}
+        assert adaptive.timeout('suggest') == (0.5, 0.2)
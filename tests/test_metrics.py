@@ -0,0 +1,101 @@
+# coding: utf-8
+# flake8: noqa
+import pytest
+
+from thrall.consts import RouteKey
+from thrall.metrics import MetricsCollector, mask_key
+
+
+class TestMetricsCollector(object):
+    def test_mask_key(self):
+        assert mask_key(None) == ''
+        assert mask_key('abcdef') == '***cdef'
+
+    def test_counters(self):
+        metrics = MetricsCollector()
+        metrics.inc(RouteKey.GEO_CODE, 'key1', 'requests')
+        metrics.inc('geo_code', 'key1', 'bytes', 100)
+        metrics.infocode('geo_code', 'key1', 10000)
+        metrics.infocode('geo_code', 'key1', 10000)
+
+        item = metrics.snapshot()['geo_code']['***key1']
+
+        assert item['requests'] == 1
+        assert item['bytes'] == 100
+        assert item['retries'] == 0
+        assert item['infocodes'] == {10000: 2}
+
+    def test_without_key_label(self):
+        metrics = MetricsCollector(key_label=None)
+        metrics.inc('geo_code', 'key1', 'requests')
+        metrics.inc('geo_code', 'key2', 'requests')
+
+        assert metrics.snapshot()['geo_code']['']['requests'] == 2
+
+    def test_timer(self, clock):
+        metrics = MetricsCollector(buckets=(0.1, 1), clock=clock)
+
+        with pytest.raises(ValueError):
+            with metrics.timer('geo_code', None, 'request'):
+                clock.now += 0.5
+                raise ValueError('x')
+
+        metrics.observe('geo_code', None, 'request', 0.1)
+        metrics.observe('geo_code', None, 'request', 3)
+
+        latency = metrics.snapshot()['geo_code']['']['latency']['request']
+
+        assert latency['count'] == 3
+        assert latency['sum'] == 3.6
+        assert latency['buckets'] == [(0.1, 1), (1, 2), ('+Inf', 3)]
+
+    def test_prometheus(self):
+        metrics = MetricsCollector(buckets=(0.1,))
+        metrics.inc('suggest', 'abcdef', 'requests')
+        metrics.infocode('suggest', 'abcdef', 10001)
+        metrics.observe('suggest', 'abcdef', 'decode', 0.01)
+
+        text = metrics.prometheus()
+
+        assert '# TYPE thrall_requests_total counter' in text
+        assert 'thrall_requests_total{key="***cdef",route="suggest"} 1' in text
+        assert ('thrall_infocodes_total{infocode="10001",key="***cdef",'
+                'route="suggest"} 1') in text
+        assert ('thrall_latency_seconds_bucket{key="***cdef",le="+Inf",'
+                'phase="decode",route="suggest"} 1') in text
+        assert ('thrall_latency_seconds_count{key="***cdef",'
+                'phase="decode",route="suggest"} 1') in text
+
+    def test_reset(self):
+        metrics = MetricsCollector()
+        metrics.inc('suggest', None, 'requests')
+        metrics.reset()
+
+        assert metrics.snapshot() == {}
+
+    def test_write(self, tmpdir):
+        metrics = MetricsCollector()
+        metrics.inc('suggest', None, 'requests')
+        path = str(tmpdir.join('thrall.prom'))
+
+        metrics.write(path)
+
+        assert open(path).read() == metrics.prometheus()
+        assert tmpdir.listdir() == [tmpdir.join('thrall.prom')]
+
+    def test_serve(self):
+        import requests
+
+        metrics = MetricsCollector()
+        metrics.inc('suggest', None, 'requests')
+        server = metrics.serve(0)
+
+        try:
+            url = 'http://127.0.0.1:{}'.format(server.server_address[1])
+            r = requests.get(url + '/metrics')
+            assert r.status_code == 200
+            assert r.text == metrics.prometheus()
+            assert requests.get(url + '/other').status_code == 404
+        finally:
+            server.shutdown()
+            server.server_close()
@@ -0,0 +1,85 @@
+# coding: utf-8
+# flake8: noqa
+import threading
+
+import pytest
+
+from thrall.consts import RouteKey
+from thrall.ratelimit import RateLimiter, TokenBucket
+
+
+class TestTokenBucket(object):
+    def test_invalid_rate(self):
+        with pytest.raises(ValueError):
+            TokenBucket(0)
+
+    def test_reserve(self, clock):
+        bucket = TokenBucket(rate=10, clock=clock)
+
+        assert [bucket.reserve() for _ in range(3)] == [0, 0.1, 0.2]
+
+        clock.now = 0.3
+        assert bucket.reserve() == 0
+
+        clock.now = 10
+        assert bucket.reserve(5) == 0.4
+
+    def test_burst(self, clock):
+        bucket = TokenBucket(rate=10, capacity=5, clock=clock)
+
+        assert [bucket.reserve() for _ in range(6)] == [0] * 5 + [0.1]
+
+    def test_threads(self, clock):
+        bucket = TokenBucket(rate=100, clock=clock)
+        delays = []
+
+        def worker():
+            for _ in range(50):
+                delays.append(bucket.reserve())
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        # every reservation gets its own slot.
+        assert sorted(delays) == [round(i * 0.01, 9) for i in range(200)]
+
+
+class TestRateLimiter(object):
+    def test_route_rates(self, clock):
+        limiter = RateLimiter(route_rates={RouteKey.GEO_CODE: 10,
+                                           'regeo_code': 5}, clock=clock)
+
+        assert limiter.reserve(RouteKey.GEO_CODE) == 0
+        assert limiter.reserve('geo_code') == 0.1
+        assert limiter.reserve(RouteKey.REGEO_CODE) == 0
+        assert limiter.reserve(RouteKey.REGEO_CODE) == 0.2
+        # unlimited route
+        assert limiter.reserve(RouteKey.SUGGEST) == 0
+
+    def test_default_rate(self, clock):
+        limiter = RateLimiter(default_rate=10, clock=clock)
+
+        assert limiter.reserve(RouteKey.SUGGEST) == 0
+        assert limiter.reserve(RouteKey.SUGGEST) == 0.1
+        assert limiter.reserve(RouteKey.DISTRICT) == 0
+
+    def test_key_rate(self, clock):
+        limiter = RateLimiter(route_rates={RouteKey.GEO_CODE: 100},
+                              key_rate=10, clock=clock)
+
+        assert limiter.reserve(RouteKey.GEO_CODE, key='a') == 0
+        assert limiter.reserve(RouteKey.GEO_CODE, key='a') == 0.1
+        assert limiter.reserve(RouteKey.GEO_CODE, key='b') == 0.02
+        assert limiter.reserve(RouteKey.BATCH, key='b', ops=20) == 2.0
+
+    def test_wait(self, mocker, clock):
+        sleep = mocker.patch('thrall.ratelimit.time.sleep')
+        limiter = RateLimiter(default_rate=10, clock=clock)
+
+        assert limiter.wait(RouteKey.GEO_CODE) == 0
+        assert limiter.wait(RouteKey.GEO_CODE) == 0.1
+
+        sleep.assert_called_once_with(0.1)
@@ -0,0 +1,82 @@
+# coding: utf-8
+# flake8: noqa
+import pytest
+
+from thrall.exceptions import (
+    VendorConnectionError,
+    VendorHTTPError,
+    VendorParamError,
+)
+from thrall.retry import RetryPolicy, http_status_of
+
+
+def _http_error(status):
+    import requests
+
+    r = requests.Response()
+    r.status_code = status
+    return VendorHTTPError('x', data=requests.HTTPError(response=r))
+
+
+class TestRetryPolicy(object):
+    def test_backoff_delay(self):
+        policy = RetryPolicy(backoff=0.1, max_backoff=1, jitter=False)
+
+        assert [policy.backoff_delay(i) for i in range(5)] == \
+            [0.1, 0.2, 0.4, 0.8, 1]
+
+    def test_jitter(self):
+        policy = RetryPolicy(backoff=0.1, max_backoff=1)
+
+        for i in range(5):
+            assert 0 <= policy.backoff_delay(i) <= min(0.1 * 2 ** i, 1)
+
+    def test_is_retryable_error(self):
+        policy = RetryPolicy()
+
+        assert policy.is_retryable_error(VendorConnectionError('x'))
+        assert policy.is_retryable_error(_http_error(503))
+        assert not policy.is_retryable_error(_http_error(404))
+        assert not policy.is_retryable_error(VendorParamError('x'))
+
+    def test_http_status_of(self):
+        class _AioError(object):
+            status = 502
+
+        assert http_status_of(_http_error(500)) == 500
+        assert http_status_of(VendorHTTPError('x', data=_AioError())) == 502
+        assert http_status_of(VendorHTTPError('x')) is None
+
+    def test_is_retryable_code(self):
+        policy = RetryPolicy(retry_infocodes=[10004])
+
+        assert policy.is_retryable_code(10004)
+        assert not policy.is_retryable_code(10000)
+
+
+class TestRetryState(object):
+    def test_max_retries(self):
+        state = RetryPolicy(max_retries=2, jitter=False).new_state()
+
+        assert state.next_delay(err=VendorConnectionError('x')) == 0.1
+        assert state.next_delay(err=VendorConnectionError('x')) == 0.2
+        assert state.next_delay(err=VendorConnectionError('x')) is None
+        assert state.retries == 2
+
+    def test_not_retryable(self):
+        state = RetryPolicy(retry_infocodes=[10004]).new_state()
+
+        assert state.next_delay(err=VendorParamError('x')) is None
+        assert state.next_delay(code=10000) is None
+        assert state.next_delay(code=10004) is not None
+
+    def test_deadline(self, clock):
+        state = RetryPolicy(max_retries=10, jitter=False, deadline=1,
+                            clock=clock).new_state()
+
+        assert state.next_delay(retryable=True) == 0.1
+        clock.now = 0.7
+        assert state.next_delay(retryable=True) == 0.2
+        clock.now = 0.9
+        # 0.9 + 0.4 is over deadline
+        assert state.next_delay(retryable=True) is None
@@ -0,0 +1,89 @@
+# coding: utf-8
+# flake8: noqa
+import threading
+import time
+
+import pytest
+
+from thrall.consts import RouteKey
+from thrall.singleflight import SingleFlight
+
+
+def _run_concurrently(group, fn, n=5):
+    results, errors = [], []
+
+    def worker():
+        try:
+            results.append(group.do('a', fn))
+        except Exception as err:
+            errors.append(err)
+
+    threads = [threading.Thread(target=worker) for _ in range(n)]
+    for t in threads:
+        t.start()
+
+    # wait for followers joined the in-flight call
+    while group.shared < n - 1:
+        time.sleep(0.001)
+
+    return threads, results, errors
+
+
+class TestSingleFlight(object):
+    def test_do(self):
+        group = SingleFlight()
+
+        assert group.do('a', lambda x: x + 1, 1) == (2, False)
+        assert group.do('a', lambda x: x + 1, 2) == (3, False)
+        assert len(group) == 0
+
+    def test_coalesce(self):
+        group = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def fn():
+            calls.append(1)
+            release.wait()
+            return 'x'
+
+        threads, results, errors = _run_concurrently(group, fn)
+        release.set()
+        for t in threads:
+            t.join()
+
+        assert len(calls) == 1
+        assert sorted(results) == [('x', False)] + [('x', True)] * 4
+        assert len(group) == 0
+
+    def test_coalesce_error(self):
+        group = SingleFlight()
+        release = threading.Event()
+
+        def fn():
+            release.wait()
+            raise ValueError('x')
+
+        threads, results, errors = _run_concurrently(group, fn)
+        release.set()
+        for t in threads:
+            t.join()
+
+        assert not results
+        assert len(errors) == 5
+        assert all(isinstance(e, ValueError) for e in errors)
+
+    def test_routes(self):
+        group = SingleFlight(routes=[RouteKey.GEO_CODE, 'district'])
+
+        assert group.is_enabled('geo_code')
+        assert group.is_enabled('district')
+        assert not group.is_enabled('suggest')
+        assert SingleFlight().is_enabled('suggest')
+
+    def test_make_key(self):
+        group = SingleFlight()
+
+        assert group.make_key('geo_code', {'address': 'a', 'key': 'x'}) == \
+            group.make_key('geo_code', {'address': 'a', 'key': 'y',
+                                        'sig': 'z'})
@@ -0,0 +1,42 @@
+# coding: utf-8
+# flake8: noqa
+import pytest
+
+from thrall.timing import NULL_TIMER, PhaseTiming
+
+
+class TestPhaseTiming(object):
+    def test_measure(self):
+        timing = PhaseTiming()
+
+        with pytest.raises(ValueError):
+            with timing.measure('network'):
+                raise ValueError('x')
+
+        assert timing.network > 0
+        assert timing.encode == 0
+
+    def test_decode(self):
+        timing = PhaseTiming()
+        timing.decode_total, timing.parse = 0.1, 0.3
+
+        assert timing.decode == 0
+
+    def test_received(self):
+        timing = PhaseTiming()
+        timing.received(b'abc')
+        timing.received(b'de')
+
+        assert (timing.responses, timing.bytes_received) == (2, 5)
+        assert timing.as_dict()['bytes_received'] == 5
+        assert 'bytes_received=5' in repr(timing)
+
+    def test_total(self):
+        timing = PhaseTiming()
+        timing.encode, timing.network, timing.decode_total = 1, 2, 3
+
+        assert timing.total == 6
+
+    def test_null_timer(self):
+        with NULL_TIMER as t:
+            assert t is NULL_TIMER
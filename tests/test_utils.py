@@ -7,6 +7,10 @@ from thrall.utils import (
     check_params_type,
     partialmethod,
     repr_params,
+    camelcase_to_snakecase,
+    KeyTranslationTable,
+    snakecase_keys,
+    params_validation,
 )
 
 
@@ -79,6 +83,95 @@ def test_check_params_type_2():
         fn2(a=None)
 
 
+def test_required_params_missing_positional():
+    fn = required_params('a', 'b')(lambda a, b: {})
+
+    with pytest.raises(TypeError):
+        fn()
+
+
+def test_required_params_method_and_kw_only():
+    class Mock(object):
+        @required_params('a', 'b')
+        def __init__(self, a=None, b=None):
+            pass
+
+    Mock(1, 2)
+    Mock(b=2, a=1)
+
+    with pytest.raises(RuntimeError):
+        Mock(1)
+
+    import six
+
+    if six.PY3:
+        ns = {}
+        exec('def f(a, *, b=None): return a, b', ns)
+        fn = required_params('b')(ns['f'])
+
+        assert fn(1, b=2) == (1, 2)
+
+        with pytest.raises(RuntimeError):
+            fn(1)
+
+
+def test_check_params_type_positional():
+    fn = check_params_type(b=(int,))(lambda a, b=None: {})
+
+    fn(1)
+    fn(1, 2)
+    fn('', b=2)
+
+    with pytest.raises(TypeError):
+        fn(1, '2')
+
+    with pytest.raises(TypeError):
+        fn(1, b='2')
+
+
+def test_params_validation_switch():
+    fn = required_params('a')(lambda a=None: a)
+    fn2 = check_params_type(a=(int,))(lambda a=None: a)
+
+    with params_validation.skip():
+        assert fn() is None
+        assert fn2('x') == 'x'
+
+    assert params_validation.enabled
+
+    with pytest.raises(RuntimeError):
+        fn()
+
+    params_validation.disable()
+    try:
+        assert fn2('x') == 'x'
+    finally:
+        params_validation.enable()
+
+    with pytest.raises(TypeError):
+        fn2('x')
+
+
+def test_params_validation_skip_thread_local():
+    import threading
+
+    result = []
+    t = threading.Thread(
+        target=lambda: result.append(params_validation.enabled))
+
+    with params_validation.skip():
+        with params_validation.skip():
+            assert not params_validation.enabled
+
+        assert not params_validation.enabled
+
+        t.start()
+        t.join()
+
+    assert result == [True]
+    assert params_validation.enabled
+
+
 def test_partialmethod():
     class Mock(object):
         def a(self, x=1):
@@ -112,3 +205,42 @@ class TestReprParams(object):
 
         for i in ['Mock(', 'a=xxx', 'b=2', "c=杰克"]:
             assert i in r
+
+
+class TestKeyTranslationTable(object):
+    def test_translate(self):
+        t = KeyTranslationTable(camelcase_to_snakecase)
+
+        assert t('addressComponent') == 'address_component'
+        assert t('type') == 'type_'
+        assert 'addressComponent' in t
+        assert t.size == len(t) == 2
+
+        t.clear()
+        assert len(t) == 0
+
+    def test_bounded(self):
+        t = KeyTranslationTable(camelcase_to_snakecase, max_size=3)
+
+        assert [t('aB{}'.format(i)) for i in range(10)] == \
+            ['a_b{}'.format(i) for i in range(10)]
+        assert len(t) == 3
+
+    def test_thread_safe(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        t = KeyTranslationTable(camelcase_to_snakecase, max_size=50)
+        keys = ['keyNo{}'.format(i) for i in range(100)] * 20
+
+        with ThreadPoolExecutor(8) as executor:
+            r = list(executor.map(t, keys))
+
+        assert r == [camelcase_to_snakecase(k) for k in keys]
+        assert len(t) == 50
+
+    def test_seeded_with_amap_models(self):
+        from thrall.amap import models
+
+        for k in ('address_component', 'addressComponent', 'adcode',
+                  'formatted_address', 'street_number'):
+            assert k in snakecase_keys
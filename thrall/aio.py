@@ -0,0 +1,219 @@
+# coding: utf-8
+""" asyncio support, requires python3.5+ and `aiohttp`. """
+from __future__ import absolute_import
+
+import asyncio
+from contextlib import contextmanager
+
+from thrall.compat import urlencode
+from thrall.exceptions import (
+    VendorRequestError,
+    VendorConnectionError,
+    VendorHTTPError,
+)
+
+from .base import BaseRequest
+from .singleflight import SingleFlight
+
+try:
+    import aiohttp
+    from yarl import URL
+except ImportError:  # pragma: no cover
+    aiohttp = URL = None
+
+
+def _require_aiohttp():
+    if aiohttp is None:
+        raise ImportError('aiohttp is required for asyncio support, '
+                          'please run `pip install aiohttp`.')
+
+
+def encode_query(url, params):
+    """ encode params into url, same as `requests` does.
+
+    >>> encode_query('http://x.x/a', {'b': True})
+    'http://x.x/a?b=True'
+    >>> encode_query('http://x.x/a', None)
+    'http://x.x/a'
+    """
+    if not params:
+        return url
+
+    return '{}?{}'.format(url, urlencode(
+        [(k, v.encode('utf-8') if isinstance(v, str) else v)
+         for k, v in params.items() if v is not None]))
+
+
+class AsyncResponse(object):
+    """ fully read `aiohttp` response, `content` / `status_code` / `headers`
+    are the same as `requests.Response`.
+    """
+
+    def __init__(self, response, content):
+        self.raw = response
+        self.content = content
+        self.url = str(response.url)
+        self.status_code = response.status
+        self.headers = response.headers
+
+    def __repr__(self):
+        return '<AsyncResponse [{}]>'.format(self.status_code)
+
+
+class AsyncBaseRequest(BaseRequest):
+    """ asyncio request, same interface as `BaseRequest` but `get` / `post`
+    are coroutines, performed on a shared `aiohttp.ClientSession`.
+
+    `aiohttp.ClientSession` must be created inside a running event loop, so
+    the session is created lazily on the first request.
+    """
+
+    def __init__(self, session=None, pool_maxsize=100, keep_alive=True,
+                 pool_connections=None, pool_block=True, max_retries=0):
+        """
+        :param session: `aiohttp.ClientSession`, pool options are ignored if
+         given.
+        :param pool_maxsize: max connections of pool, requests wait for a
+         free connection if exhausted.
+        :param keep_alive: reuse connections between requests.
+        :param pool_connections: unused, one pool serves all hosts.
+        :param pool_block: unused, requests always wait for a free
+         connection.
+        :param max_retries: unused, `aiohttp` never retries.
+        """
+        _require_aiohttp()
+        self._session = session
+        self._pool_maxsize = pool_maxsize
+        self._keep_alive = keep_alive
+        self._pool_owner = None
+
+    @property
+    def session(self):
+        if self._pool_owner is not None:
+            return self._pool_owner.session
+
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self._pool_maxsize,
+                    force_close=not self._keep_alive))
+
+        return self._session
+
+    @property
+    def pool_shareable(self):
+        return self._session is None
+
+    def share_pool(self, request):
+        """ share connection pool with other async request.
+
+        :param request: pool owner, instance of `AsyncBaseRequest`.
+        """
+        if not isinstance(request, AsyncBaseRequest):
+            raise TypeError('{} can not share pool'.format(type(request)))
+        self._pool_owner = request
+
+    async def close(self):
+        if self._pool_owner is None and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def throttle(self, route_key, key=None, ops=1):
+        if self.rate_limiter is not None:
+            delay = self.rate_limiter.reserve(route_key, key=key, ops=ops)
+
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+    async def get(self, url, params, timeout=1, callback=None, **kwargs):
+        with self.catch_exception():
+            r = await self._get_result(url, params, timeout, **kwargs)
+
+        if callable(callback):
+            callback(r)
+
+        return r
+
+    async def post(self, url, data, timeout=1, callback=None, **kwargs):
+        with self.catch_exception():
+            r = await self._post_result(url, data, timeout, **kwargs)
+
+        if callable(callback):
+            callback(r)
+
+        return r
+
+    @staticmethod
+    def _client_timeout(timeout):
+        """ `aiohttp.ClientTimeout` of total seconds, or (connect, read)
+        seconds as requests does. """
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            return aiohttp.ClientTimeout(sock_connect=connect,
+                                         sock_read=read)
+
+        return aiohttp.ClientTimeout(total=timeout)
+
+    async def _get_result(self, url, params, timeout, **kwargs):
+        async with self.session.get(
+                URL(encode_query(url, params), encoded=True),
+                timeout=self._client_timeout(timeout),
+                **kwargs) as r:
+            r.raise_for_status()
+            return AsyncResponse(r, await r.read())
+
+    async def _post_result(self, url, data, timeout, **kwargs):
+        async with self.session.post(
+                url, data=data,
+                timeout=self._client_timeout(timeout),
+                **kwargs) as r:
+            r.raise_for_status()
+            return AsyncResponse(r, await r.read())
+
+    @contextmanager
+    def catch_exception(self):
+        try:
+            yield
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as err:
+            raise VendorConnectionError(str(err), data=err)
+        except aiohttp.ClientResponseError as err:
+            raise VendorHTTPError(str(err), data=err)
+        except aiohttp.ClientError as err:
+            raise VendorRequestError(str(err), data=err)
+
+
+class AsyncSingleFlight(SingleFlight):
+    """ asyncio single flight group, `do` is a coroutine, all callers must
+    run in the same event loop.
+    """
+
+    async def do(self, key, fn, *args, **kwargs):
+        """ await fn, or the in-flight call of same key.
+
+        :return: (value, shared)
+        """
+        future = self._calls.get(key)
+
+        if future is not None:
+            self.shared += 1
+            # cancel of a waiter doesn't cancel the shared call.
+            return await asyncio.shield(future), True
+
+        future = self._calls[key] = asyncio.get_event_loop().create_future()
+
+        try:
+            value = await fn(*args, **kwargs)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as err:
+            future.set_exception(err)
+            # mark retrieved, the leader raises it anyway.
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+        finally:
+            self._calls.pop(key, None)
+
+        return value, False
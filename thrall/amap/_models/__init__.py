@@ -1,6 +1,9 @@
 # coding: utf-8
 from __future__ import absolute_import
 
+from thrall.base import BaseData
+from thrall.utils import snakecase_keys, snakecase_to_camelcase
+
 from ._base_model import (
     Sig,
     Extensions,
@@ -125,3 +128,17 @@ __all__ = [
     "NaviDrivingResponseData", "NaviDrivingData", "DrivingPath",
     "DrivingSteps",
 ]
+
+
+def _iter_model_properties(base=BaseData):
+    for cls in base.__subclasses__():
+        if cls.__module__.startswith(__name__):
+            for p in cls._properties:
+                yield p
+                yield snakecase_to_camelcase(p)
+
+        for p in _iter_model_properties(cls):
+            yield p
+
+
+snakecase_keys.seed(_iter_model_properties())
@@ -10,8 +10,8 @@ from shapely.geometry import Polygon, MultiPolygon
 
 from six import iteritems
 
-from thrall.compat import unicode, urlparse
-from thrall.consts import FORMAT_JSON, FORMAT_XML, RouteKey
+from thrall.compat import unicode, urlencode, urlparse
+from thrall.consts import DECODE_LAZY, FORMAT_JSON, FORMAT_XML, RouteKey
 from thrall.exceptions import VendorError, amap_status_exception
 from thrall.utils import MapStatusMessage, required_params, repr_params
 
@@ -70,8 +70,8 @@ class Sig(object):
 
     @property
     def hashed_sig(self):
-        sig = (self.unhash_sig.encode('utf-8') if isinstance(
-            self.unhash_sig, unicode) else self.unhash_sig)
+        sig = self.unhash_sig
+        sig = sig.encode('utf-8') if isinstance(sig, unicode) else sig
 
         return self.hash_func(sig).hexdigest()
 
@@ -135,8 +135,17 @@ class BaseRequestParams(object):
 
 
 class BasePreparedRequestParams(object):
+    """ prepared request params.
+
+    `params`, `sig` and `query` are generated once and cached, setting any
+    field (e.g. `prepare_*` or `p.key = xx` in prepared hook) invalidates
+    them, call `invalidate` after changing a mutable field in place.
+    """
     DEFAULT_URL = None
     ROUTE_KEY = RouteKey.UNKNOWN
+    # params generated from fields, {field: ((params key, prepared property),
+    # ...)}, request templates only regenerate params of varying fields.
+    FIELD_PARAMS = {}
 
     def __init__(self):
         self.key = None
@@ -147,13 +156,54 @@ class BasePreparedRequestParams(object):
 
     def __unicode__(self):
         params = [k for k, v in iteritems(self.__dict__) if
-                  not hasattr(v, '__call__')]
+                  not hasattr(v, '__call__') and k != '_cache']
         params.append('sig')
         return repr_params(params, self.__class__.__name__, self)
 
     def __repr__(self):
         return self.__unicode__()
 
+    def __setattr__(self, name, value):
+        # no field of prepared params is a descriptor, set it directly
+        d = self.__dict__
+        d[name] = value
+        d['_cache'] = None
+
+    def invalidate(self):
+        """ drop cached params, sig and query. """
+        self.__dict__['_cache'] = None
+
+    def rekey(self, key, pkey=None):
+        """ replace key and private key, keep cached unsigned params if
+        possible. """
+        d = self.__dict__
+        unsigned = (d.get('_cache') or {}).get('unsigned')
+
+        d['key'], d['_pkey'] = key, pkey
+        d['_cache'] = None
+
+        if unsigned is not None and 'key' not in (self._raw_params or {}):
+            unsigned = dict(unsigned)
+            unsigned['key'] = key
+            d['_cache'] = {'unsigned': unsigned}
+
+    def _get_cache(self):
+        cache = self.__dict__.get('_cache')
+
+        if cache is None:
+            cache = self.__dict__['_cache'] = {}
+
+        return cache
+
+    def _unsigned_params(self):
+        cache = self._get_cache()
+
+        try:
+            return cache['unsigned']
+        except KeyError:
+            p = cache['unsigned'] = self.generate_params()
+            return p
+
     def generate_params(self):
         """ generate prepared params without sig
 
@@ -172,11 +222,33 @@ class BasePreparedRequestParams(object):
         """
         raise NotImplementedError
 
+    def _signed_params(self):
+        cache = self._get_cache()
+
+        try:
+            return cache['signed']
+        except KeyError:
+            p = dict(self._unsigned_params())
+            p.update({'sig': self.prepared_sig} if self._pkey else {})
+            cache['signed'] = p
+            return p
+
     @property
     def params(self):
-        p = self.generate_params()
-        p.update({'sig': self.prepared_sig} if self._pkey else {})
-        return p
+        return dict(self._signed_params())
+
+    @property
+    def query(self):
+        """ url encoded params (utf-8), same as batch ops query. """
+        cache = self._get_cache()
+
+        try:
+            return cache['query']
+        except KeyError:
+            q = cache['query'] = urlencode(
+                [(k, unicode(v).encode('utf-8'))
+                 for k, v in iteritems(self._signed_params())])
+            return q
 
     def prepare(self, **kwargs):
         """ called prepare data functions
@@ -251,7 +323,7 @@ class BasePreparedRequestParams(object):
     @property
     def sig(self):
         if self._pkey:
-            return Sig(pkey=self._pkey, kwargs=self.generate_params())
+            return Sig(pkey=self._pkey, kwargs=self._unsigned_params())
 
     @property
     def prepared_sig(self):
@@ -293,20 +365,38 @@ class BaseResponseData(object):
     ROUTE_KEY = RouteKey.UNKNOWN
 
     def __init__(self, raw_data, version=AMapVersion.V3,
-                 auto_version=False, static_mode=False, raw_mode=False):
+                 auto_version=False, static_mode=False, raw_mode=False,
+                 timing=None):
+        """ amap response data.
+
+        :param raw_data: response json content.
+        :param version: amap api version.
+        :param auto_version: detect api version from response.
+        :param static_mode: decode all data models when init, `'compact'`
+         to store them in compact `__slots__` records, `'lazy'` to decode
+         every data model on first access and memoize it.
+        :param raw_mode: raw_data is already loaded.
+        :param timing: `PhaseTiming` of call, json loading time is added to
+         its parse phase.
+        """
+        self.timing = timing
 
         if raw_mode:
             self._raw_data = raw_data
+        elif timing is not None:
+            with timing.measure('parse'):
+                self._raw_data = json_load_and_fix_amap_empty(raw_data)
         else:
             self._raw_data = json_load_and_fix_amap_empty(raw_data)
         self.version = version
         self._data = None
+        self._static_mode = static_mode
 
         if auto_version:
             self.version = self.auto_check_version(
                 self._raw_data, self.version)
 
-        if static_mode:
+        if static_mode and static_mode != DECODE_LAZY:
             self._data = self._get_static_data()
 
     def __unicode__(self):
@@ -330,6 +420,9 @@ class BaseResponseData(object):
 
     @property
     def data(self):
+        if self._data is None and self._static_mode == DECODE_LAZY:
+            self._data = self._get_static_data()
+
         return self._data or self._get_data()
 
     @staticmethod
@@ -383,7 +476,7 @@ class BaseResponseData(object):
         return self.get_data(self._raw_data)
 
     def _get_static_data(self):
-        return self.get_data(self._raw_data, static=True)
+        return self.get_data(self._raw_data, static=self._static_mode)
 
     def get_data(self, raw_data, static=False):
         raise NotImplementedError
@@ -89,15 +89,37 @@ class PreparedBatchParams(BasePreparedRequestParams, BatchExcMixin):
         params = prepared_struc.params
         url = self.url_pairs[route_key]
 
-        return {'url': url.path, 'params': params}
+        return {'url': url.path, 'params': params,
+                'query': prepared_struc.query}
 
 
 class BatchResponseData(BaseResponseData, BatchExcMixin):
-    def __init__(self, raw_data, p, decode_pairs, static_mode=False):
+    def __init__(self, raw_data, p, decode_pairs, static_mode=False,
+                 raw_mode=False, timing=None):
         self.prepared_data = p
         self.decode_pairs = decode_pairs or {}
         super(BatchResponseData, self).__init__(raw_data,
-                                                static_mode=static_mode)
+                                                static_mode=static_mode,
+                                                raw_mode=raw_mode,
+                                                timing=timing)
+
+    @property
+    def raw_ops(self):
+        """ raw results of ops, None if the whole post failed. """
+        if isinstance(self._raw_data, list):
+            return self._raw_data
+
+    def merge_ops(self, indexes, other):
+        """ new batch response data, results of ops at `indexes` are
+        replaced by ops of `other` in order. """
+        raw_ops = list(self.raw_ops)
+
+        for i, op in zip(indexes, other.raw_ops):
+            raw_ops[i] = op
+
+        return type(self)(raw_ops, self.prepared_data, self.decode_pairs,
+                          static_mode=self._static_mode, raw_mode=True,
+                          timing=self.timing)
 
     @property
     def status(self):
@@ -47,6 +47,11 @@ class DistanceRequestParams(BaseRequestParams):
 
 class PreparedDistanceRequestParams(BasePreparedRequestParams):
     ROUTE_KEY = RouteKey.DISTANCE
+    FIELD_PARAMS = {
+        'origins': (('origins', 'prepared_origins'),),
+        'destination': (('destination', 'prepared_destination'),),
+        'type': (('type', 'prepared_type'),),
+    }
 
     def __init__(self):
         self.origins = None
@@ -51,6 +51,12 @@ class DistrictRequestParams(BaseRequestParams):
 
 class PreparedDistrictRequestParams(BasePreparedRequestParams):
     ROUTE_KEY = RouteKey.DISTRICT
+    FIELD_PARAMS = {
+        'keyword': (('keywords', 'prepared_keyword'),),
+        'sub_district': (('subdistrict', 'prepared_sub_district'),),
+        'filter': (('filter', 'prepared_filter'),),
+        'extensions': (('extensions', 'prepared_extensions'),),
+    }
 
     def __init__(self):
         super(PreparedDistrictRequestParams, self).__init__()
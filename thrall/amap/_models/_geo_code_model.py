@@ -53,6 +53,11 @@ class GeoCodeRequestParams(BaseRequestParams):
 
 class PreparedGeoCodeRequestParams(BasePreparedRequestParams):
     ROUTE_KEY = RouteKey.GEO_CODE
+    FIELD_PARAMS = {
+        'address': (('address', 'prepared_address'),),
+        'city': (('city', 'prepared_city'),),
+        'batch': (('batch', 'prepared_batch'),),
+    }
 
     def __init__(self):
         super(PreparedGeoCodeRequestParams, self).__init__()
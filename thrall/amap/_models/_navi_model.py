@@ -66,6 +66,11 @@ class NaviDrivingRequestParams(NavRequestParams):
 
 
 class PreparedNaviRAndWRequestParams(BasePreparedRequestParams):
+    FIELD_PARAMS = {
+        'origin': (('origin', 'prepared_origin'),),
+        'destination': (('destination', 'prepared_destination'),),
+    }
+
     def __init__(self):
         self.origin = None
         self.destination = None
@@ -85,6 +85,18 @@ class ReGeoCodeRequestParams(BaseRequestParams):
 
 class PreparedReGeoCodeRequestParams(BasePreparedRequestParams):
     ROUTE_KEY = RouteKey.REGEO_CODE
+    FIELD_PARAMS = {
+        'location': (('location', 'prepared_location'),),
+        'radius': (('radius', 'prepared_radius'),),
+        'batch': (('batch', 'prepared_batch'),),
+        'extensions': (('extensions', 'prepared_extensions'),
+                       ('poitype', 'prepared_poi_type'),
+                       ('roadlevel', 'prepared_road_level'),
+                       ('homeorcorp', 'prepared_home_or_corp')),
+        'poi_type': (('poitype', 'prepared_poi_type'),),
+        'road_level': (('roadlevel', 'prepared_road_level'),),
+        'home_or_corp': (('homeorcorp', 'prepared_home_or_corp'),),
+    }
 
     def __init__(self):
         super(PreparedReGeoCodeRequestParams, self).__init__()
@@ -4,7 +4,7 @@ from __future__ import absolute_import
 from thrall.base import BaseData
 from thrall.compat import unicode
 from thrall.utils import required_params
-from thrall.consts import RouteKey
+from thrall.consts import DECODE_LAZY, RouteKey
 
 from ..common import (
     merge_location,
@@ -119,6 +119,16 @@ class SearchAroundRequestParams(BaseRequestParams):
 
 
 class PreparedSearchMixin(object):
+    FIELD_PARAMS = {
+        'keywords': (('keywords', 'prepared_keywords'),),
+        'location': (('location', 'prepared_location'),),
+        'types': (('types', 'prepared_types'),),
+        'offset': (('offset', 'prepared_offset'),),
+        'page': (('page', 'prepared_page'),),
+        'sort_rule': (('sortrule', 'prepared_sort_rule'),),
+        'extension': (('extensions', 'prepared_extension'),),
+    }
+
     def __init__(self):
         self.keywords = None
         self.location = None
@@ -207,6 +217,14 @@ class PreparedSearchMixin(object):
 class PreparedSearchTextRequestParams(BasePreparedRequestParams,
                                       PreparedSearchMixin):
     ROUTE_KEY = RouteKey.SEARCH_TEXT
+    FIELD_PARAMS = dict(
+        PreparedSearchMixin.FIELD_PARAMS,
+        city=(('city', 'prepared_city'),),
+        city_limit=(('citylimit', 'prepared_city_limit'),),
+        children=(('children', 'prepared_children'),),
+        building=(('building', 'prepared_building'),),
+        floor=(('floor', 'prepared_floor'),),
+    )
 
     def __init__(self):
         super(PreparedSearchTextRequestParams, self).__init__()
@@ -315,6 +333,11 @@ class PreparedSearchTextRequestParams(BasePreparedRequestParams,
 class PreparedSearchAroundRequestParams(BasePreparedRequestParams,
                                         PreparedSearchMixin):
     ROUTE_KEY = RouteKey.SEARCH_AROUND
+    FIELD_PARAMS = dict(
+        PreparedSearchMixin.FIELD_PARAMS,
+        city=(('city', 'prepared_city'),),
+        radius=(('radius', 'prepared_radius'),),
+    )
 
     def __init__(self):
         super(PreparedSearchAroundRequestParams, self).__init__()
@@ -392,11 +415,14 @@ class SearchResponseData(BaseResponseData):
         self._suggestions = None
         static = kwargs.get('static_mode')
 
-        if static:
+        if static and static != DECODE_LAZY:
             self._suggestions = self.get_suggestions(self._raw_data)
 
     @property
     def suggestions(self):
+        if self._suggestions is None and self._static_mode == DECODE_LAZY:
+            self._suggestions = self.get_suggestions(self._raw_data)
+
         return self._suggestions or self.get_suggestions(self._raw_data)
 
     def get_suggestions(self, data):
@@ -56,6 +56,14 @@ class SuggestRequestParams(BaseRequestParams):
 
 class PreparedSuggestRequestParams(BasePreparedRequestParams):
     ROUTE_KEY = RouteKey.SUGGEST
+    FIELD_PARAMS = {
+        'keyword': (('keywords', 'prepared_keyword'),),
+        'types': (('type', 'prepared_types'),),
+        'location': (('location', 'prepared_location'),),
+        'city': (('city', 'prepared_city'),),
+        'city_limit': (('citylimit', 'prepared_city_limit'),),
+        'data_type': (('datatype', 'prepared_data_type'),),
+    }
 
     def __init__(self):
         super(PreparedSuggestRequestParams, self).__init__()
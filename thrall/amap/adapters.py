@@ -1,7 +1,16 @@
 # coding: utf-8
 from __future__ import absolute_import
 
-from ..base import BaseDecoderAdapter, BaseEncoderAdapter
+from ..base import BaseCacheAdapter, BaseDecoderAdapter, BaseEncoderAdapter
+from ..consts import RouteKey
+from .common import (
+    geohash_encode,
+    merge_multi_poi,
+    parse_location,
+    parse_multi_poi,
+    snap_location,
+)
+from .consts import StatusFlag
 from .models import (
     DistanceRequestParams,
     DistanceResponseData,
@@ -87,13 +96,19 @@ class AMapEncodeAdapter(BaseEncoderAdapter):
 class AMapJsonDecoderAdapter(BaseDecoderAdapter):
 
     def __init__(self, static_mode=False):
+        """ amap json decoder adapter.
+
+        :param static_mode: decode all data models when init, `'compact'`
+         to store them in compact `__slots__` records, `'lazy'` to decode
+         on first access and memoize.
+        """
         super(AMapJsonDecoderAdapter, self).__init__()
         self._static = static_mode
 
     def get_decoder(self, func_name, *args, **kwargs):
         decoder = self.all_registered_coders[func_name]
         if self._static:
-            kwargs['static_mode'] = True
+            kwargs['static_mode'] = self._static
 
         p_decoder = decoder(*args, **kwargs)
         return p_decoder
@@ -146,3 +161,68 @@ class AMapJsonDecoderAdapter(BaseDecoderAdapter):
 
     def decode_batch(self, *args, **kwargs):
         return self.get_decoder('decode_batch', *args, **kwargs)
+
+
+class AMapCacheAdapter(BaseCacheAdapter):
+    """ amap response cache adapter, only successful responses are cached.
+
+    usage:
+
+        session.mount('cache', AMapCacheAdapter(
+            backend=SQLiteCache('/tmp/amap.db'),
+            ttls={RouteKey.DISTRICT: 86400, RouteKey.SUGGEST: 0}))
+    """
+
+    def is_cacheable(self, data):
+        return data is not None and data.status == StatusFlag.OK
+
+
+class AMapSpatialCacheAdapter(AMapCacheAdapter):
+    """ amap response cache adapter, `location` of regeo_code is snapped to
+    a grid, so nearby points share one cached response.
+
+    grid is geohash cell of `precision` by default, or square cell of
+    `grid_meters` if set. Memory is bounded by backend `max_size`.
+
+    usage:
+
+        session.mount('cache', AMapSpatialCacheAdapter(
+            backend=MemoryCache(max_size=100000), grid_meters=30))
+    """
+    SPATIAL_ROUTES = frozenset((RouteKey.REGEO_CODE.value,))
+
+    def __init__(self, backend=None, default_ttl=300, ttls=None,
+                 precision=8, grid_meters=None):
+        """ get an instance of spatial cache adapter.
+
+        :param precision: geohash precision, 7 --> ~150m, 8 --> ~38m,
+         9 --> ~5m.
+        :param grid_meters: grid size in meters, override `precision`.
+        """
+        super(AMapSpatialCacheAdapter, self).__init__(
+            backend=backend, default_ttl=default_ttl, ttls=ttls)
+        self.precision = precision
+        self.grid_meters = grid_meters
+
+    def quantize(self, location):
+        """ snap amap location string (maybe multi) to grid cells.
+
+        >>> AMapSpatialCacheAdapter(precision=6).quantize(
+        ...     '116.307490,39.984154|116.307491,39.984155')
+        'wx4eqw|wx4eqw'
+        """
+        return merge_multi_poi(
+            self._quantize_one(*parse_location(loc))
+            for loc in parse_multi_poi(location))
+
+    def _quantize_one(self, lng, lat):
+        if self.grid_meters:
+            return '{}_{}'.format(*snap_location(lng, lat, self.grid_meters))
+        return geohash_encode(lng, lat, self.precision)
+
+    def make_key(self, route_key, params):
+        if route_key in self.SPATIAL_ROUTES and params.get('location'):
+            params = dict(params, location=self.quantize(params['location']))
+
+        return super(AMapSpatialCacheAdapter, self).make_key(route_key,
+                                                             params)
@@ -0,0 +1,43 @@
+# coding: utf-8
+from __future__ import absolute_import
+
+import asyncio
+
+from .dispatcher import BatchDispatcher
+
+
+class AsyncBatchDispatcher(BatchDispatcher):
+    """ asyncio micro batch dispatcher, `call` is a coroutine, all callers
+    must run in the same event loop.
+
+    usage:
+
+        session.mount('dispatcher', AsyncBatchDispatcher(max_wait=0.005))
+        rs = await asyncio.gather(*[session.regeo_code(location=i)
+                                    for i in locations])
+    """
+
+    def _new_event(self):
+        return asyncio.Event()
+
+    async def call(self, post, p):
+        batch, index, leader = self._join(p)
+
+        if leader:
+            try:
+                await asyncio.wait_for(batch.full.wait(), self.max_wait)
+            except asyncio.TimeoutError:
+                pass
+
+            items = self._close(batch)
+
+            try:
+                batch.responses = self._split(await post(items), items)
+            except Exception as err:
+                batch.error = err
+            finally:
+                batch.done.set()
+        else:
+            await batch.done.wait()
+
+        return self._result(batch, index)
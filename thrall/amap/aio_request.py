@@ -0,0 +1,122 @@
+# coding: utf-8
+from __future__ import absolute_import
+
+import asyncio
+
+from ..aio import AsyncBaseRequest
+from ..consts import RouteKey
+from .consts import BATCH_MAX_OPS
+from .request import AMapRequest, AMapBatchRequest, MergedBatchResponse
+
+
+class AsyncAMapRequest(AMapRequest, AsyncBaseRequest):
+    """ asyncio amap request, every `get_*` method returns a coroutine. """
+
+    def __init__(self, session=None, enable_https=False, pool_maxsize=100,
+                 rate_limiter=None, keep_alive=True, hedge_policy=None,
+                 adaptive_timeout=None, circuit_breaker=None,
+                 **pool_options):
+        AsyncBaseRequest.__init__(self, session=session,
+                                  pool_maxsize=pool_maxsize,
+                                  keep_alive=keep_alive, **pool_options)
+        self._is_https = enable_https
+        self.rate_limiter = rate_limiter
+        self.hedge_policy = hedge_policy
+        self.adaptive_timeout = adaptive_timeout
+        self.circuit_breaker = circuit_breaker
+
+    async def get_data(self, p, default_url, url=None, **kwargs):
+        params = p.params
+        url = self._data_url(p, default_url, url)
+
+        with self.guard_circuit(p.ROUTE_KEY, params.get('key')):
+            await self.throttle(p.ROUTE_KEY, params.get('key'))
+
+            with self.adapt_timeout(p.ROUTE_KEY, kwargs):
+                if self._is_hedged(p.ROUTE_KEY):
+                    return await self._hedged_get(p.ROUTE_KEY, url, params,
+                                                  **kwargs)
+
+                return await self.get(url, params=params, **kwargs)
+
+    async def _timed_get(self, route_key, url, params, **kwargs):
+        clock = self.hedge_policy._clock
+        start = clock()
+
+        try:
+            return await self.get(url, params=params, **kwargs)
+        finally:
+            self.hedge_policy.tracker.observe(route_key, clock() - start)
+
+    async def _hedged_get(self, route_key, url, params, **kwargs):
+        """ the slower of the original and hedged requests is cancelled. """
+        policy = self.hedge_policy
+        delay = policy.start(route_key)
+
+        if delay is None:
+            return await self._timed_get(route_key, url, params, **kwargs)
+
+        tasks = [asyncio.ensure_future(
+            self._timed_get(route_key, url, params, **kwargs))]
+
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+
+            if done or not policy.try_hedge():
+                return await tasks[0]
+
+            tasks.append(asyncio.ensure_future(
+                self._timed_get(route_key, url, params, **kwargs)))
+            pending = set(tasks)
+
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+
+                for t in tasks:
+                    if t in done and t.exception() is None:
+                        return t.result()
+
+            return tasks[0].result()
+        finally:
+            for t in tasks:
+                if not t.done():
+                    t.cancel()
+
+
+class AsyncAMapBatchRequest(AMapBatchRequest, AsyncBaseRequest):
+    """ asyncio amap batch request, `get_batch` returns a coroutine. """
+
+    def __init__(self, session=None, enable_https=False, pool_maxsize=100,
+                 max_ops=BATCH_MAX_OPS, rate_limiter=None, keep_alive=True,
+                 adaptive_timeout=None, circuit_breaker=None,
+                 **pool_options):
+        AsyncBaseRequest.__init__(self, session=session,
+                                  pool_maxsize=pool_maxsize,
+                                  keep_alive=keep_alive, **pool_options)
+        self._is_https = enable_https
+        self.max_ops = max_ops
+        self.rate_limiter = rate_limiter
+        self.adaptive_timeout = adaptive_timeout
+        self.circuit_breaker = circuit_breaker
+
+    async def get_batch_data(self, request_list, key=None, **kwargs):
+        with self.guard_circuit(RouteKey.BATCH, key):
+            await self.throttle(RouteKey.BATCH, key, ops=len(request_list))
+
+            with self.adapt_timeout(RouteKey.BATCH, kwargs,
+                                    ops=len(request_list)):
+                return await self.post(**self._post_kwargs(request_list, key,
+                                                           kwargs))
+
+    async def get_batch(self, p, **kwargs):
+        params = p.params
+        chunks = self.split_ops(params['batch'])
+
+        if len(chunks) <= 1:
+            return await self.get_batch_data(params['batch'], params['key'],
+                                             **kwargs)
+
+        return MergedBatchResponse.merge(chunks, await asyncio.gather(
+            *[self.get_batch_data(c, params['key'], **kwargs)
+              for c in chunks], return_exceptions=True))
@@ -0,0 +1,146 @@
+# coding: utf-8
+from __future__ import absolute_import
+
+import asyncio
+from collections import deque
+from types import GeneratorType
+
+from ..aio import AsyncBaseRequest, AsyncSingleFlight
+from ..utils import check_params_type, chunked
+from .aio_dispatcher import AsyncBatchDispatcher
+from .aio_request import AsyncAMapRequest, AsyncAMapBatchRequest
+from .consts import BATCH_MAX_OPS, REGEO_CODE_BATCH_MAX
+from .session import AMapSession, _IO
+
+
+class AsyncAMapSession(AMapSession):
+    """ asyncio amap session, every route returns a coroutine.
+
+    encoder, decoder, hooks and request flows (retries, cache, key pool,
+    metrics) are shared with `AMapSession`, only I/O calls of flows are
+    awaited, see `AMapSession._drive`. single and batch requests share one
+    `aiohttp` connection pool, `pool_options` of `AMapSession` are accepted,
+    those `aiohttp` has no use for are ignored, see `AsyncBaseRequest`.
+
+    usage:
+
+        async with AsyncAMapSession(default_key=your_key) as session:
+            r = await session.geo_code(address='xxx')
+
+            async for d in session.geo_code_many(addresses):
+                ...
+    """
+
+    REQUEST_CLASS = AsyncAMapRequest
+    BATCH_REQUEST_CLASS = AsyncAMapBatchRequest
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def close(self):
+        await self.brequest.close()
+        await self.request.close()
+
+    @check_params_type(adapter=(AsyncSingleFlight,))
+    def _mount_single_flight(self, adapter):
+        self.single_flight = adapter
+
+    @check_params_type(adapter=(AsyncBatchDispatcher,))
+    def _mount_dispatcher(self, adapter):
+        self.dispatcher = adapter
+
+    async def _post_dispatched(self, ops):
+        return await self.brequest.get_batch(self._encode_dispatched(ops))
+
+    async def _get(self, route_key, func_name, p):
+        if self._is_dispatched(route_key):
+            return await self.dispatcher.call(self._post_dispatched, p)
+
+        return await getattr(self.request, 'get_' + func_name)(p)
+
+    @staticmethod
+    def _sleep(delay):
+        return asyncio.sleep(delay)
+
+    async def _drive(self, flow):
+        """ run a flow of session, I/O calls are awaited. """
+        value = next(flow)
+
+        while isinstance(value, (_IO, GeneratorType)):
+            try:
+                if isinstance(value, _IO):
+                    result = await value.fn(*value.args)
+                else:
+                    result = await self._drive(value)
+            except BaseException as err:
+                value = flow.throw(err)
+            else:
+                value = flow.send(result)
+
+        flow.close()
+        return value
+
+    @check_params_type(adapter=(AsyncBaseRequest,))
+    def _mount_request(self, adapter):
+        self.request = adapter
+        self._share_request_adapters()
+
+    @check_params_type(adapter=(AsyncBaseRequest,))
+    def _mount_batch_request(self, adapter):
+        self.brequest = adapter
+        self._share_request_adapters()
+
+    async def _geo_code_many(self, addresses, city=None, batch_post=True,
+                             raise_error=False, **kwargs):
+        packs = self._iter_geo_code_packs(addresses, city)
+
+        if not batch_post:
+            for pack_city, pack in packs:
+                d = await self._geo_code(address=pack, city=pack_city,
+                                         batch=True, **kwargs)
+                for i in self._iter_pack_result(pack, d, raise_error):
+                    yield i
+            return
+
+        for posts in chunked(packs, BATCH_MAX_OPS):
+            op_kwargs = dict(kwargs)
+            pool_key = self._acquire_key(op_kwargs, ops=len(posts))
+
+            d = await self.batch(
+                batch_list=self._geo_code_pack_ops(posts, op_kwargs),
+                key=op_kwargs.get('key'),
+                prepared_hook=kwargs.get('prepared_hook'),
+                response_hook=kwargs.get('response_hook'))
+            self._report_key(pool_key, d, batch=True)
+
+            for i in self._iter_post_result(posts, d, raise_error):
+                yield i
+
+    async def _regeo_code_many(self, locations, concurrency=4,
+                               raise_error=False, **kwargs):
+        pending = deque()
+
+        try:
+            for pack in chunked(locations, REGEO_CODE_BATCH_MAX):
+                pending.append((pack, asyncio.ensure_future(self._regeo_code(
+                    location=pack, batch=True, **kwargs))))
+
+                if len(pending) < concurrency:
+                    continue
+
+                pack, future = pending.popleft()
+                for i in self._iter_pack_result(pack, await future,
+                                                raise_error):
+                    yield i
+
+            while pending:
+                pack, future = pending.popleft()
+                for i in self._iter_pack_result(pack, await future,
+                                                raise_error):
+                    yield i
+        finally:
+            for _, future in pending:
+                future.cancel()
@@ -1,10 +1,11 @@
 # coding: utf-8
 import json
+import math
 
 from six import iteritems
 
 from thrall.compat import basestring, long
-from thrall.utils import camelcase_to_snakecase, is_list_empty
+from thrall.utils import is_list_empty, snakecase_keys
 
 
 def parse_multi_address(mixed_addresses):
@@ -66,6 +67,75 @@ def merge_location(lng, lat):
     return u'%.6f,%.6f' % (lng, lat)
 
 
+_GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def geohash_encode(lng, lat, precision=8):
+    """ encode location to geohash.
+
+    >>> geohash_encode(116.307490, 39.984154, 8)
+    'wx4eqwus'
+    >>> geohash_encode(-5.6, 42.6, 5)
+    'ezs42'
+
+    :param lng: longitude
+    :param lat: latitude
+    :param precision: geohash length, 8 means about 38m x 19m cell.
+    :return: geohash string
+    """
+    lng_range, lat_range = [-180.0, 180.0], [-90.0, 90.0]
+    chars = []
+    bits = bit = 0
+    even = True
+
+    while len(chars) < precision:
+        rng, value = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+
+        even = not even
+        bit += 1
+
+        if bit == 5:
+            chars.append(_GEOHASH_BASE32[bits])
+            bits = bit = 0
+
+    return ''.join(chars)
+
+
+_METERS_PER_DEGREE = 111320.0
+
+
+def snap_location(lng, lat, meters):
+    """ snap location to the center cell index of a square grid of `meters`.
+
+    >>> snap_location(116.307490, 39.984154, 50) == \
+    snap_location(116.307500, 39.984160, 50)
+    True
+    >>> snap_location(116.307490, 39.984154, 50) == \
+    snap_location(116.308490, 39.984154, 50)
+    False
+
+    :param lng: longitude
+    :param lat: latitude
+    :param meters: grid size in meters
+    :return: (lng_index, lat_index)
+    """
+    lat_step = meters / _METERS_PER_DEGREE
+    lat_index = int(math.floor(lat / lat_step))
+    # longitude step of the cell's row, so cells are about square.
+    row_lat = (lat_index + 0.5) * lat_step
+    lng_step = lat_step / max(math.cos(math.radians(row_lat)), 1e-6)
+
+    return int(math.floor(lng / lng_step)), lat_index
+
+
 def merge_multi_locations(locations):
     """ merge multi locations to single string
 
@@ -208,28 +278,33 @@ def json_load_and_fix_amap_empty(raw_data):
     >>> x['a'] == 'b' and x['cd_e'] is None
     True
     """
-    def _json_load_hook(obj):
-        if obj == _EMPTY_DICT:
-            return
+    return json.loads(raw_data, object_hook=_fix_amap_object)
 
-        new_obj = {}
-        poped_items = []
 
-        for k, w in iteritems(obj):
-            if is_list_empty(w):
-                obj[k] = None
+def _fix_amap_object(obj):
+    if not obj:
+        return
+
+    new_obj = None
+    poped_items = None
 
-            renamed_k = camelcase_to_snakecase(k)
+    for k, w in iteritems(obj):
+        if w.__class__ is list and is_list_empty(w):
+            obj[k] = None
 
-            if renamed_k != k:
-                new_obj[renamed_k] = obj.get(k)
-                poped_items.append(k)
+        renamed_k = snakecase_keys(k)
 
+        if renamed_k != k:
+            if new_obj is None:
+                new_obj, poped_items = {}, []
+
+            new_obj[renamed_k] = obj[k]
+            poped_items.append(k)
+
+    if new_obj is not None:
         obj.update(new_obj)
 
         for i in poped_items:
             obj.pop(i)
 
-        return obj
-
-    return json.loads(raw_data, object_hook=_json_load_hook)
+    return obj
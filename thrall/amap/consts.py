@@ -176,6 +176,36 @@ class DistanceType(IntEnum):
         return self.value
 
 
+# max ops amap accepted in one `/v3/batch` post.
+BATCH_MAX_OPS = 20
+# max addresses in one geo_code request with `batch=true`.
+GEO_CODE_BATCH_MAX = 10
+# max locations in one regeo_code request with `batch=true`.
+REGEO_CODE_BATCH_MAX = 20
+
+# amap infocodes of key quota / limit, see:
+# http://lbs.amap.com/api/webservice/guide/tools/info
+QPS_LIMIT_INFOCODES = frozenset((
+    10004,  # ACCESS_TOO_FREQUENT
+    10014,  # QPS_HAS_EXCEEDED_THE_LIMIT
+    10019,  # CQPS_HAS_EXCEEDED_THE_LIMIT
+    10020,  # CKQPS_HAS_EXCEEDED_THE_LIMIT
+    10021,  # CUQPS_HAS_EXCEEDED_THE_LIMIT
+))
+DAILY_LIMIT_INFOCODES = frozenset((
+    10003,  # DAILY_QUERY_OVER_LIMIT
+    10029,  # ABROAD_DAILY_QUERY_OVER_LIMIT
+    10044,  # USER_DAILY_QUERY_OVER_LIMIT
+    10045,  # USER_ABROAD_DAILY_QUERY_OVER_LIMIT
+))
+INVALID_KEY_INFOCODES = frozenset((
+    10001,  # INVALID_USER_KEY
+    10007,  # INVALID_USER_SIGNATURE
+    10009,  # USERKEY_PLAT_NOMATCH
+    10013,  # USER_KEY_RECYCLED
+    10026,  # INVALID_REQUEST (key blocked)
+))
+
 EXTENSION_BASE = 'base'
 EXTENSION_ALL = 'all'
 
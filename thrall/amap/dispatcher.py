@@ -0,0 +1,184 @@
+# coding: utf-8
+""" micro batching, merge concurrent single calls into `/v3/batch` posts. """
+from __future__ import absolute_import
+
+import json
+import threading
+
+from ..exceptions import VendorHTTPError, VendorRequestError
+from .consts import BATCH_MAX_OPS
+
+__all__ = ['BatchDispatcher', 'BatchOpResponse', 'PreparedOp']
+
+
+class PreparedOp(object):
+    """ prepared params of a single call, as an op of batch params. """
+    __slots__ = ('p',)
+
+    def __init__(self, p):
+        self.p = p
+
+    @property
+    def ROUTE_KEY(self):
+        return self.p.ROUTE_KEY
+
+    def prepare(self):
+        return self.p
+
+
+class BatchOpResponse(object):
+    """ response of an op in batch post, `content` is the op body, same as
+    the single request returns. """
+
+    def __init__(self, content, status_code, batch_response):
+        self.content = content
+        self.status_code = status_code
+        self.batch_response = batch_response
+
+    def __repr__(self):
+        return '<BatchOpResponse [{}]>'.format(self.status_code)
+
+
+def split_batch_response(r, size):
+    """ split batch post response into `size` op responses, error body of
+    the whole post is repeated for every op. """
+    raw = json.loads(r.content.decode('utf-8'))
+
+    if not isinstance(raw, list):
+        return [BatchOpResponse(r.content, r.status_code, r)] * size
+
+    return [BatchOpResponse(json.dumps(op.get('body', {})).encode('utf-8'),
+                            op.get('status', 200), r) for op in raw]
+
+
+class _Batch(object):
+    __slots__ = ('items', 'full', 'done', 'responses', 'error')
+
+    def __init__(self, full, done):
+        self.items = []
+        self.full = full
+        self.done = done
+        self.responses = None
+        self.error = None
+
+
+class BatchDispatcher(object):
+    """ thread safe micro batch dispatcher.
+
+    the first call of a batch waits at most `max_wait` seconds for other
+    concurrent calls, then posts all of them (at most `max_ops`) in one
+    `/v3/batch` post and hands every op response back to its caller.
+
+    usage:
+
+        session.mount('dispatcher', BatchDispatcher(max_wait=0.005))
+        # called concurrently in many threads
+        r = session.regeo_code(location=(lng, lat))
+    """
+
+    def __init__(self, max_wait=0.005, max_ops=BATCH_MAX_OPS,
+                 routes=('geo_code', 'regeo_code')):
+        """
+        :param max_wait: max seconds a call waits for others.
+        :param max_ops: max ops in one post.
+        :param routes: route keys to dispatch, None for all routes.
+        """
+        self.max_wait = max_wait
+        self.max_ops = max_ops
+        self.routes = (None if routes is None else
+                       frozenset(getattr(r, 'value', r) for r in routes))
+        self.posts = 0
+        self.ops = 0
+        self._lock = threading.Lock()
+        self._batch = None
+
+    def is_enabled(self, route_key):
+        return self.routes is None or route_key in self.routes
+
+    def _new_event(self):
+        return threading.Event()
+
+    def _join(self, p):
+        """ join pending batch, or start a new one.
+
+        :return: (batch, index of p, is_leader)
+        """
+        with self._lock:
+            batch, leader = self._batch, False
+
+            if batch is None:
+                batch = self._batch = _Batch(self._new_event(),
+                                             self._new_event())
+                leader = True
+
+            batch.items.append(p)
+            index = len(batch.items) - 1
+
+            if len(batch.items) >= self.max_ops:
+                self._batch = None
+                batch.full.set()
+
+            return batch, index, leader
+
+    def _close(self, batch):
+        """ stop joining batch, return its items. """
+        with self._lock:
+            if self._batch is batch:
+                self._batch = None
+
+            self.posts += 1
+            self.ops += len(batch.items)
+            return list(batch.items)
+
+    @staticmethod
+    def _split(r, items):
+        responses = split_batch_response(r, len(items))
+
+        if len(responses) != len(items):
+            raise VendorRequestError(
+                "AMAP-ERROR: batch response can't be aligned with ops",
+                data=r)
+
+        return responses
+
+    @staticmethod
+    def _result(batch, index):
+        if batch.error is not None:
+            raise batch.error
+
+        if batch.responses is None:
+            raise VendorRequestError('AMAP-ERROR: batch post cancelled')
+
+        r = batch.responses[index]
+
+        if r.status_code >= 400:
+            raise VendorHTTPError(
+                'AMAP-ERROR: batch op got http status {}'.format(
+                    r.status_code), data=r)
+
+        return r
+
+    def call(self, post, p):
+        """ send prepared params in a batch post.
+
+        :param post: function posts list of prepared params in one batch,
+         returns the batch response.
+        :param p: prepared params of single call.
+        :return: `BatchOpResponse`
+        """
+        batch, index, leader = self._join(p)
+
+        if leader:
+            batch.full.wait(self.max_wait)
+            items = self._close(batch)
+
+            try:
+                batch.responses = self._split(post(items), items)
+            except Exception as err:
+                batch.error = err
+            finally:
+                batch.done.set()
+        else:
+            batch.done.wait()
+
+        return self._result(batch, index)
@@ -0,0 +1,187 @@
+# coding: utf-8
+""" amap key pool, rotate requests across multiple keys. """
+from __future__ import absolute_import
+
+import threading
+import time
+
+from six import string_types
+
+from ..exceptions import VendorKeyExhaustedError
+from .consts import (
+    DAILY_LIMIT_INFOCODES,
+    INVALID_KEY_INFOCODES,
+    QPS_LIMIT_INFOCODES,
+)
+
+__all__ = ['AMapKey', 'AMapKeyPool']
+
+_DAY_SECONDS = 86400
+
+
+class AMapKey(object):
+    """ usage state of a key in pool, all fields are guarded by pool lock.
+    """
+
+    def __init__(self, key, private_key=None):
+        self.key = key
+        self.private_key = private_key
+        self.day = None
+        self.used_today = 0
+        self.second = None
+        self.used_this_second = 0
+        self.blocked_until = 0
+        self.disabled = False
+        self.limit_errors = 0
+
+    def __repr__(self):
+        return 'AMapKey(key={}..., used_today={}, disabled={})'.format(
+            self.key[:6], self.used_today, self.disabled)
+
+
+class AMapKeyPool(object):
+    """ thread safe amap key pool with local quota tracking.
+
+    keys are used round robin, a key is skipped while:
+        - its local qps or daily usage is over `qps` / `daily_quota`.
+        - amap returned a qps limit infocode in last `cooldown` seconds.
+        - amap returned a daily limit infocode, until next quota reset.
+        - amap returned an invalid key infocode (disabled forever).
+
+    if all usable keys are over local qps, the least used one is returned
+    (rate limiting is not the job of pool), `VendorKeyExhaustedError` is
+    raised if no usable key left.
+
+    usage:
+
+        pool = AMapKeyPool([('key1', 'private_key1'), 'key2'],
+                           qps=50, daily_quota=300000)
+        session = AMapSession()
+        session.mount('key_pool', pool)
+
+    NOTICE: pool only provides keys for requests without `key`, so don't
+    set `default_key` of session.
+    """
+
+    def __init__(self, keys, qps=None, daily_quota=None, cooldown=1.0,
+                 reset_utc_offset=8 * 3600, clock=time.time):
+        """
+        :param keys: list of key or (key, private_key) pairs.
+        :param qps: local max requests per second of each key.
+        :param daily_quota: local max requests per day of each key.
+        :param cooldown: seconds to skip a key after qps limit infocode.
+        :param reset_utc_offset: utc offset of daily quota reset (amap
+         resets at 00:00 UTC+8).
+        :param clock: time function, for test.
+        """
+        self.keys = [AMapKey(k) if isinstance(k, string_types)
+                     else AMapKey(*k) for k in keys]
+
+        if not self.keys:
+            raise ValueError('key pool needs at least one key')
+
+        self.qps = qps
+        self.daily_quota = daily_quota
+        self.cooldown = cooldown
+        self.reset_utc_offset = reset_utc_offset
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._next = 0
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _day(self, now):
+        return int((now + self.reset_utc_offset) // _DAY_SECONDS)
+
+    def _next_reset(self, now):
+        return (self._day(now) + 1) * _DAY_SECONDS - self.reset_utc_offset
+
+    def _refresh(self, k, now):
+        day, second = self._day(now), int(now)
+
+        if k.day != day:
+            k.day, k.used_today = day, 0
+        if k.second != second:
+            k.second, k.used_this_second = second, 0
+
+    def _is_usable(self, k, now, ops):
+        if k.disabled or k.blocked_until > now:
+            return False
+
+        return (self.daily_quota is None or
+                k.used_today + ops <= self.daily_quota)
+
+    def _has_qps(self, k, ops):
+        return self.qps is None or k.used_this_second + ops <= self.qps
+
+    def acquire(self, ops=1):
+        """ pick a key for `ops` requests (batch post counts as N ops).
+
+        :return: `AMapKey`
+        :raise VendorKeyExhaustedError: no usable key.
+        """
+        with self._lock:
+            now = self._clock()
+            size = len(self.keys)
+            fallback = None
+
+            for i in range(size):
+                k = self.keys[(self._next + i) % size]
+                self._refresh(k, now)
+
+                if not self._is_usable(k, now, ops):
+                    continue
+
+                if self._has_qps(k, ops):
+                    self._next = (self._next + i + 1) % size
+                    return self._use(k, ops)
+
+                if (fallback is None or
+                        k.used_this_second < fallback.used_this_second):
+                    fallback = k
+
+            if fallback is not None:
+                return self._use(fallback, ops)
+
+        raise VendorKeyExhaustedError('AMAP-ERROR: no usable key in pool')
+
+    @staticmethod
+    def _use(k, ops):
+        k.used_today += ops
+        k.used_this_second += ops
+        return k
+
+    def release(self, k, ops=1):
+        """ give back usage of an acquired key which sent nothing (e.g.
+        response got from cache). """
+        with self._lock:
+            k.used_today = max(k.used_today - ops, 0)
+            k.used_this_second = max(k.used_this_second - ops, 0)
+
+    def report(self, k, info_code):
+        """ report amap infocode of a response got by key. """
+        if k is None:
+            return
+
+        with self._lock:
+            now = self._clock()
+
+            if info_code in QPS_LIMIT_INFOCODES:
+                k.limit_errors += 1
+                k.blocked_until = max(k.blocked_until, now + self.cooldown)
+            elif info_code in DAILY_LIMIT_INFOCODES:
+                k.limit_errors += 1
+                k.blocked_until = self._next_reset(now)
+            elif info_code in INVALID_KEY_INFOCODES:
+                k.disabled = True
+
+    def stats(self):
+        with self._lock:
+            now = self._clock()
+            return [{'key': k.key,
+                     'used_today': k.used_today if k.day == self._day(now)
+                     else 0,
+                     'limit_errors': k.limit_errors,
+                     'blocked': k.blocked_until > now,
+                     'disabled': k.disabled} for k in self.keys]
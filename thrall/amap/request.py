@@ -1,10 +1,13 @@
 # coding: utf-8
 from __future__ import absolute_import
 
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from six import iteritems
 import json
+import threading
 
 from thrall.compat import urlencode, unicode
+from thrall.utils import chunked
 
 from .urls import (
     DISRANCE_URL,
@@ -18,13 +21,42 @@ from .urls import (
     NAVI_WALKING_URL,
     DISTRICT_URL,
 )
+from .consts import BATCH_MAX_OPS
 from ..base import BaseRequest
+from ..consts import RouteKey
+from ..exceptions import (
+    VendorConnectionError,
+    VendorHTTPError,
+    VendorRequestError,
+)
+from ..retry import http_status_of
 
 
 class AMapRequest(BaseRequest):
-    def __init__(self, session=None, enable_https=False):
-        super(AMapRequest, self).__init__(session=session)
+    def __init__(self, session=None, enable_https=False, rate_limiter=None,
+                 hedge_policy=None, adaptive_timeout=None,
+                 circuit_breaker=None, **pool_options):
+        """ amap request.
+
+        :param session: requests session.
+        :param enable_https: request by https.
+        :param rate_limiter: `RateLimiter` of routes and keys.
+        :param hedge_policy: `HedgePolicy`, duplicate slow requests.
+        :param adaptive_timeout: `AdaptiveTimeout`, timeouts of routes follow
+         their latency.
+        :param circuit_breaker: `CircuitBreaker`, fail fast on broken routes.
+        :param pool_options: pool_connections, pool_maxsize, pool_block,
+         keep_alive, max_retries, see `BaseRequest`.
+        """
+        super(AMapRequest, self).__init__(session=session, **pool_options)
         self._is_https = enable_https
+        self.rate_limiter = rate_limiter
+        self.hedge_policy = hedge_policy
+        self.adaptive_timeout = adaptive_timeout
+        self.circuit_breaker = circuit_breaker
+        self._hedge_executor = None
+        self._hedge_slots = None
+        self._hedge_lock = threading.Lock()
 
     def _url_swith(self, oru, dfu, url):
         if oru:
@@ -32,11 +64,94 @@ class AMapRequest(BaseRequest):
         else:
             return url or dfu
 
+    def _data_url(self, p, default_url, url=None):
+        url = self._url_swith(url, default_url, p.DEFAULT_URL)
+        return url.https_url if self._is_https else url.url
+
     def get_data(self, p, default_url, url=None, **kwargs):
         params = p.params
-        url = self._url_swith(url, default_url, p.DEFAULT_URL)
-        return self.get(url.https_url if self._is_https else url.url,
-                        params=params, **kwargs)
+        url = self._data_url(p, default_url, url)
+
+        with self.guard_circuit(p.ROUTE_KEY, params.get('key')):
+            self.throttle(p.ROUTE_KEY, params.get('key'))
+
+            with self.adapt_timeout(p.ROUTE_KEY, kwargs):
+                if self._is_hedged(p.ROUTE_KEY):
+                    return self._hedged_get(p.ROUTE_KEY, url, params,
+                                            **kwargs)
+
+                return self.get(url, params=params, **kwargs)
+
+    def _is_hedged(self, route_key):
+        return (self.hedge_policy is not None and
+                self.hedge_policy.is_enabled(route_key))
+
+    def _acquire_hedge_worker(self):
+        """ reserve a hedge worker, False if all of them are busy. """
+        if self._hedge_executor is None:
+            with self._hedge_lock:
+                if self._hedge_executor is None:
+                    max_workers = self.hedge_policy.max_workers
+                    self._hedge_slots = threading.BoundedSemaphore(
+                        max_workers)
+                    self._hedge_executor = ThreadPoolExecutor(
+                        max_workers=max_workers)
+
+        return self._hedge_slots.acquire(False)
+
+    def _hedged_get(self, route_key, url, params, **kwargs):
+        """ get in a hedge worker, if it's slower than the hedge delay of
+        route, a duplicate is sent by another worker, the first successful
+        response is returned.
+
+        requests can't be aborted, the slower one finishes in its worker.
+        requests never queue for workers, when all of them are busy the
+        request is sent unhedged in caller's thread.
+        """
+        policy = self.hedge_policy
+        delay = policy.start(route_key)
+
+        if delay is None or not self._acquire_hedge_worker():
+            return policy.timed(route_key, self.get, url, params=params,
+                                **kwargs)
+
+        futures = [self._submit_hedged(route_key, url, params, kwargs)]
+
+        if (not wait(futures, timeout=delay).done and
+                self._acquire_hedge_worker()):
+            if policy.try_hedge():
+                futures.append(
+                    self._submit_hedged(route_key, url, params, kwargs))
+            else:
+                self._hedge_slots.release()
+
+        return self._first_result(futures)
+
+    def _submit_hedged(self, route_key, url, params, kwargs):
+        return self._hedge_executor.submit(
+            self._send_hedged, route_key, url, params, kwargs)
+
+    def _send_hedged(self, route_key, url, params, kwargs):
+        try:
+            return self.hedge_policy.timed(route_key, self.get, url,
+                                           params=params, **kwargs)
+        finally:
+            self._hedge_slots.release()
+
+    @staticmethod
+    def _first_result(futures):
+        """ result of the first successful future, error of the first if all
+        failed. """
+        pending = set(futures)
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+            for f in futures:
+                if f in done and f.exception() is None:
+                    return f.result()
+
+        return futures[0].result()
 
     def get_geo_code(self, p, **kwargs):
         return self.get_data(p, default_url=GEO_CODING_URL, **kwargs)
@@ -69,26 +184,142 @@ class AMapRequest(BaseRequest):
         return self.get_data(p, default_url=NAVI_DRIVING_URL, **kwargs)
 
 
+class MergedBatchResponse(object):
+    """ merged response of a batch request which was split into chunks.
+
+    `content` is the same json list as a single batch post returns, ops
+    are in original order. If a chunk got a global error (e.g. invalid key)
+    instead of a list, the error body is repeated for every op of the chunk,
+    so it is reported per item by `BatchResponseData`.
+
+    a chunk failed by `VendorRequestError` is given as the error, every op
+    of it gets an error body of infocode -1, and http status of the error
+    (503 for connection errors), so it can be retried per op.
+    """
+    status_code = 200
+
+    def __init__(self, chunks, responses):
+        """
+        :param chunks: request lists of chunks.
+        :param responses: response or `VendorRequestError` of chunks.
+        """
+        self.chunks = chunks
+        self.responses = responses
+        self._content = None
+
+    @classmethod
+    def merge(cls, chunks, responses):
+        """ merged response of chunks, error of the first chunk is raised if
+        all chunks failed. """
+        for r in responses:
+            if (isinstance(r, BaseException) and
+                    not isinstance(r, VendorRequestError)):
+                raise r
+
+        if all(isinstance(r, VendorRequestError) for r in responses):
+            raise responses[0]
+
+        return cls(chunks, responses)
+
+    def __repr__(self):
+        return '<MergedBatchResponse [{} chunks]>'.format(len(self.responses))
+
+    @property
+    def content(self):
+        if self._content is None:
+            self._content = self._merge_content()
+        return self._content
+
+    def _merge_content(self):
+        items = []
+
+        for chunk, r in zip(self.chunks, self.responses):
+            if isinstance(r, VendorRequestError):
+                items.extend([self._error_op(r)] * len(chunk))
+                continue
+
+            content = r.content.strip()
+
+            if content.startswith(b'['):
+                inner = content[1:-1].strip()
+                if inner:
+                    items.append(inner)
+            else:
+                items.extend(
+                    [b'{"status":200,"body":' + content + b'}'] * len(chunk))
+
+        return b'[' + b','.join(items) + b']'
+
+    @staticmethod
+    def _error_op(err):
+        if isinstance(err, VendorHTTPError):
+            status = http_status_of(err)
+        elif isinstance(err, VendorConnectionError):
+            status = 503
+        else:
+            status = None
+
+        return json.dumps({'status': status, 'body': {
+            'status': '0', 'infocode': '-1',
+            'info': u'{}: {}'.format(type(err).__name__, unicode(err))}
+        }).encode('utf-8')
+
+
 class AMapBatchRequest(BaseRequest):
     _POST_URL = 'http://restapi.amap.com/v3/batch'
     _HTTPS_POST_URL = 'https://restapi.amap.com/v3/batch'
 
-    def __init__(self, session=None, enable_https=False):
-        super(AMapBatchRequest, self).__init__(session=session)
+    def __init__(self, session=None, enable_https=False,
+                 max_ops=BATCH_MAX_OPS, max_workers=4, rate_limiter=None,
+                 adaptive_timeout=None, circuit_breaker=None,
+                 **pool_options):
+        """ amap batch request.
+
+        :param session: requests session.
+        :param enable_https: post batch by https.
+        :param max_ops: max ops in one post, longer batch list will be split
+         into chunks and posted concurrently.
+        :param max_workers: max concurrent chunk posts.
+        :param rate_limiter: `RateLimiter`, a post counts as N ops.
+        :param adaptive_timeout: `AdaptiveTimeout`, timeout of a post follows
+         latency of batch posts and its op count.
+        :param circuit_breaker: `CircuitBreaker`, fail fast if batch posts
+         are broken.
+        :param pool_options: pool_connections, pool_maxsize, pool_block,
+         keep_alive, max_retries, see `BaseRequest`.
+        """
+        super(AMapBatchRequest, self).__init__(session=session,
+                                               **pool_options)
         self._is_https = enable_https
+        self.max_ops = max_ops
+        self.max_workers = max_workers
+        self.rate_limiter = rate_limiter
+        self.adaptive_timeout = adaptive_timeout
+        self.circuit_breaker = circuit_breaker
 
     def get_batch_data(self, request_list, key=None, **kwargs):
         """ AMap batch request
 
-        :param request_list: [{'url': ..., 'params': ...}, ...]
+        :param request_list: [{'url': ..., 'params': ...}, ...], params are
+         encoded again if no pre-encoded `query` given.
         :param key: amap request key
         :return: response
         """
+        with self.guard_circuit(RouteKey.BATCH, key):
+            self.throttle(RouteKey.BATCH, key, ops=len(request_list))
+
+            with self.adapt_timeout(RouteKey.BATCH, kwargs,
+                                    ops=len(request_list)):
+                return self.post(**self._post_kwargs(request_list, key,
+                                                     kwargs))
+
+    def _post_kwargs(self, request_list, key, kwargs):
         ops_params = {
-            'ops': [{'url': self._construct_ops(r['url'], r['params'])}
-                    for r in request_list]}
+            'ops': [{'url': self._construct_ops(
+                r['url'], r['params'], r.get('query'))}
+                for r in request_list]}
 
-        return self.post(
+        return dict(
             url="{}?key={}".format(
                 self._HTTPS_POST_URL if self._is_https else self._POST_URL,
                 key),
@@ -96,11 +327,37 @@ class AMapBatchRequest(BaseRequest):
             headers={'Content-Type': 'application/json'},
             **kwargs)
 
-    def _construct_ops(self, url, params):
-        return '{}?{}'.format(url, urlencode(
+    def _construct_ops(self, url, params, query=None):
+        return '{}?{}'.format(url, query or urlencode(
             {k: unicode(v).encode('utf-8') for k, v in iteritems(params)}
         ))
 
+    def split_ops(self, request_list):
+        return list(chunked(request_list, self.max_ops))
+
     def get_batch(self, p, **kwargs):
         params = p.params
-        return self.get_batch_data(params['batch'], params['key'], **kwargs)
+        chunks = self.split_ops(params['batch'])
+
+        if len(chunks) <= 1:
+            return self.get_batch_data(params['batch'], params['key'],
+                                       **kwargs)
+
+        return MergedBatchResponse.merge(
+            chunks, self._get_chunks(chunks, params['key'], **kwargs))
+
+    def _get_chunks(self, chunks, key, **kwargs):
+        """ responses of chunks, `VendorRequestError` of failed ones. """
+        workers = max(min(len(chunks), self.max_workers), 1)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(self.get_batch_data, c, key, **kwargs)
+                       for c in chunks]
+            return [self._chunk_result(f) for f in futures]
+
+    @staticmethod
+    def _chunk_result(future):
+        try:
+            return future.result()
+        except VendorRequestError as err:
+            return err
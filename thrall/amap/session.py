@@ -1,13 +1,46 @@
 # coding: utf-8
 from __future__ import absolute_import
 
-from ..base import BaseDecoderAdapter, BaseEncoderAdapter, BaseRequest
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from types import GeneratorType
+
+from ..compat import basestring
+from ..base import (
+    BaseCacheAdapter,
+    BaseDecoderAdapter,
+    BaseEncoderAdapter,
+    BaseRequest,
+)
+from ..breaker import CircuitBreaker
+from ..exceptions import (
+    VendorError,
+    VendorKeyExhaustedError,
+    VendorRequestError,
+)
+from ..hedge import HedgePolicy
 from ..hooks import SetDefault
+from ..latency import AdaptiveTimeout
+from ..metrics import MetricsCollector
+from ..ratelimit import RateLimiter
+from ..retry import RetryPolicy
+from ..singleflight import SingleFlight
 from ..settings import GLOBAL_CONFIG
-from ..utils import check_params_type
+from ..timing import NULL_TIMER, PhaseTiming
+from ..utils import check_params_type, chunked
 from ..consts import RouteKey
 from .adapters import AMapEncodeAdapter, AMapJsonDecoderAdapter
+from .dispatcher import BatchDispatcher, PreparedOp
+from .key_pool import AMapKeyPool
 from .request import AMapRequest, AMapBatchRequest
+from .template import RequestTemplate
+from .consts import (
+    BATCH_MAX_OPS,
+    GEO_CODE_BATCH_MAX,
+    REGEO_CODE_BATCH_MAX,
+    StatusFlag,
+)
 from . import urls, models
 
 _set_default = SetDefault()
@@ -41,6 +74,15 @@ BATCH_DECODE_DEFAULT_PAIRS = {
 }
 
 
+class _IO(object):
+    """ I/O call yielded by a flow of session, see `AMapSession._drive`. """
+    __slots__ = ('fn', 'args')
+
+    def __init__(self, fn, *args):
+        self.fn = fn
+        self.args = args
+
+
 class SessionHookMixin(object):
 
     def DEFAULT_HOOK(self, *args, **kwargs):
@@ -71,10 +113,26 @@ class AMapSession(SessionHookMixin):
     _DECODE = 'decode'
     _REQUEST = 'request'
     _B_REQUEST = 'batch_request'
+    _CACHE = 'cache'
+    _KEY_POOL = 'key_pool'
+    _RATE_LIMITER = 'rate_limiter'
+    _RETRY = 'retry'
+    _SINGLE_FLIGHT = 'single_flight'
+    _DISPATCHER = 'dispatcher'
+    _HEDGE = 'hedge'
+    _TIMEOUT = 'timeout'
+    _CIRCUIT_BREAKER = 'circuit_breaker'
+    _METRICS = 'metrics'
 
     _PREPARED_HOOK_PREFIX = 'prepared'
     _RESPONSE_HOOK_PREFIX = 'response'
 
+    REQUEST_CLASS = AMapRequest
+    BATCH_REQUEST_CLASS = AMapBatchRequest
+
+    # extra decode kwargs of routes
+    _DECODE_KWARGS = {'riding': {'auto_version': True}}
+
     def _run_prepared_hook(self, route_key, p, override_func=None):
         hook = self.get_hook(route_key, self._PREPARED_HOOK_PREFIX,
                              override_func=override_func)
@@ -87,20 +145,43 @@ class AMapSession(SessionHookMixin):
 
     def __init__(self, default_key=None, default_private_key=None,
                  default_batch_urls=BATCH_URL_DEFAULT_PAIRS,
-                 default_batch_decoders=BATCH_DECODE_DEFAULT_PAIRS):
+                 default_batch_decoders=BATCH_DECODE_DEFAULT_PAIRS,
+                 pool_options=None, record_timing=False):
+        """
+        :param default_key: default amap key.
+        :param default_private_key: default amap private key.
+        :param default_batch_urls: default {route_key: url} of batch ops.
+        :param default_batch_decoders: default {route_key: decoder} of
+         batch ops.
+        :param pool_options: connection pool options of request, e.g.
+         pool_maxsize, keep_alive, single and batch requests share one pool.
+        :param record_timing: attach `PhaseTiming` of call to every response
+         data and raised `VendorError` as `timing`.
+        """
         super(AMapSession, self).__init__()
         self.encoder = None
         self.decoder = None
         self.request = None
         self.brequest = None
+        self.cache = None
+        self.key_pool = None
+        self.rate_limiter = None
+        self.retry_policy = None
+        self.single_flight = None
+        self.dispatcher = None
+        self.hedge_policy = None
+        self.adaptive_timeout = None
+        self.circuit_breaker = None
+        self.metrics = None
+        self.record_timing = record_timing
 
         self._defaults = SetDefault()
         self._batch_default = SetDefault()
 
         self.mount(self._ENCODE, AMapEncodeAdapter())
         self.mount(self._DECODE, AMapJsonDecoderAdapter(static_mode=True))
-        self.mount(self._REQUEST, AMapRequest())
-        self.mount(self._B_REQUEST, AMapBatchRequest())
+        self.mount(self._REQUEST, self.REQUEST_CLASS(**(pool_options or {})))
+        self.mount(self._B_REQUEST, self.BATCH_REQUEST_CLASS())
 
         self._defaults.set_default(key=default_key,
                                    private_key=default_private_key,
@@ -119,8 +200,30 @@ class AMapSession(SessionHookMixin):
             self._mount_decoder(adapter)
         elif schema == self._REQUEST:
             self._mount_request(adapter)
+            self._share_pool()
         elif schema == self._B_REQUEST:
             self._mount_batch_request(adapter)
+            self._share_pool()
+        elif schema == self._CACHE:
+            self._mount_cache(adapter)
+        elif schema == self._KEY_POOL:
+            self._mount_key_pool(adapter)
+        elif schema == self._RATE_LIMITER:
+            self._mount_rate_limiter(adapter)
+        elif schema == self._RETRY:
+            self._mount_retry(adapter)
+        elif schema == self._SINGLE_FLIGHT:
+            self._mount_single_flight(adapter)
+        elif schema == self._DISPATCHER:
+            self._mount_dispatcher(adapter)
+        elif schema == self._HEDGE:
+            self._mount_hedge(adapter)
+        elif schema == self._TIMEOUT:
+            self._mount_timeout(adapter)
+        elif schema == self._CIRCUIT_BREAKER:
+            self._mount_circuit_breaker(adapter)
+        elif schema == self._METRICS:
+            self._mount_metrics(adapter)
         else:
             raise TypeError(
                 'Error adapter got, must extend from base adapter')
@@ -136,207 +239,783 @@ class AMapSession(SessionHookMixin):
     @check_params_type(adapter=(BaseRequest,))
     def _mount_request(self, adapter):
         self.request = adapter
+        self._share_request_adapters()
 
     @check_params_type(adapter=(BaseRequest,))
     def _mount_batch_request(self, adapter):
         self.brequest = adapter
+        self._share_request_adapters()
+
+    def _share_pool(self):
+        """ batch request shares connection pool of single request, unless
+        its session is given. """
+        if (self.request is not None and self.brequest is not None and
+                self.brequest is not self.request and
+                self.brequest.pool_shareable):
+            self.brequest.share_pool(self.request)
+
+    @check_params_type(adapter=(BaseCacheAdapter,))
+    def _mount_cache(self, adapter):
+        """ mount response cache, mount None to disable it. """
+        self.cache = adapter
+
+    @check_params_type(adapter=(AMapKeyPool,))
+    def _mount_key_pool(self, adapter):
+        """ mount key pool, requests without key use keys of pool, mount
+        None to disable it. """
+        self.key_pool = adapter
+
+    def _request_adapters(self):
+        """ (name, requests) of session adapters set on requests. """
+        both = (self.request, self.brequest)
+        return (('rate_limiter', both),
+                ('adaptive_timeout', both),
+                ('circuit_breaker', both),
+                ('hedge_policy', (self.request,)))
+
+    def _share_request_adapters(self):
+        """ set mounted adapters on a newly mounted request. """
+        for name, requests in self._request_adapters():
+            adapter = getattr(self, name)
+
+            if adapter is not None:
+                for r in requests:
+                    if r is not None:
+                        setattr(r, name, adapter)
+
+    @check_params_type(adapter=(RateLimiter,))
+    def _mount_rate_limiter(self, adapter):
+        """ mount rate limiter shared by single and batch requests, mount
+        None to disable it. """
+        self.rate_limiter = adapter
+
+        for r in (self.request, self.brequest):
+            r.rate_limiter = adapter
+
+    @check_params_type(adapter=(AdaptiveTimeout,))
+    def _mount_timeout(self, adapter):
+        """ mount adaptive timeout shared by single and batch requests,
+        mount None to disable it. """
+        self.adaptive_timeout = adapter
+
+        for r in (self.request, self.brequest):
+            r.adaptive_timeout = adapter
+
+    @check_params_type(adapter=(CircuitBreaker,))
+    def _mount_circuit_breaker(self, adapter):
+        """ mount circuit breaker shared by single and batch requests,
+        mount None to disable it. """
+        self.circuit_breaker = adapter
+
+        for r in (self.request, self.brequest):
+            r.circuit_breaker = adapter
+
+    @check_params_type(adapter=(MetricsCollector,))
+    def _mount_metrics(self, adapter):
+        """ mount metrics collector, mount None to disable it. """
+        self.metrics = adapter
+
+    def _timer(self, route_key, key, phase):
+        """ context manager observes latency of phase to metrics. """
+        if self.metrics is None:
+            return NULL_TIMER
+
+        return self.metrics.timer(route_key, key, phase)
+
+    def _count(self, route_key, key, name, n=1):
+        if self.metrics is not None:
+            self.metrics.inc(route_key, key, name, n)
+
+    def _new_timing(self):
+        if self.record_timing:
+            return PhaseTiming()
+
+    @staticmethod
+    def _phase(timing, phase):
+        """ context manager adds elapsed seconds to phase of timing. """
+        return NULL_TIMER if timing is None else timing.measure(phase)
+
+    @staticmethod
+    def _received(timing, r):
+        if timing is not None:
+            timing.received(r.content)
+
+    def _record_response(self, route_key, key, r, d):
+        """ record response size and infocodes to metrics, infocodes of
+        ops for a batch response. """
+        metrics = self.metrics
+
+        if metrics is None:
+            return
+
+        metrics.inc(route_key, key, 'bytes', len(r.content))
+
+        if getattr(d, 'raw_ops', None) is not None:
+            for i in d.data:
+                metrics.infocode(route_key, key, i.status_msg.code)
+        else:
+            metrics.infocode(route_key, key, d.status_msg.code)
+
+    @check_params_type(adapter=(HedgePolicy,))
+    def _mount_hedge(self, adapter):
+        """ mount hedge policy of single requests, mount None to disable
+        it. """
+        self.hedge_policy = adapter
+        self.request.hedge_policy = adapter
+
+    @check_params_type(adapter=(RetryPolicy,))
+    def _mount_retry(self, adapter):
+        """ mount retry policy, mount None to disable it. """
+        self.retry_policy = adapter
+
+    @check_params_type(adapter=(SingleFlight,))
+    def _mount_single_flight(self, adapter):
+        """ mount single flight group, concurrent identical calls share one
+        request and its decoded response data, mount None to disable it. """
+        self.single_flight = adapter
+
+    @check_params_type(adapter=(BatchDispatcher,))
+    def _mount_dispatcher(self, adapter):
+        """ mount micro batch dispatcher, concurrent single calls of its
+        routes are merged into batch posts, mount None to disable it. """
+        self.dispatcher = adapter
+
+    def _is_dispatched(self, route_key):
+        return (self.dispatcher is not None and
+                self.dispatcher.is_enabled(route_key))
+
+    def _encode_dispatched(self, ops):
+        """ batch params of dispatched single calls. """
+        return self.encoder.encode_batch(
+            batch_list=[PreparedOp(p) for p in ops], key=ops[0].key,
+            url_pairs=self._batch_default.default_kwargs['url_pairs'])
+
+    def _post_dispatched(self, ops):
+        return self.brequest.get_batch(self._encode_dispatched(ops))
+
+    def _get(self, route_key, func_name, p):
+        """ get response of single call, by batch post if dispatched. """
+        if self._is_dispatched(route_key):
+            return self.dispatcher.call(self._post_dispatched, p)
+
+        return getattr(self.request, 'get_' + func_name)(p)
+
+    @staticmethod
+    def _sleep(delay):
+        time.sleep(delay)
+
+    def _drive(self, flow):
+        """ run a flow of session.
+
+        request flows yield their I/O calls (`_IO`) and sub flows, which are
+        run here and their results (or errors) are sent back, the first
+        other value yielded is the result of flow. So the flow is shared by
+        sessions, which only differ in how I/O calls are made.
+        """
+        value = next(flow)
+
+        while isinstance(value, (_IO, GeneratorType)):
+            try:
+                if isinstance(value, _IO):
+                    result = value.fn(*value.args)
+                else:
+                    result = self._drive(value)
+            except BaseException as err:
+                value = flow.throw(err)
+            else:
+                value = flow.send(result)
+
+        flow.close()
+        return value
+
+    def _flight_key(self, route_key, p):
+        """ single flight key of call, None if not coalesced. """
+        flight = self.single_flight
+
+        if flight is not None and flight.is_enabled(route_key):
+            return flight.make_key(route_key, p.params)
+
+    def _new_retry(self):
+        if self.retry_policy is not None:
+            return self.retry_policy.new_state()
+
+    @staticmethod
+    def _error_delay(retry, err):
+        """ backoff before retry of a request error, None to raise it. """
+        if retry is not None:
+            return retry.next_delay(err=err)
+
+    @staticmethod
+    def _status_delay(retry, d):
+        """ backoff before retry of a response, None to return it. """
+        if retry is not None:
+            return retry.next_delay(code=d.status_msg.code)
+
+    def _retryable_ops(self, retry, d):
+        """ indexes of batch ops got retryable http status or infocode. """
+        raw_ops = d.raw_ops
+
+        if retry is None or raw_ops is None:
+            return []
+
+        policy = retry.policy
+        return [i for i, op in enumerate(raw_ops)
+                if policy.is_retryable_status(op.get('status')) or
+                policy.is_retryable_code(
+                    int((op.get('body') or {}).get('infocode', -1)))]
+
+    def _encode_ops(self, p, indexes):
+        """ encode ops of batch params at indexes into a new batch. """
+        return self.encoder.encode_batch(
+            batch_list=[p.batch_list[i] for i in indexes], key=p.key,
+            url_pairs=p.url_pairs)
+
+    def _rekey(self, p, pool_key):
+        """ switch params to another pool key before retry. """
+        if pool_key is None:
+            return
+
+        try:
+            k = self.key_pool.acquire()
+        except VendorKeyExhaustedError:
+            return pool_key
+
+        p.rekey(k.key, k.private_key)
+        return k
+
+    def _acquire_key(self, kwargs, ops=1):
+        """ fill key / private_key of kwargs from mounted key pool.
+
+        :return: acquired `AMapKey`, None if key given or no pool mounted.
+        """
+        if self.key_pool is None or kwargs.get('key') is not None:
+            return
+
+        k = self.key_pool.acquire(ops)
+        kwargs['key'], kwargs['private_key'] = k.key, k.private_key
+        return k
+
+    def _report_key(self, pool_key, d, batch=False):
+        """ report infocodes of response to key pool. """
+        if pool_key is None:
+            return
+
+        self.key_pool.report(pool_key, d.status_msg.code)
+
+        if batch:
+            for i in d.data:
+                self.key_pool.report(pool_key, i.status_msg.code)
+
+    def _get_cache(self, route_key, p):
+        if self.cache is not None:
+            return self.cache.get(route_key, p)
+
+    def _set_cache(self, route_key, p, content, data):
+        if self.cache is not None:
+            self.cache.set(route_key, p, content, data)
 
     def batch(self, *args, **kwargs):
-        return self._batch_default(self._batch)(*args, **kwargs)
+        return self._batch_default.call(self._batch, *args, **kwargs)
 
     def _batch(self, *args, **kwargs):
+        return self._drive(self._batch_flow(*args, **kwargs))
+
+    def _batch_flow(self, *args, **kwargs):
         route_key = RouteKey.BATCH.value
         decode_pairs = kwargs.pop('decode_pairs')
         prepared_hook = kwargs.pop('prepared_hook', None)
         response_hook = kwargs.pop('response_hook', None)
 
-        p = self.encoder.encode_batch(*args, **kwargs)
-        self._run_prepared_hook(route_key, p, prepared_hook)
-
-        r = self.brequest.get_batch(p)
-        self._run_response_hook(route_key, r, response_hook)
+        pool_key = self._acquire_batch_key(kwargs)
+        key = kwargs.get('key')
+        self._count(route_key, key, 'requests')
+        timing = self._new_timing()
 
-        d = self.decoder.decode_batch(raw_data=r.content, p=p,
-                                      decode_pairs=decode_pairs)
+        try:
+            with self._timer(route_key, key, 'encode'), \
+                    self._phase(timing, 'encode'):
+                p = self.encoder.encode_batch(*args, **kwargs)
+        except VendorError as err:
+            err.timing = timing
+            raise
 
-        return d
-
-    def geo_code(self, *args, **kwargs):
-        return self._defaults(self._geo_code)(*args, **kwargs)
-
-    def _geo_code(self, *args, **kwargs):
-        route_key = 'geo_code'
+        self._run_prepared_hook(route_key, p, prepared_hook)
+        retry = self._new_retry()
+
+        while True:
+            try:
+                with self._timer(route_key, key, 'request'), \
+                        self._phase(timing, 'network'):
+                    r = yield _IO(self.brequest.get_batch, p)
+            except VendorRequestError as err:
+                self._count(route_key, key, 'errors')
+                delay = self._error_delay(retry, err)
+                if delay is None:
+                    err.timing = timing
+                    raise
+                self._count(route_key, key, 'retries')
+                yield _IO(self._sleep, delay)
+                continue
+
+            self._received(timing, r)
+            self._run_response_hook(route_key, r, response_hook)
+
+            with self._timer(route_key, key, 'decode'):
+                d = self._decode_batch(r.content, p, decode_pairs, timing)
+
+            self._record_response(route_key, key, r, d)
+            delay = self._status_delay(retry, d)
+            if delay is None or d.raw_ops is not None:
+                break
+            self._count(route_key, key, 'retries')
+            yield _IO(self._sleep, delay)
+
+        d = yield self._retry_ops_flow(route_key, p, d, decode_pairs,
+                                       response_hook, retry, timing)
+        self._report_key(pool_key, d, batch=True)
+
+        yield d
+
+    def _decode_batch(self, content, p, decode_pairs, timing=None):
+        if timing is None:
+            return self.decoder.decode_batch(raw_data=content, p=p,
+                                             decode_pairs=decode_pairs)
+
+        with timing.measure('decode_total'):
+            return self.decoder.decode_batch(raw_data=content, p=p,
+                                             decode_pairs=decode_pairs,
+                                             timing=timing)
+
+    def _retry_ops_flow(self, route_key, p, d, decode_pairs,
+                        response_hook, retry, timing=None):
+        """ flow re-sends failed ops of batch response until all ops
+        succeeded or retry policy gives up. """
+        indexes = self._retryable_ops(retry, d)
+
+        while indexes:
+            delay = retry.next_delay(retryable=True)
+            if delay is None:
+                break
+            self._count(route_key, p.key, 'retries')
+            yield _IO(self._sleep, delay)
+
+            sub_p = self._encode_ops(p, indexes)
+
+            try:
+                with self._timer(route_key, p.key, 'request'), \
+                        self._phase(timing, 'network'):
+                    r = yield _IO(self.brequest.get_batch, sub_p)
+            except VendorRequestError as err:
+                self._count(route_key, p.key, 'errors')
+                if not retry.policy.is_retryable_error(err):
+                    break
+                continue
+
+            self._received(timing, r)
+            self._run_response_hook(route_key, r, response_hook)
+
+            with self._timer(route_key, p.key, 'decode'):
+                sub_d = self._decode_batch(r.content, sub_p, decode_pairs,
+                                           timing)
+
+            self._record_response(route_key, p.key, r, sub_d)
+
+            if sub_d.raw_ops is None or len(sub_d.raw_ops) != len(indexes):
+                continue
+
+            d = d.merge_ops(indexes, sub_d)
+            indexes = [indexes[i] for i in self._retryable_ops(retry, sub_d)]
+
+        yield d
+
+    def _acquire_batch_key(self, kwargs):
+        """ acquire pool key of batch post, a post counts as N ops. """
+        pool_key = self._acquire_key(
+            kwargs, ops=max(len(kwargs.get('batch_list') or ()), 1))
+
+        if pool_key is not None:
+            # batch post isn't signed, ops are signed by their own keys.
+            kwargs.pop('private_key')
+
+        return pool_key
+
+    def _route(self, route_key, func_name, args, kwargs):
+        """ run the encode -> request -> decode flow of a single route.
+
+        :param route_key: route key value, used to find registered hooks.
+        :param func_name: route function name, `encode_<func_name>`,
+         `get_<func_name>` and `decode_<func_name>` must be registered in
+         encoder, request and decoder.
+        :param args: encode args.
+        :param kwargs: encode kwargs, include prepared_hook / response_hook.
+        :return: decoded response data.
+        """
         prepared_hook = kwargs.pop('prepared_hook', None)
         response_hook = kwargs.pop('response_hook', None)
-
-        p = self.encoder.encode_geo_code(*args, **kwargs)
+        pool_key = self._acquire_key(kwargs)
+        timing = self._new_timing()
+
+        try:
+            with self._timer(route_key, kwargs.get('key'), 'encode'), \
+                    self._phase(timing, 'encode'):
+                p = getattr(self.encoder, 'encode_' + func_name)(*args,
+                                                                 **kwargs)
+        except VendorError as err:
+            err.timing = timing
+            raise
+
+        return self._send(route_key, func_name, p, prepared_hook,
+                          response_hook, pool_key=pool_key, timing=timing)
+
+    def _send(self, route_key, func_name, p, prepared_hook=None,
+              response_hook=None, pool_key=None, timing=None):
+        """ run the prepared hook -> request -> decode flow of prepared
+        params.
+
+        Note: response hook is skipped if response got from mounted cache
+        or shared by an identical in-flight call.
+        """
+        return self._drive(self._send_flow(
+            route_key, func_name, p, prepared_hook, response_hook, pool_key,
+            timing))
+
+    def _send_flow(self, route_key, func_name, p, prepared_hook=None,
+                   response_hook=None, pool_key=None, timing=None):
         self._run_prepared_hook(route_key, p, prepared_hook)
+        self._count(route_key, p.key, 'requests')
 
-        r = self.request.get_geo_code(p)
-        self._run_response_hook(route_key, r, response_hook)
+        content = self._get_cache(route_key, p)
+
+        if content is not None:
+            self._count(route_key, p.key, 'cache_hits')
 
-        d = self.decoder.decode_geo_code(raw_data=r.content)
+            if pool_key is not None:
+                self.key_pool.release(pool_key)
 
-        return d
+            yield self._decode(func_name, content, timing)
+            return
 
-    def regeo_code(self, *args, **kwargs):
-        return self._defaults(self._regeo_code)(*args, **kwargs)
+        flight_key = self._flight_key(route_key, p)
 
-    def _regeo_code(self, *args, **kwargs):
-        route_key = RouteKey.REGEO_CODE.value
-        prepared_hook = kwargs.pop('prepared_hook', None)
-        response_hook = kwargs.pop('response_hook', None)
+        if flight_key is None:
+            d = yield self._fetch_flow(route_key, func_name, p, response_hook,
+                                       pool_key, timing)
+            yield d
+            return
 
-        p = self.encoder.encode_regeo_code(*args, **kwargs)
+        d, shared = yield _IO(
+            self.single_flight.do, flight_key, self._fetch, route_key,
+            func_name, p, response_hook, pool_key, timing)
 
-        self._run_prepared_hook(route_key, p, prepared_hook)
-        r = self.request.get_regeo_code(p)
-        self._run_response_hook(route_key, r, response_hook)
+        if shared and pool_key is not None:
+            self.key_pool.release(pool_key)
 
-        d = self.decoder.decode_regeo_code(raw_data=r.content)
+        yield d
 
-        return d
+    def _fetch(self, route_key, func_name, p, response_hook=None,
+               pool_key=None, timing=None):
+        """ request -> decode with retries, cache the response. """
+        return self._drive(self._fetch_flow(
+            route_key, func_name, p, response_hook, pool_key, timing))
 
-    def search_text(self, *args, **kwargs):
-        return self._defaults(self._search_text)(*args, **kwargs)
+    def _fetch_flow(self, route_key, func_name, p, response_hook=None,
+                    pool_key=None, timing=None):
+        retry = self._new_retry()
 
-    def _search_text(self, *args, **kwargs):
-        route_key = RouteKey.SEARCH_TEXT.value
-        prepared_hook = kwargs.pop('prepared_hook', None)
-        response_hook = kwargs.pop('response_hook', None)
-
-        p = self.encoder.encode_search_text(*args, **kwargs)
-
-        self._run_prepared_hook(route_key, p, prepared_hook)
+        while True:
+            try:
+                with self._timer(route_key, p.key, 'request'), \
+                        self._phase(timing, 'network'):
+                    r = yield _IO(self._get, route_key, func_name, p)
+            except VendorRequestError as err:
+                self._count(route_key, p.key, 'errors')
+                delay = self._error_delay(retry, err)
+                if delay is None:
+                    err.timing = timing
+                    raise
+                self._count(route_key, p.key, 'retries')
+                yield _IO(self._sleep, delay)
+                continue
 
-        r = self.request.get_search_text(p)
-        self._run_response_hook(route_key, r, response_hook)
+            self._received(timing, r)
+            self._run_response_hook(route_key, r, response_hook)
 
-        d = self.decoder.decode_search_text(raw_data=r.content)
-        return d
+            with self._timer(route_key, p.key, 'decode'):
+                d = self._decode(func_name, r.content, timing)
 
-    def search_around(self, *args, **kwargs):
-        return self._defaults(self._search_around)(*args, **kwargs)
+            self._record_response(route_key, p.key, r, d)
+            self._report_key(pool_key, d)
 
-    def _search_around(self, *args, **kwargs):
-        route_key = RouteKey.SEARCH_AROUND.value
-        prepared_hook = kwargs.pop('prepared_hook', None)
-        response_hook = kwargs.pop('response_hook', None)
+            delay = self._status_delay(retry, d)
+            if delay is None:
+                break
+            self._count(route_key, p.key, 'retries')
+            pool_key = self._rekey(p, pool_key)
+            yield _IO(self._sleep, delay)
 
-        p = self.encoder.encode_search_around(*args, **kwargs)
-        self._run_prepared_hook(route_key, p, prepared_hook)
+        self._set_cache(route_key, p, r.content, d)
 
-        r = self.request.get_search_around(p)
-        self._run_response_hook(route_key, r, response_hook)
+        yield d
 
-        d = self.decoder.decode_search_around(raw_data=r.content)
-        return d
+    def _decode(self, func_name, content, timing=None):
+        """ decode response content, json loading and model decoding are
+        recorded separately in timing, decoder must accept `timing`. """
+        decode = getattr(self.decoder, 'decode_' + func_name)
+        kwargs = self._DECODE_KWARGS.get(func_name, {})
 
-    def suggest(self, *args, **kwargs):
-        return self._defaults(self._suggest)(*args, **kwargs)
+        if timing is None:
+            return decode(raw_data=content, **kwargs)
 
-    def _suggest(self, *args, **kwargs):
-        route_key = RouteKey.SUGGEST.value
-        prepared_hook = kwargs.pop('prepared_hook', None)
-        response_hook = kwargs.pop('response_hook', None)
+        with timing.measure('decode_total'):
+            return decode(raw_data=content, timing=timing, **kwargs)
 
-        p = self.encoder.encode_suggest(*args, **kwargs)
-        self._run_prepared_hook(route_key, p, prepared_hook)
+    def template(self, func_name, fields=('location',), **kwargs):
+        """ reusable request template of a route, constant params are
+        prepared once, only `fields` are prepared on every call.
 
-        r = self.request.get_suggest(p)
-        self._run_response_hook(route_key, r, response_hook)
+        usage:
 
-        d = self.decoder.decode_suggest(raw_data=r.content)
-        return d
+            regeo = session.template('regeo_code', radius=1000,
+                                     extensions=Extensions(True))
+            r = regeo(location=(lng, lat))  # or regeo((lng, lat))
 
-    def district(self, *args, **kwargs):
-        return self._defaults(self._district)(*args, **kwargs)
+        :param func_name: route name, e.g. 'regeo_code', 'search_around'.
+        :param fields: varying fields, must have `prepare_<field>` in
+         prepared params of route.
+        :param kwargs: constant params of route, key, private_key,
+         prepared_hook, response_hook.
+        :return: `RequestTemplate`
+        """
+        return RequestTemplate(self, func_name, fields,
+                               **self._defaults.call(dict, **kwargs))
 
-    def _district(self, *args, **kwargs):
-        route_key = RouteKey.DISTRICT.value
-        prepared_hook = kwargs.pop('prepared_hook', None)
-        response_hook = kwargs.pop('response_hook', None)
+    def geo_code(self, *args, **kwargs):
+        return self._defaults.call(self._geo_code, *args, **kwargs)
 
-        p = self.encoder.encode_district(*args, **kwargs)
-        self._run_prepared_hook(route_key, p, prepared_hook)
+    def _geo_code(self, *args, **kwargs):
+        return self._route(RouteKey.GEO_CODE.value, 'geo_code', args, kwargs)
 
-        r = self.request.get_district(p)
-        self._run_response_hook(route_key, r, response_hook)
+    def regeo_code(self, *args, **kwargs):
+        return self._defaults.call(self._regeo_code, *args, **kwargs)
 
-        d = self.decoder.decode_district(raw_data=r.content)
-        return d
+    def _regeo_code(self, *args, **kwargs):
+        return self._route(RouteKey.REGEO_CODE.value, 'regeo_code',
+                           args, kwargs)
 
-    def distance(self, *args, **kwargs):
-        return self._defaults(self._distance)(*args, **kwargs)
+    def search_text(self, *args, **kwargs):
+        return self._defaults.call(self._search_text, *args, **kwargs)
 
-    def _distance(self, *args, **kwargs):
-        route_key = RouteKey.DISTANCE.value
-        prepared_hook = kwargs.pop('prepared_hook', None)
-        response_hook = kwargs.pop('response_hook', None)
+    def _search_text(self, *args, **kwargs):
+        return self._route(RouteKey.SEARCH_TEXT.value, 'search_text',
+                           args, kwargs)
 
-        p = self.encoder.encode_distance(*args, **kwargs)
-        self._run_prepared_hook(route_key, p, prepared_hook)
+    def search_around(self, *args, **kwargs):
+        return self._defaults.call(self._search_around, *args, **kwargs)
 
-        r = self.request.get_distance(p)
-        self._run_response_hook(route_key, r, response_hook)
+    def _search_around(self, *args, **kwargs):
+        return self._route(RouteKey.SEARCH_AROUND.value, 'search_around',
+                           args, kwargs)
 
-        d = self.decoder.decode_distance(raw_data=r.content)
+    def suggest(self, *args, **kwargs):
+        return self._defaults.call(self._suggest, *args, **kwargs)
 
-        return d
+    def _suggest(self, *args, **kwargs):
+        return self._route(RouteKey.SUGGEST.value, 'suggest', args, kwargs)
 
-    def riding(self, *args, **kwargs):
-        return self._defaults(self._riding)(*args, **kwargs)
+    def district(self, *args, **kwargs):
+        return self._defaults.call(self._district, *args, **kwargs)
 
-    def _riding(self, *args, **kwargs):
-        route_key = RouteKey.NAVI_RIDING.value
-        prepared_hook = kwargs.pop('prepared_hook', None)
-        response_hook = kwargs.pop('response_hook', None)
+    def _district(self, *args, **kwargs):
+        return self._route(RouteKey.DISTRICT.value, 'district', args, kwargs)
 
-        p = self.encoder.encode_riding(*args, **kwargs)
-        self._run_prepared_hook(route_key, p, prepared_hook)
+    def distance(self, *args, **kwargs):
+        return self._defaults.call(self._distance, *args, **kwargs)
 
-        r = self.request.get_riding(p)
-        self._run_response_hook(route_key, r, response_hook)
+    def _distance(self, *args, **kwargs):
+        return self._route(RouteKey.DISTANCE.value, 'distance', args, kwargs)
 
-        d = self.decoder.decode_riding(raw_data=r.content, auto_version=True)
+    def riding(self, *args, **kwargs):
+        return self._defaults.call(self._riding, *args, **kwargs)
 
-        return d
+    def _riding(self, *args, **kwargs):
+        return self._route(RouteKey.NAVI_RIDING.value, 'riding', args, kwargs)
 
     def walking(self, *args, **kwargs):
-        return self._defaults(self._walking)(*args, **kwargs)
+        return self._defaults.call(self._walking, *args, **kwargs)
 
     def _walking(self, *args, **kwargs):
-        route_key = RouteKey.NAVI_WAKLING.value
-        prepared_hook = kwargs.pop('prepared_hook', None)
-        response_hook = kwargs.pop('response_hook', None)
-
-        p = self.encoder.encode_walking(*args, **kwargs)
-        self._run_prepared_hook(route_key, p, prepared_hook)
-
-        r = self.request.get_walking(p)
-        self._run_response_hook(route_key, r, response_hook)
-
-        d = self.decoder.decode_walking(raw_data=r.content)
-
-        return d
+        return self._route(RouteKey.NAVI_WAKLING.value, 'walking',
+                           args, kwargs)
 
     def driving(self, *args, **kwargs):
-        return self._defaults(self._driving)(*args, **kwargs)
+        return self._defaults.call(self._driving, *args, **kwargs)
 
     def _driving(self, *args, **kwargs):
-        route_key = RouteKey.NAVI_DRIVING.value
-        prepared_hook = kwargs.pop('prepared_hook', None)
-        response_hook = kwargs.pop('response_hook', None)
-
-        p = self.encoder.encode_driving(*args, **kwargs)
-        self._run_prepared_hook(route_key, p, prepared_hook)
-
-        r = self.request.get_driving(p)
-        self._run_response_hook(route_key, r, response_hook)
-
-        d = self.decoder.decode_driving(raw_data=r.content)
-
-        return d
+        return self._route(RouteKey.NAVI_DRIVING.value, 'driving',
+                           args, kwargs)
+
+    def geo_code_many(self, addresses, city=None, batch_post=True,
+                      raise_error=False, **kwargs):
+        """ bulk geo code, addresses are packed into `batch=true` geo code
+        requests of `GEO_CODE_BATCH_MAX` addresses, which are nested in
+        `/v3/batch` posts of `BATCH_MAX_OPS` ops if `batch_post` enabled.
+
+        addresses are consumed lazily, results are yielded 1:1 with inputs,
+        None if the packed request failed or its result can't be aligned.
+
+        :param addresses: iterable of address or (address, city) pairs.
+        :param city: default city of addresses.
+        :param batch_post: nest geo code requests inside batch posts.
+        :param raise_error: raise amap status error instead of yield None.
+        :param kwargs: key, private_key, prepared_hook, response_hook.
+        :return: generator of `GeoCodeData` or None.
+        """
+        return self._defaults.call(
+            self._geo_code_many, addresses, city=city, batch_post=batch_post,
+            raise_error=raise_error, **kwargs)
+
+    def _geo_code_many(self, addresses, city=None, batch_post=True,
+                       raise_error=False, **kwargs):
+        packs = self._iter_geo_code_packs(addresses, city)
+
+        if not batch_post:
+            for pack_city, pack in packs:
+                d = self._geo_code(address=pack, city=pack_city, batch=True,
+                                   **kwargs)
+                for i in self._iter_pack_result(pack, d, raise_error):
+                    yield i
+            return
+
+        for posts in chunked(packs, BATCH_MAX_OPS):
+            op_kwargs = dict(kwargs)
+            pool_key = self._acquire_key(op_kwargs, ops=len(posts))
+
+            d = self.batch(batch_list=self._geo_code_pack_ops(posts,
+                                                              op_kwargs),
+                           key=op_kwargs.get('key'),
+                           prepared_hook=kwargs.get('prepared_hook'),
+                           response_hook=kwargs.get('response_hook'))
+            self._report_key(pool_key, d, batch=True)
+
+            for i in self._iter_post_result(posts, d, raise_error):
+                yield i
+
+    @staticmethod
+    def _iter_geo_code_packs(addresses, city=None):
+        """ pack consecutive addresses of same city, yield (city, pack). """
+        pack, pack_city = [], None
+
+        for item in addresses:
+            if isinstance(item, basestring):
+                address, address_city = item, city
+            else:
+                address, address_city = item[0], item[1]
+
+            if pack and (address_city != pack_city or
+                         len(pack) >= GEO_CODE_BATCH_MAX):
+                yield pack_city, pack
+                pack = []
+
+            pack_city = address_city
+            pack.append(address)
+
+        if pack:
+            yield pack_city, pack
+
+    @staticmethod
+    def _geo_code_pack_ops(packs, kwargs):
+        return [models.GeoCodeRequestParams(
+            address=pack, city=pack_city, batch=True,
+            key=kwargs.get('key'), private_key=kwargs.get('private_key'))
+            for pack_city, pack in packs]
+
+    def regeo_code_many(self, locations, concurrency=4, raise_error=False,
+                        **kwargs):
+        """ streaming bulk regeo code, locations are packed into
+        `batch=true` regeo code requests of `REGEO_CODE_BATCH_MAX` locations,
+        at most `concurrency` requests are in flight.
+
+        locations are consumed lazily, memory is bounded by
+        `concurrency * REGEO_CODE_BATCH_MAX`, results are yielded 1:1 with
+        inputs, None if the packed request failed or its result can't be
+        aligned.
+
+        :param locations: iterable of (lng, lat) pairs or "lng,lat" strings.
+        :param concurrency: max requests in flight.
+        :param raise_error: raise amap status error instead of yield None.
+        :param kwargs: other regeo code params (radius, extensions, ...),
+         key, private_key, prepared_hook, response_hook.
+        :return: generator of `ReGeoCodeData` or None.
+        """
+        return self._defaults.call(
+            self._regeo_code_many, locations, concurrency=concurrency,
+            raise_error=raise_error, **kwargs)
+
+    def _regeo_code_many(self, locations, concurrency=4, raise_error=False,
+                         **kwargs):
+        packs = chunked(locations, REGEO_CODE_BATCH_MAX)
+        pending = deque()
+
+        def _regeo_pack(pack):
+            return self._regeo_code(location=pack, batch=True, **kwargs)
+
+        with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as executor:
+            try:
+                for pack in packs:
+                    pending.append((pack, executor.submit(_regeo_pack, pack)))
+
+                    if len(pending) < concurrency:
+                        continue
+
+                    pack, future = pending.popleft()
+                    for i in self._iter_pack_result(pack, future.result(),
+                                                    raise_error):
+                        yield i
+
+                while pending:
+                    pack, future = pending.popleft()
+                    for i in self._iter_pack_result(pack, future.result(),
+                                                    raise_error):
+                        yield i
+            finally:
+                # generator closed early, drop requests not started yet.
+                for _, future in pending:
+                    future.cancel()
+
+    @classmethod
+    def _iter_post_result(cls, posts, d, raise_error=False):
+        """ yield results of a batch post of (city, pack), aligned with
+        pack inputs. """
+        raw_ops = d.raw_ops
+
+        if raw_ops is None or len(raw_ops) != len(posts):
+            # the whole post failed, e.g. invalid key or overloaded.
+            if raise_error:
+                d.raise_for_status()
+
+            for _, pack in posts:
+                for _ in pack:
+                    yield None
+            return
+
+        for (_, pack), op_d in zip(posts, d.data):
+            for i in cls._iter_pack_result(pack, op_d, raise_error):
+                yield i
+
+    @staticmethod
+    def _iter_pack_result(pack, d, raise_error=False):
+        """ yield results of a packed request, aligned with pack inputs. """
+        if raise_error:
+            d.raise_for_status()
+
+        data = d.data if d.status == StatusFlag.OK else []
+
+        if len(data) != len(pack):
+            # amap result can't be aligned with inputs.
+            data = [None] * len(pack)
+
+        for i in data:
+            yield i
 
 
 amap_session = AMapSession(default_key=GLOBAL_CONFIG.AMAP_TEST_KEY)
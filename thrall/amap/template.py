@@ -0,0 +1,147 @@
+# coding: utf-8
+from __future__ import absolute_import
+
+from six import iteritems
+
+_PLACEHOLDER = object()
+
+
+def _required_params(cls):
+    """ names of `required_params` of request params class. """
+    return [name for klass in cls.__mro__
+            for name in getattr(vars(klass).get('__init__'),
+                                'required_params', ())]
+
+
+class RequestTemplate(object):
+    """ reusable request of a route, see `AMapSession.template`.
+
+    a prototype prepared params is built once with constant params, every
+    call copies it and only runs `prepare_<field>` of varying fields.
+
+    params keys of varying fields are looked up in `FIELD_PARAMS` of
+    prepared params, every call only regenerates those keys. If a field is
+    not listed, a key is overridden by raw params, or a varying value is
+    None, params are generated fully, so produced params are always same
+    as the normal route.
+    """
+
+    def __init__(self, session, func_name, fields, **kwargs):
+        self.session = session
+        self.func_name = func_name
+        self.fields = tuple(fields)
+        self.prepared_hook = kwargs.pop('prepared_hook', None)
+        self.response_hook = kwargs.pop('response_hook', None)
+
+        self._proto = self._prototype(func_name, kwargs)
+
+        for f in self.fields:
+            if not callable(getattr(self._proto, 'prepare_' + f, None)):
+                raise TypeError("'{}' has no field '{}'".format(
+                    type(self._proto).__name__, f))
+
+        self.route_key = self._proto.ROUTE_KEY.value
+        self._base_params = self._proto.generate_params()
+        self._getters = self._params_getters()
+
+    def __repr__(self):
+        return '{}(route={}, fields={})'.format(
+            type(self).__name__, self.func_name, list(self.fields))
+
+    def __call__(self, *args, **kwargs):
+        """ request route with varying fields, fields can be given by
+        position in `fields` order.
+
+        :return: decoded response data, coroutine in async session.
+        """
+        prepared_hook = kwargs.pop('prepared_hook', self.prepared_hook)
+        response_hook = kwargs.pop('response_hook', self.response_hook)
+
+        timing = self.session._new_timing()
+
+        with self.session._timer(self.route_key, self._proto.key,
+                                 'encode'), \
+                self.session._phase(timing, 'encode'):
+            p = self.prepare(*args, **kwargs)
+
+        pool_key = None
+
+        if self._proto.key is None and self.session.key_pool is not None:
+            pool_key = self.session.key_pool.acquire()
+            p.rekey(pool_key.key, pool_key.private_key)
+
+        return self.session._send(self.route_key, self.func_name, p,
+                                  prepared_hook, response_hook,
+                                  pool_key=pool_key, timing=timing)
+
+    def prepare(self, *args, **kwargs):
+        """ prepared params of varying fields. """
+        values = dict(zip(self.fields, args))
+        values.update(kwargs)
+
+        p = self._copy_proto()
+
+        for f, v in iteritems(values):
+            getattr(p, 'prepare_' + f)(v)
+
+        if self._getters is not None:
+            params = self._fast_params(p)
+
+            if params is not None:
+                p.__dict__['_cache'] = {'unsigned': params}
+
+        return p
+
+    def _prototype(self, func_name, kwargs):
+        """ prepared params of constant params, varying fields are empty.
+
+        required params not given (varying fields, key from key pool) pass
+        validation with a placeholder, which is dropped before prepare.
+        """
+        coder = self.session.encoder.query('encode_' + func_name)
+        missing = [name for name in _required_params(coder)
+                   if kwargs.get(name) is None]
+
+        params = coder(**dict(kwargs, **dict.fromkeys(missing, _PLACEHOLDER)))
+
+        for name in missing:
+            setattr(params, name, None)
+
+        return params.prepare()
+
+    def _copy_proto(self):
+        proto = self._proto
+        p = object.__new__(type(proto))
+        p.__dict__.update(proto.__dict__)
+        p.invalidate()
+        return p
+
+    def _params_getters(self):
+        """ (params key, prepared property) pairs of varying fields, None
+        if params must be generated fully. """
+        field_params = self._proto.FIELD_PARAMS
+        raw_params = self._proto._raw_params or {}
+        getters = []
+
+        for f in self.fields:
+            pairs = field_params.get(f)
+
+            if pairs is None or any(k in raw_params for k, _ in pairs):
+                return
+
+            getters.extend(pairs)
+
+        return tuple(getters)
+
+    def _fast_params(self, p):
+        params = dict(self._base_params)
+
+        for key, attr in self._getters:
+            v = getattr(p, attr)
+
+            if v is None:
+                return
+
+            params[key] = v
+
+        return params
@@ -2,6 +2,7 @@
 # coding: utf-8
 from __future__ import absolute_import
 
+import threading
 from contextlib import contextmanager
 
 from requests.adapters import HTTPAdapter
@@ -14,28 +15,90 @@ from requests.exceptions import (
 )
 
 from thrall.compat import basestring
+from thrall.consts import DECODE_COMPACT, DECODE_LAZY
 from thrall.exceptions import (
     VendorRequestError,
     VendorConnectionError,
     VendorHTTPError,
 )
 
+from .cache import MemoryCache
 from .hooks import SetDefault
-from .utils import builtin_names, is_func_bound, repr_params
+from .utils import builtin_names, is_func_bound, params_key, repr_params
 
 set_default = SetDefault
 
 
 class BaseRequest(object):
-    def __init__(self, session=None):
+    # `thrall.ratelimit.RateLimiter`, shared by requests.
+    rate_limiter = None
+    # `thrall.latency.AdaptiveTimeout`, shared by requests.
+    adaptive_timeout = None
+    # `thrall.breaker.CircuitBreaker`, shared by requests.
+    circuit_breaker = None
+
+    def __init__(self, session=None, pool_connections=10, pool_maxsize=50,
+                 pool_block=False, keep_alive=True, max_retries=0):
+        """
+        :param session: requests session, pool options are ignored if given.
+        :param pool_connections: number of hosts to keep connection pools.
+        :param pool_maxsize: max connections of a host pool.
+        :param pool_block: block when pool has no free connection, instead
+         of opening a connection which is discarded after use.
+        :param keep_alive: reuse connections between requests.
+        :param max_retries: retries of urllib3 on connection errors, they
+         are out of backoff, deadline and metrics of a mounted
+         `RetryPolicy`, so keep 0 with one.
+        """
+        self._pool_owner = None
+
         if not isinstance(session, Session):
-            self.session = Session()
-            self.session.mount('http://', HTTPAdapter(max_retries=1,
-                                                      pool_maxsize=50))
-            self.session.mount('http://', HTTPAdapter(max_retries=1,
-                                                      pool_maxsize=50))
+            self._own_session = True
+            self._session = self.new_session(
+                pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                pool_block=pool_block, keep_alive=keep_alive,
+                max_retries=max_retries)
         else:
-            self.session = session
+            self._own_session = False
+            self._session = session
+
+    @staticmethod
+    def new_session(pool_connections=10, pool_maxsize=50, pool_block=False,
+                    keep_alive=True, max_retries=0):
+        """ requests session with same pool settings of http and https. """
+        session = Session()
+
+        for prefix in ('http://', 'https://'):
+            session.mount(prefix, HTTPAdapter(
+                max_retries=max_retries, pool_connections=pool_connections,
+                pool_maxsize=pool_maxsize, pool_block=pool_block))
+
+        if not keep_alive:
+            session.headers['Connection'] = 'close'
+
+        return session
+
+    @property
+    def session(self):
+        if self._pool_owner is not None:
+            return self._pool_owner.session
+
+        return self._session
+
+    @property
+    def pool_shareable(self):
+        """ request can use pool of another request, its own session is
+        not given by user. """
+        return self._own_session
+
+    def share_pool(self, request):
+        """ share connection pool with other request.
+
+        :param request: pool owner, instance of `BaseRequest`.
+        """
+        if not isinstance(request, BaseRequest) or request is self:
+            raise TypeError('{} can not share pool'.format(type(request)))
+        self._pool_owner = request
 
     @set_default
     def get(self, url, params, timeout=1, callback=None, **kwargs):
@@ -57,6 +120,40 @@ class BaseRequest(object):
 
         return r
 
+    def throttle(self, route_key, key=None, ops=1):
+        """ wait for mounted rate limiter before sending ops of route. """
+        if self.rate_limiter is not None:
+            self.rate_limiter.wait(route_key, key=key, ops=ops)
+
+    @contextmanager
+    def adapt_timeout(self, route_key, kwargs, ops=1):
+        """ set `timeout` of request kwargs by mounted adaptive timeout,
+        unless given by caller, observe latency of request in context if it
+        succeeded. """
+        adaptive = self.adaptive_timeout
+
+        if adaptive is None or 'timeout' in kwargs:
+            yield
+            return
+
+        kwargs['timeout'] = adaptive.timeout(route_key, ops)
+
+        with adaptive.measure(route_key, ops):
+            yield
+
+    @contextmanager
+    def guard_circuit(self, route_key, key=None):
+        """ fail fast by mounted circuit breaker if circuit of route is
+        open, record outcome of request in context. """
+        breaker = self.circuit_breaker
+
+        if breaker is None or not breaker.is_enabled(route_key):
+            yield
+            return
+
+        with breaker.guard(route_key, key):
+            yield
+
     def _get_result(self, url, params, timeout, **kwargs):
         r = self.session.get(url, params=params, timeout=timeout, **kwargs)
         r.raise_for_status()
@@ -81,14 +178,35 @@ class BaseRequest(object):
             raise VendorRequestError(str(err), data=err)
 
 
+_compact_classes = {}
+
+
 class BaseData(object):
+    """ base data model.
+
+    decode mode `static`:
+        - False: decode properties on every access.
+        - True: decode all properties when init.
+        - 'compact': decode all properties when init and store them in
+          `__slots__` of a record subclass of the model. models above it
+          define no `__slots__`, so records still get an (empty) instance
+          `__dict__`, slots only save the per-property dict entries.
+        - 'lazy': decode property on first access, then memoize it.
+    """
     _properties = ()
+    _compact = False
+
+    def __new__(cls, unpacked_data=None, static=False, *args, **kwargs):
+        if static == DECODE_COMPACT:
+            cls = cls.compact_class()
+
+        return super(BaseData, cls).__new__(cls)
 
     def __init__(self, unpacked_data, static=False):
         self._data = unpacked_data or {}
         self._static = static
 
-        if self._static:
+        if self._static and self._static != DECODE_LAZY:
             self._static_decode()
 
     def __unicode__(self):
@@ -99,11 +217,18 @@ class BaseData(object):
 
     def __getattr__(self, name):
         try:
-            return self._decode(name)
+            value = self._decode(name)
         except KeyError:
             msg = "'{0}' object has no attribute '{1}'"
             raise AttributeError(msg.format(type(self).__name__, name))
 
+        if self._static == DECODE_LAZY:
+            # memoize as instance attribute, next access will not reach
+            # __getattr__, `_data` is untouched like static mode.
+            super(BaseData, self).__setattr__(name, value)
+
+        return value
+
     def __setattr__(self, name, value):
         super(BaseData, self).__setattr__(name, value)
 
@@ -119,7 +244,13 @@ class BaseData(object):
     def __delattr__(self, name):
         _get_attr = False
 
-        if name in self.__dict__:
+        if self._compact and name in self.__slots__:
+            try:
+                super(BaseData, self).__delattr__(name)
+                _get_attr = True
+            except AttributeError:
+                pass
+        elif name in self.__dict__:
             _get_attr = True
             del self.__dict__[name]
 
@@ -131,6 +262,31 @@ class BaseData(object):
             msg = "'{0}' object has no attribute '{1}'"
             raise AttributeError(msg.format(type(self).__name__, name))
 
+    @classmethod
+    def compact_class(cls):
+        """ `__slots__` subclass of model used by compact mode, records keep
+        same class name, methods and attributes as the model. """
+        if cls._compact:
+            return cls
+
+        try:
+            return _compact_classes[cls]
+        except KeyError:
+            pass
+
+        slots = ('_data', '_static') + tuple(
+            sorted(set(cls._properties), key=cls._properties.index))
+        compact_cls = type(cls.__name__, (cls,), {
+            '__slots__': slots,
+            '__module__': cls.__module__,
+            '__doc__': cls.__doc__,
+            '_compact': True,
+            # same as static mode, values are never written back to `_data`
+            '__setattr__': object.__setattr__,
+        })
+
+        return _compact_classes.setdefault(cls, compact_cls)
+
     def _decode(self, p):
         if p not in self._properties:
             raise KeyError(p)
@@ -239,3 +395,93 @@ class BaseDecoderAdapter(BaseAdapter):
 
     def registry_decoders(self):
         raise NotImplementedError
+
+
+class BaseCacheAdapter(object):
+    """ response cache adapter, caches raw response content by route.
+
+    cache key is made of route key and prepared params, params in
+    `IGNORED_PARAMS` (e.g. key / sig) are excluded, so responses are shared
+    between keys.
+    """
+    IGNORED_PARAMS = frozenset(('key', 'sig'))
+
+    def __init__(self, backend=None, default_ttl=300, ttls=None):
+        """ get an instance of cache adapter.
+
+        :param backend: cache backend, instance of `thrall.cache.BaseCache`,
+         default by an in-memory LRU cache.
+        :param default_ttl: default ttl seconds, None means never expired.
+        :param ttls: {route_key: ttl}, per route ttl, 0 to disable cache
+         of this route.
+        """
+        self.backend = backend if backend is not None else MemoryCache()
+        self.default_ttl = default_ttl
+        self.ttls = {getattr(k, 'value', k): v
+                     for k, v in (ttls or {}).items()}
+
+        self._lock = threading.Lock()
+        self._hits = {}
+        self._misses = {}
+
+    @property
+    def hits(self):
+        with self._lock:
+            return sum(self._hits.values())
+
+    @property
+    def misses(self):
+        with self._lock:
+            return sum(self._misses.values())
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return float(self.hits) / total if total else 0.0
+
+    def stats(self):
+        """ cache counters, include per route hits / misses. """
+        with self._lock:
+            return {
+                'hits': sum(self._hits.values()),
+                'misses': sum(self._misses.values()),
+                'size': len(self.backend),
+                'evictions': self.backend.evictions,
+                'routes': {r: {'hits': self._hits.get(r, 0),
+                               'misses': self._misses.get(r, 0)}
+                           for r in set(self._hits) | set(self._misses)},
+            }
+
+    def get_ttl(self, route_key):
+        return self.ttls.get(route_key, self.default_ttl)
+
+    def is_enabled(self, route_key):
+        return self.get_ttl(route_key) != 0
+
+    def make_key(self, route_key, params):
+        return params_key(route_key, params, self.IGNORED_PARAMS)
+
+    def get(self, route_key, p):
+        """ get cached content of prepared params, None if missed. """
+        if not self.is_enabled(route_key):
+            return
+
+        content = self.backend.get(self.make_key(route_key, p.params))
+        self._count(self._hits if content is not None else self._misses,
+                    route_key)
+
+        return content
+
+    def set(self, route_key, p, content, data=None):
+        """ cache content of prepared params if cacheable. """
+        if self.is_enabled(route_key) and self.is_cacheable(data):
+            self.backend.set(self.make_key(route_key, p.params), content,
+                             ttl=self.get_ttl(route_key))
+
+    def is_cacheable(self, data):
+        """ check decoded response data is cacheable, e.g. status ok. """
+        return True
+
+    def _count(self, counter, route_key):
+        with self._lock:
+            counter[route_key] = counter.get(route_key, 0) + 1
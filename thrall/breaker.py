@@ -0,0 +1,203 @@
+# coding: utf-8
+""" circuit breaker, fail fast on routes whose vendor endpoint is down. """
+from __future__ import absolute_import
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from .exceptions import (
+    VendorCircuitOpenError,
+    VendorConnectionError,
+    VendorHTTPError,
+)
+from .retry import http_status_of
+
+__all__ = ['CircuitBreaker']
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class _Circuit(object):
+    __slots__ = ('name', 'state', 'outcomes', 'failures', 'opened_at',
+                 'probes')
+
+    def __init__(self, name, window):
+        self.name = name
+        self.state = CLOSED
+        self.outcomes = deque(maxlen=window)
+        self.failures = 0
+        self.opened_at = None
+        self.probes = 0
+
+
+class CircuitBreaker(object):
+    """ thread safe circuit breaker of routes (and keys).
+
+    a circuit opens when `failure_rate` of its last `window` requests
+    (at least `min_requests`) failed, requests of an open circuit raise
+    `VendorCircuitOpenError` without being sent. after `open_seconds`, up to
+    `half_open_probes` trial requests are let through, the circuit closes
+    if one of them succeeds, or opens again if it fails.
+
+    failures are connection errors, timeouts and http 5xx.
+
+    usage:
+
+        session.mount('circuit_breaker', CircuitBreaker(failure_rate=0.5))
+    """
+
+    def __init__(self, failure_rate=0.5, window=50, min_requests=20,
+                 open_seconds=5.0, half_open_probes=1, by_key=False,
+                 routes=None, clock=time.time):
+        """
+        :param failure_rate: failed / requests ratio to open a circuit.
+        :param window: recent requests of a circuit to count.
+        :param min_requests: min requests in window to open a circuit.
+        :param open_seconds: seconds an open circuit fails fast.
+        :param half_open_probes: max concurrent trial requests of a half
+         open circuit.
+        :param by_key: a circuit per route and key, instead of per route.
+        :param routes: route keys to break, None for all routes.
+        :param clock: time function, for test.
+        """
+        self.failure_rate = failure_rate
+        self.window = window
+        self.min_requests = min_requests
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.by_key = by_key
+        self.routes = (None if routes is None else
+                       frozenset(getattr(r, 'value', r) for r in routes))
+        self.rejected = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._circuits = {}
+
+    def __repr__(self):
+        return 'CircuitBreaker(failure_rate={}, open_seconds={})'.format(
+            self.failure_rate, self.open_seconds)
+
+    def _name(self, route_key, key=None):
+        route_key = getattr(route_key, 'value', route_key)
+        return (route_key, key) if self.by_key else route_key
+
+    def is_enabled(self, route_key):
+        return (self.routes is None or
+                getattr(route_key, 'value', route_key) in self.routes)
+
+    def state(self, route_key, key=None):
+        circuit = self._circuits.get(self._name(route_key, key))
+        return CLOSED if circuit is None else circuit.state
+
+    def stats(self):
+        """ {circuit name: state} of circuits not closed. """
+        with self._lock:
+            return {k: c.state for k, c in self._circuits.items()
+                    if c.state != CLOSED}
+
+    def acquire(self, route_key, key=None):
+        """ let a request of route and key through.
+
+        :raise VendorCircuitOpenError: circuit is open.
+        :return: circuit of the request.
+        """
+        name = self._name(route_key, key)
+
+        with self._lock:
+            circuit = self._circuits.get(name)
+
+            if circuit is None:
+                circuit = self._circuits[name] = _Circuit(name, self.window)
+
+            if (circuit.state == OPEN and
+                    self._clock() - circuit.opened_at >= self.open_seconds):
+                circuit.state = HALF_OPEN
+                circuit.probes = 0
+
+            if circuit.state == HALF_OPEN:
+                if circuit.probes < self.half_open_probes:
+                    circuit.probes += 1
+                    return circuit
+            elif circuit.state == CLOSED:
+                return circuit
+
+            self.rejected += 1
+
+        raise VendorCircuitOpenError(
+            'circuit of {} is {}, request not sent'.format(
+                name, circuit.state), data=name)
+
+    def _open(self, circuit):
+        circuit.state = OPEN
+        circuit.opened_at = self._clock()
+        circuit.probes = 0
+
+    def _close(self, circuit):
+        circuit.state = CLOSED
+        circuit.outcomes.clear()
+        circuit.failures = 0
+        circuit.probes = 0
+
+    def record(self, circuit, success):
+        """ record outcome of a request let through. """
+        with self._lock:
+            if circuit.state == HALF_OPEN:
+                if success:
+                    self._close(circuit)
+                else:
+                    self._open(circuit)
+                return
+
+            if circuit.state == OPEN:
+                # request sent before the circuit opened.
+                return
+
+            outcomes = circuit.outcomes
+
+            if len(outcomes) == outcomes.maxlen:
+                circuit.failures -= not outcomes[0]
+
+            outcomes.append(success)
+            circuit.failures += not success
+
+            if (len(outcomes) >= self.min_requests and
+                    circuit.failures >= self.failure_rate * len(outcomes)):
+                self._open(circuit)
+
+    def release(self, circuit):
+        """ request let through ended without an outcome. """
+        with self._lock:
+            if circuit.state == HALF_OPEN and circuit.probes > 0:
+                circuit.probes -= 1
+
+    @staticmethod
+    def is_failure(err):
+        if isinstance(err, VendorConnectionError):
+            return True
+
+        if isinstance(err, VendorHTTPError):
+            status = http_status_of(err)
+            return status is None or status >= 500
+
+        return False
+
+    @contextmanager
+    def guard(self, route_key, key=None):
+        """ fail fast if circuit is open, record outcome of request in
+        context. """
+        circuit = self.acquire(route_key, key)
+
+        try:
+            yield
+        except BaseException as err:
+            if self.is_failure(err):
+                self.record(circuit, False)
+            else:
+                self.release(circuit)
+            raise
+        else:
+            self.record(circuit, True)
@@ -0,0 +1,198 @@
+# coding: utf-8
+""" response cache backends, values are raw response contents (bytes). """
+from __future__ import absolute_import
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+__all__ = ['BaseCache', 'MemoryCache', 'SQLiteCache']
+
+
+class BaseCache(object):
+    """ cache backend interface, all implementations must be thread safe. """
+
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self.evictions = 0
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def get(self, key):
+        """ get cached value, None if not found or expired. """
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None):
+        """ set value, never expired if ttl is None. """
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    @staticmethod
+    def _expire_at(ttl):
+        return time.time() + ttl if ttl is not None else None
+
+    @staticmethod
+    def _is_expired(expire_at):
+        return expire_at is not None and expire_at <= time.time()
+
+
+class MemoryCache(BaseCache):
+    """ in-memory LRU cache with ttl.
+
+    >>> c = MemoryCache(max_size=2)
+    >>> c.set('a', b'1'); c.set('b', b'2'); c.get('a') == b'1'
+    True
+    >>> c.set('c', b'3'); c.get('b') is None and len(c) == 2
+    True
+    >>> c.evictions
+    1
+    """
+
+    def __init__(self, max_size=1024):
+        super(MemoryCache, self).__init__(max_size=max_size)
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.pop(key, None)
+
+            if item is None:
+                return
+
+            if self._is_expired(item[0]):
+                return
+
+            # re-insert to mark as most recently used
+            self._data[key] = item
+            return item[1]
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (self._expire_at(ttl), value)
+
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteCache(BaseCache):
+    """ local on-disk LRU cache with ttl, stored in a sqlite database.
+
+    number of rows is counted once when opened and then tracked in memory,
+    so a database file must not be written by another process meanwhile.
+
+    >>> c = SQLiteCache(':memory:', max_size=2)
+    >>> c.set('a', b'1'); c.set('b', b'2'); c.get('a') == b'1'
+    True
+    >>> c.set('c', b'3'); c.get('b') is None and len(c) == 2
+    True
+    """
+    _TABLE = 'thrall_cache'
+
+    def __init__(self, path, max_size=100000):
+        super(SQLiteCache, self).__init__(max_size=max_size)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS {} (key TEXT PRIMARY KEY, '
+            'value BLOB, expire_at REAL, accessed INTEGER)'.format(
+                self._TABLE))
+        self._conn.execute(
+            'CREATE INDEX IF NOT EXISTS {0}_accessed ON {0} '
+            '(accessed)'.format(self._TABLE))
+        # access sequence for LRU, continue from the persisted one.
+        self._seq = self._conn.execute(
+            'SELECT MAX(accessed) FROM {}'.format(
+                self._TABLE)).fetchone()[0] or 0
+        self._size = self._conn.execute(
+            'SELECT COUNT(*) FROM {}'.format(self._TABLE)).fetchone()[0]
+
+    def _next_seq(self):
+        self._seq += 1
+        return self._seq
+
+    def __len__(self):
+        return self._size
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, expire_at FROM {} WHERE key = ?'.format(
+                    self._TABLE), (key,)).fetchone()
+
+            if row is None:
+                return
+
+            if self._is_expired(row[1]):
+                self._delete(key)
+                return
+
+            self._conn.execute(
+                'UPDATE {} SET accessed = ? WHERE key = ?'.format(
+                    self._TABLE), (self._next_seq(), key))
+            return bytes(row[0])
+
+    def set(self, key, value, ttl=None):
+        row = (sqlite3.Binary(value), self._expire_at(ttl))
+
+        with self._lock:
+            updated = self._conn.execute(
+                'UPDATE {} SET value = ?, expire_at = ?, accessed = ? '
+                'WHERE key = ?'.format(self._TABLE),
+                row + (self._next_seq(), key)).rowcount
+
+            if not updated:
+                self._conn.execute(
+                    'INSERT INTO {} VALUES (?, ?, ?, ?)'.format(self._TABLE),
+                    (key,) + row + (self._seq,))
+                self._size += 1
+                self._evict()
+
+    def _evict(self):
+        if self._size > self.max_size:
+            evicted = self._conn.execute(
+                'DELETE FROM {0} WHERE key IN (SELECT key FROM {0} '
+                'ORDER BY accessed LIMIT ?)'.format(self._TABLE),
+                (self._size - self.max_size,)).rowcount
+            self._size -= evicted
+            self.evictions += evicted
+
+    def _delete(self, key):
+        self._size -= self._conn.execute(
+            'DELETE FROM {} WHERE key = ?'.format(self._TABLE),
+            (key,)).rowcount
+
+    def delete(self, key):
+        with self._lock:
+            self._delete(key)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM {}'.format(self._TABLE))
+            self._size = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -13,6 +13,12 @@ class MapSource(IntEnum):
 FORMAT_JSON = 'json'
 FORMAT_XML = 'xml'
 
+# decode modes of data models, passed as `static` to `BaseData`.
+DECODE_DYNAMIC = False
+DECODE_STATIC = True
+DECODE_COMPACT = 'compact'
+DECODE_LAZY = 'lazy'
+
 AMAP = 'AMAP'
 QQMAP = 'QQMAP'
 BAIDUMAP = 'BDMAP'
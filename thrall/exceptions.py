@@ -7,6 +7,9 @@ from .consts import AMAP
 
 
 class VendorError(Exception):
+    # `thrall.timing.PhaseTiming` of the call raised it, if recorded.
+    timing = None
+
     def __init__(self, *args, **kwargs):
         self.data = kwargs.pop('data', None)
         super(VendorError, self).__init__(*args, **kwargs)
@@ -52,6 +55,14 @@ class VendorHTTPError(VendorRequestError):
     """raise this error if got http error"""
 
 
+class VendorKeyExhaustedError(VendorRequestError):
+    """raise this error if no usable key left in key pool"""
+
+
+class VendorCircuitOpenError(VendorRequestError):
+    """raise this error if circuit of route is open, request not sent"""
+
+
 def map_status_exception(err_msg=u'', map_source='UNKNOWN', err_code=-1,
                          data=None, exc=VendorStatusError):
     msg = u"{source}-ERROR: {err_code}-{err_msg}".format(
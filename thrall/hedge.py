@@ -0,0 +1,109 @@
+# coding: utf-8
+""" hedged requests, duplicate slow requests to cut tail latency. """
+from __future__ import absolute_import
+
+import threading
+import time
+
+from .latency import LatencyTracker
+
+__all__ = ['HedgePolicy']
+
+
+class HedgePolicy(object):
+    """ when to send a duplicate (hedge) request of a slow one.
+
+    a request not answered within the `percentile` latency of recent
+    requests of its route gets a duplicate, the first successful answer
+    wins. `AsyncAMapRequest` cancels the other, `AMapRequest` leaves it to
+    finish in its worker thread.
+
+    hedges are paid from a budget, every request adds `max_ratio` of a
+    hedge to it, up to `burst` hedges. a long healthy period can't save up
+    more than `burst` hedges, so extra load stays bounded by `max_ratio`
+    even if the vendor slows down.
+
+    usage:
+
+        policy = HedgePolicy(percentile=95, routes=['suggest', 'regeo_code'])
+        session.mount('hedge', policy)
+    """
+
+    def __init__(self, percentile=95, routes=('suggest', 'regeo_code'),
+                 max_ratio=0.05, burst=10, min_delay=0.01, max_workers=16,
+                 tracker=None, clock=time.time):
+        """
+        :param percentile: latency percentile of route to wait before
+         hedging.
+        :param routes: route keys to hedge, None for all routes.
+        :param max_ratio: max hedged requests / requests.
+        :param burst: max hedges saved up in budget.
+        :param min_delay: min seconds to wait before hedging.
+        :param max_workers: threads of a request instance sending hedged
+         requests and their duplicates, a request is sent unhedged when all
+         of them are busy.
+        :param tracker: `LatencyTracker` of routes, a new one if not given.
+        :param clock: time function, for test.
+        """
+        self.percentile = percentile
+        self.routes = (None if routes is None else
+                       frozenset(getattr(r, 'value', r) for r in routes))
+        self.max_ratio = max_ratio
+        self.burst = burst
+        self.min_delay = min_delay
+        self.max_workers = max_workers
+        self.tracker = tracker if tracker is not None else LatencyTracker()
+        self.requests = 0
+        self.hedges = 0
+        # budget in requests, a hedge costs 1 / max_ratio requests
+        self._budget = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return 'HedgePolicy(percentile={}, max_ratio={})'.format(
+            self.percentile, self.max_ratio)
+
+    def is_enabled(self, route_key):
+        return (self.routes is None or
+                getattr(route_key, 'value', route_key) in self.routes)
+
+    def start(self, route_key):
+        """ count a new request of route.
+
+        :return: seconds to wait before hedging it, None if latency of route
+         is unknown yet.
+        """
+        with self._lock:
+            self.requests += 1
+
+            if self.max_ratio > 0:
+                self._budget = min(self._budget + 1,
+                                   self.burst / float(self.max_ratio))
+
+        delay = self.tracker.percentile(route_key, self.percentile)
+        return None if delay is None else max(delay, self.min_delay)
+
+    def try_hedge(self):
+        """ take a hedge from budget, False if it's used up. """
+        with self._lock:
+            if self.max_ratio <= 0:
+                return False
+
+            cost = 1 / float(self.max_ratio)
+
+            if self._budget < cost:
+                return False
+
+            self._budget -= cost
+            self.hedges += 1
+            return True
+
+    def timed(self, route_key, fn, *args, **kwargs):
+        """ call fn, observe its latency of route. """
+        start = self._clock()
+
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.tracker.observe(route_key, self._clock() - start)
@@ -18,52 +18,92 @@ except ImportError:
 __all__ = ['SetDefault']
 
 
-class _SetDefault(object):
+class _DefaultKwargs(object):
+    """ default kwargs shared by hooks.
+
+    defaults are kept in an immutable tuple, `set_default` swaps it at
+    once, so concurrent calls always see a complete snapshot.
+    """
+
+    def _init_default_kwargs(self, kwargs):
+        self._default_items = tuple(iteritems(kwargs))
+
+    @property
+    def default_kwargs(self):
+        return dict(self._default_items)
+
+    def set_default(self, **kwargs):
+        default_kwargs = self.default_kwargs
+        default_kwargs.update(kwargs)
+        self._default_items = tuple(iteritems(default_kwargs))
+
+    def _fill_defaults(self, kwargs):
+        for k, v in self._default_items:
+            if k not in kwargs:
+                kwargs[k] = v
+        return kwargs
+
+
+class _BoundSetDefault(object):
+    """ `_SetDefault` bound to an instance, like a bound method. """
+    __slots__ = ('_hook', '__self__')
+
+    def __init__(self, hook, instance):
+        self._hook = hook
+        self.__self__ = instance
+
+    def __call__(self, *args, **kwargs):
+        hook = self._hook
+        return hook.func(self.__self__, *args,
+                         **hook._fill_defaults(kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self._hook, name)
+
+
+class _SetDefault(_DefaultKwargs):
     def __init__(self, func):
         self.func = func
-        self.default_kwargs = {}
+        self._init_default_kwargs({})
 
-        self._own_instance = None
         update_wrapper(self, func)
 
         if is_func_bound(func):
             self.__self__ = func.__self__
 
     def __call__(self, *args, **kwargs):
-        for k, v in iteritems(self.default_kwargs):
-            if k not in kwargs:
-                kwargs[k] = v
-        if self._own_instance:
-            return self.func(self._own_instance, *args, **kwargs)
-        else:
-            return self.func(*args, **kwargs)
+        return self.func(*args, **self._fill_defaults(kwargs))
 
     def __get__(self, instance, owner):
-        self._own_instance = instance
-        return self
+        if instance is None:
+            return self
 
-    def set_default(self, **kwargs):
-        for k, v in iteritems(kwargs):
-            self.default_kwargs[k] = v
+        bound = _BoundSetDefault(self, instance)
+
+        # cache bound hook in instance, next access will not reach here.
+        try:
+            if getattr(owner, self.__name__, None) is self:
+                instance.__dict__[self.__name__] = bound
+        except AttributeError:
+            pass
+
+        return bound
 
 
-class _SetDefaultWithParams(object):
+class _SetDefaultWithParams(_DefaultKwargs):
     def __init__(self, **kwargs):
-        self.default_kwargs = kwargs
+        self._init_default_kwargs(kwargs)
 
     def __call__(self, fn):
         @wraps(fn)
         def __wrapper(*args, **kwargs):
-            for k, v in iteritems(self.default_kwargs):
-                if k not in kwargs:
-                    kwargs[k] = v
-            return fn(*args, **kwargs)
+            return fn(*args, **self._fill_defaults(kwargs))
 
         return __wrapper
 
-    def set_default(self, **kwargs):
-        for k, v in iteritems(kwargs):
-            self.default_kwargs[k] = v
+    def call(self, fn, *args, **kwargs):
+        """ call fn with default kwargs directly, without a wrapper. """
+        return fn(*args, **self._fill_defaults(kwargs))
 
 
 class SetD(_SetDefault, _SetDefaultWithParams):
@@ -81,6 +121,11 @@ class SetD(_SetDefault, _SetDefaultWithParams):
         else:
             return _SetDefaultWithParams.__call__(self, args[0])
 
+    def __get__(self, instance, owner):
+        if not self._d:
+            return self
+        return _SetDefault.__get__(self, instance, owner)
+
     @staticmethod
     def is_func_direct(args):
         if args and callable(args[0]):
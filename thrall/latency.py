@@ -0,0 +1,141 @@
+# coding: utf-8
+""" rolling latency samples of routes, and timeouts adapted to them. """
+from __future__ import absolute_import
+
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+__all__ = ['LatencyTracker', 'AdaptiveTimeout']
+
+
+class LatencyTracker(object):
+    """ thread safe tracker of the last `window` latencies of every route.
+
+    >>> tracker = LatencyTracker(window=10, min_samples=1)
+    >>> for i in range(1, 11):
+    ...     tracker.observe('geo_code', i / 10.0)
+    >>> tracker.percentile('geo_code', 50), tracker.percentile('geo_code', 95)
+    (0.5, 1.0)
+    """
+
+    def __init__(self, window=200, min_samples=20):
+        """
+        :param window: samples kept of every route.
+        :param min_samples: samples needed before percentiles are known.
+        """
+        self.window = window
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        self._samples = {}
+
+    @staticmethod
+    def _route_value(route_key):
+        return getattr(route_key, 'value', route_key)
+
+    def observe(self, route_key, seconds):
+        route_key = self._route_value(route_key)
+
+        with self._lock:
+            samples = self._samples.get(route_key)
+
+            if samples is None:
+                samples = self._samples[route_key] = deque(
+                    maxlen=self.window)
+
+            samples.append(seconds)
+
+    def count(self, route_key):
+        return len(self._samples.get(self._route_value(route_key), ()))
+
+    def percentile(self, route_key, q):
+        """ nearest rank percentile of route latency.
+
+        :param q: percentile, 0 - 100.
+        :return: seconds, None if samples are not enough.
+        """
+        with self._lock:
+            samples = sorted(
+                self._samples.get(self._route_value(route_key), ()))
+
+        if not samples or len(samples) < self.min_samples:
+            return
+
+        rank = int(math.ceil(q / 100.0 * len(samples)))
+        return samples[min(max(rank, 1), len(samples)) - 1]
+
+
+class AdaptiveTimeout(object):
+    """ (connect, read) timeouts of requests, read timeout follows the
+    `percentile` latency of recent requests of route.
+
+    a batch post of N ops is expected to take `1 + op_scale * (N - 1)`
+    times of a single op, its latency is observed per single op, so posts
+    of any size share the samples.
+
+    >>> adaptive = AdaptiveTimeout(tracker=LatencyTracker(min_samples=1))
+    >>> adaptive.timeout('district'), adaptive.timeout('batch', ops=20)
+    ((0.5, 1.0), (0.5, 2.9))
+    >>> adaptive.observe('district', 2.0)
+    >>> adaptive.timeout('district')
+    (0.5, 3.0)
+    """
+
+    def __init__(self, percentile=99, multiplier=1.5, connect_timeout=0.5,
+                 default_timeout=1.0, min_timeout=0.2, max_timeout=10.0,
+                 op_scale=0.1, tracker=None, clock=time.time):
+        """
+        :param percentile: latency percentile of route read timeout follows.
+        :param multiplier: read timeout / latency percentile.
+        :param connect_timeout: seconds to connect.
+        :param default_timeout: read timeout of a single op before latency of
+         route is known.
+        :param min_timeout: min read timeout.
+        :param max_timeout: max read timeout.
+        :param op_scale: extra time of every op but the first in a batch
+         post, as a ratio of a single op.
+        :param tracker: `LatencyTracker` of routes, a new one if not given.
+        :param clock: time function, for test.
+        """
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.connect_timeout = connect_timeout
+        self.default_timeout = default_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.op_scale = op_scale
+        self.tracker = tracker if tracker is not None else LatencyTracker()
+        self._clock = clock
+
+    def __repr__(self):
+        return 'AdaptiveTimeout(percentile={}, multiplier={})'.format(
+            self.percentile, self.multiplier)
+
+    def _scale(self, ops):
+        return 1 + self.op_scale * (max(ops, 1) - 1)
+
+    def timeout(self, route_key, ops=1):
+        """ (connect, read) timeout of a request of route. """
+        latency = self.tracker.percentile(route_key, self.percentile)
+        read = (self.default_timeout if latency is None
+                else latency * self.multiplier)
+        read = min(max(read * self._scale(ops), self.min_timeout),
+                   self.max_timeout)
+        return self.connect_timeout, round(read, 3)
+
+    def observe(self, route_key, seconds, ops=1):
+        self.tracker.observe(route_key, seconds / self._scale(ops))
+
+    @contextmanager
+    def measure(self, route_key, ops=1):
+        """ observe latency of the request in context if it succeeded.
+
+        failed ones are censored, a timed out request only tells its latency
+        is above the read timeout, observing it at the timeout would raise
+        the next timeout by `multiplier` on every round of hung requests.
+        """
+        start = self._clock()
+        yield
+        self.observe(route_key, self._clock() - start, ops)
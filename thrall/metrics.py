@@ -0,0 +1,266 @@
+# coding: utf-8
+""" metrics of routes and keys, exported as dict or prometheus text. """
+from __future__ import absolute_import
+
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from six.moves import BaseHTTPServer
+
+__all__ = ['MetricsCollector', 'mask_key']
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+COUNTERS = ('requests', 'errors', 'retries', 'cache_hits', 'bytes')
+
+
+def mask_key(key):
+    """ key label of metrics, only last 4 chars are kept.
+
+    >>> mask_key('0123456789abcdef')
+    '***cdef'
+    """
+    if not key:
+        return ''
+
+    return '***' + key[-4:]
+
+
+def _escape(value):
+    return (str(value).replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n'))
+
+
+def _labels(**labels):
+    return '{' + ','.join('{}="{}"'.format(k, _escape(v))
+                          for k, v in sorted(labels.items())) + '}'
+
+
+class _Histogram(object):
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self, size):
+        # last slot is +Inf
+        self.counts = [0] * (size + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def cumulative(self, buckets):
+        total, result = 0, []
+
+        for le, n in zip(list(buckets) + ['+Inf'], self.counts):
+            total += n
+            result.append((le, total))
+
+        return result
+
+
+class _Series(object):
+    __slots__ = ('counters', 'infocodes', 'latency')
+
+    def __init__(self):
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.infocodes = {}
+        self.latency = {}
+
+
+class _Timer(object):
+    __slots__ = ('metrics', 'labels', 'phase', 'start')
+
+    def __init__(self, metrics, labels, phase):
+        self.metrics = metrics
+        self.labels = labels
+        self.phase = phase
+
+    def __enter__(self):
+        self.start = self.metrics._clock()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.metrics._observe(self.labels, self.phase,
+                              self.metrics._clock() - self.start)
+
+
+class MetricsCollector(object):
+    """ thread safe metrics of routes and keys.
+
+    per route and key: requests, errors, retries, cache hits, response
+    bytes, infocodes and latency histograms of phases (encode, request,
+    decode).
+
+    usage:
+
+        metrics = MetricsCollector()
+        session.mount('metrics', metrics)
+        metrics.snapshot()
+        metrics.write('/var/lib/node_exporter/thrall.prom')
+        metrics.serve(9108)
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, key_label=mask_key,
+                 prefix='thrall', clock=time.time):
+        """
+        :param buckets: upper bounds (seconds) of latency histograms.
+        :param key_label: function of key label, None to not label by key.
+        :param prefix: prefix of prometheus metric names.
+        :param clock: time function, for test.
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.key_label = key_label
+        self.prefix = prefix
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def __repr__(self):
+        return 'MetricsCollector(series={})'.format(len(self._series))
+
+    def _labels(self, route_key, key):
+        return (getattr(route_key, 'value', route_key),
+                self.key_label(key) if self.key_label is not None else '')
+
+    def _get_series(self, labels):
+        series = self._series.get(labels)
+
+        if series is None:
+            series = self._series[labels] = _Series()
+
+        return series
+
+    def inc(self, route_key, key, name, n=1):
+        """ increase counter of route and key, see `COUNTERS`. """
+        labels = self._labels(route_key, key)
+
+        with self._lock:
+            self._get_series(labels).counters[name] += n
+
+    def infocode(self, route_key, key, code):
+        labels = self._labels(route_key, key)
+
+        with self._lock:
+            codes = self._get_series(labels).infocodes
+            codes[code] = codes.get(code, 0) + 1
+
+    def observe(self, route_key, key, phase, seconds):
+        self._observe(self._labels(route_key, key), phase, seconds)
+
+    def _observe(self, labels, phase, seconds):
+        index = bisect_left(self.buckets, seconds)
+
+        with self._lock:
+            latency = self._get_series(labels).latency
+            hist = latency.get(phase)
+
+            if hist is None:
+                hist = latency[phase] = _Histogram(len(self.buckets))
+
+            hist.counts[index] += 1
+            hist.sum += seconds
+            hist.count += 1
+
+    def timer(self, route_key, key, phase):
+        """ context manager observes latency of phase. """
+        return _Timer(self, self._labels(route_key, key), phase)
+
+    def reset(self):
+        with self._lock:
+            self._series = {}
+
+    def snapshot(self):
+        """ {route: {key label: metrics}} """
+        result = {}
+
+        with self._lock:
+            for (route, key), series in self._series.items():
+                item = dict(series.counters)
+                item['infocodes'] = dict(series.infocodes)
+                item['latency'] = {
+                    phase: {'count': h.count, 'sum': h.sum,
+                            'buckets': h.cumulative(self.buckets)}
+                    for phase, h in series.latency.items()}
+                result.setdefault(route, {})[key] = item
+
+        return result
+
+    def prometheus(self):
+        """ metrics in prometheus text exposition format. """
+        snapshot = self.snapshot()
+        series = sorted((route, key, item)
+                        for route, keys in snapshot.items()
+                        for key, item in keys.items())
+        lines = []
+
+        for name in COUNTERS:
+            metric = '{}_{}_total'.format(self.prefix, name)
+            lines.append('# TYPE {} counter'.format(metric))
+            lines.extend('{}{} {}'.format(
+                metric, _labels(route=route, key=key), item[name])
+                for route, key, item in series)
+
+        metric = '{}_infocodes_total'.format(self.prefix)
+        lines.append('# TYPE {} counter'.format(metric))
+
+        for route, key, item in series:
+            for code, n in sorted(item['infocodes'].items()):
+                lines.append('{}{} {}'.format(metric, _labels(
+                    route=route, key=key, infocode=code), n))
+
+        metric = '{}_latency_seconds'.format(self.prefix)
+        lines.append('# TYPE {} histogram'.format(metric))
+
+        for route, key, item in series:
+            for phase, h in sorted(item['latency'].items()):
+                for le, n in h['buckets']:
+                    lines.append('{}_bucket{} {}'.format(metric, _labels(
+                        route=route, key=key, phase=phase, le=le), n))
+
+                labels = _labels(route=route, key=key, phase=phase)
+                lines.append('{}_sum{} {}'.format(metric, labels, h['sum']))
+                lines.append('{}_count{} {}'.format(metric, labels,
+                                                    h['count']))
+
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """ write prometheus text into file, e.g. for node exporter textfile
+        collector, replaced atomically. """
+        tmp = '{}.{}.tmp'.format(path, os.getpid())
+
+        with open(tmp, 'w') as f:
+            f.write(self.prometheus())
+
+        os.rename(tmp, path)
+
+    def serve(self, port, host='127.0.0.1'):
+        """ serve prometheus text on http://host:port/metrics in a daemon
+        thread.
+
+        :return: http server, call `shutdown()` to stop it.
+        """
+        metrics = self
+
+        class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+
+                body = metrics.prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type',
+                                 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = BaseHTTPServer.HTTPServer((host, port), Handler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return server
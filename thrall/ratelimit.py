@@ -0,0 +1,149 @@
+# coding: utf-8
+""" client side rate limiters, smooth requests to just under vendor qps. """
+from __future__ import absolute_import
+
+import threading
+import time
+
+__all__ = ['TokenBucket', 'RateLimiter']
+
+
+class TokenBucket(object):
+    """ thread safe token bucket.
+
+    tokens are reserved in order, bucket may go into debt, the caller
+    waits the returned delay before sending, so concurrent callers are
+    spread evenly instead of retrying in a loop.
+
+    >>> clock = lambda: 0
+    >>> b = TokenBucket(rate=10, capacity=2, clock=clock)
+    >>> b.reserve(), b.reserve(), b.reserve(), b.reserve(2)
+    (0, 0, 0.1, 0.3)
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.time):
+        """
+        :param rate: tokens added per second.
+        :param capacity: max burst tokens, default 1 (no burst).
+        :param clock: time function, for test.
+        """
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else 1)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return 'TokenBucket(rate={}, capacity={})'.format(self.rate,
+                                                          self.capacity)
+
+    def reserve(self, n=1):
+        """ take n tokens.
+
+        :return: seconds to wait before the tokens are usable.
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                self.capacity,
+                self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= n
+
+            if self._tokens >= 0:
+                return 0
+
+            return round(-self._tokens / self.rate, 9)
+
+
+class RateLimiter(object):
+    """ rate limiter of routes and keys, shared by requests and threads.
+
+    every request takes tokens from the bucket of its route and the bucket
+    of its key, a batch post takes N tokens (one per op) from the batch
+    route bucket and key bucket.
+
+    usage:
+
+        limiter = RateLimiter(route_rates={RouteKey.REGEO_CODE: 100},
+                              key_rate=50)
+        session.mount('rate_limiter', limiter)
+    """
+
+    def __init__(self, route_rates=None, key_rate=None, default_rate=None,
+                 burst=None, clock=time.time):
+        """
+        :param route_rates: {route_key: qps}, route key can be `RouteKey`
+         or its value.
+        :param key_rate: qps of every key.
+        :param default_rate: qps of routes not in `route_rates`, None for
+         unlimited.
+        :param burst: max burst tokens of every bucket, default 1.
+        :param clock: time function, for test.
+        """
+        self.key_rate = key_rate
+        self.default_rate = default_rate
+        self.burst = burst
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._route_buckets = {
+            self._route_value(k): self._new_bucket(v)
+            for k, v in (route_rates or {}).items()}
+        self._key_buckets = {}
+
+    @staticmethod
+    def _route_value(route_key):
+        return getattr(route_key, 'value', route_key)
+
+    def _new_bucket(self, rate):
+        return TokenBucket(rate, capacity=self.burst, clock=self._clock)
+
+    def _get_bucket(self, buckets, name, rate):
+        bucket = buckets.get(name)
+
+        if bucket is None and rate is not None:
+            with self._lock:
+                bucket = buckets.get(name)
+
+                if bucket is None:
+                    bucket = buckets[name] = self._new_bucket(rate)
+
+        return bucket
+
+    def reserve(self, route_key, key=None, ops=1):
+        """ reserve tokens of route and key.
+
+        :return: seconds to wait before sending.
+        """
+        delay = 0
+        route_bucket = self._get_bucket(self._route_buckets,
+                                        self._route_value(route_key),
+                                        self.default_rate)
+
+        if route_bucket is not None:
+            delay = route_bucket.reserve(ops)
+
+        if key is not None:
+            key_bucket = self._get_bucket(self._key_buckets, key,
+                                          self.key_rate)
+
+            if key_bucket is not None:
+                delay = max(delay, key_bucket.reserve(ops))
+
+        return delay
+
+    def wait(self, route_key, key=None, ops=1):
+        """ block until request of route and key can be sent.
+
+        :return: seconds waited.
+        """
+        delay = self.reserve(route_key, key=key, ops=ops)
+
+        if delay > 0:
+            time.sleep(delay)
+
+        return delay
@@ -0,0 +1,128 @@
+# coding: utf-8
+""" retry policy with exponential backoff, jitter and deadline. """
+from __future__ import absolute_import
+
+import random
+import time
+
+from .exceptions import VendorConnectionError, VendorHTTPError
+
+__all__ = ['RetryPolicy', 'RetryState']
+
+
+def http_status_of(err):
+    """ http status code of `VendorHTTPError`, None if unknown. """
+    data = err.data
+    # requests.HTTPError, aiohttp.ClientResponseError or a response
+    for obj in (getattr(data, 'response', None), data):
+        for attr in ('status_code', 'status'):
+            status = getattr(obj, attr, None)
+
+            if status is not None:
+                return status
+
+
+class RetryPolicy(object):
+    """ which failures to retry and how long to wait between attempts.
+
+    retried failures:
+        - `VendorConnectionError` (connection error, timeout).
+        - `VendorHTTPError` of status in `retry_http_status` (5xx).
+        - responses of infocode in `retry_infocodes`.
+
+    the n-th retry waits `uniform(0, min(max_backoff, backoff * 2 ** n))`
+    (full jitter), or the upper bound if jitter disabled. no retry is made
+    if it can't be started within `deadline` seconds since first attempt.
+
+    >>> policy = RetryPolicy(backoff=0.1, max_backoff=0.3, jitter=False)
+    >>> [policy.backoff_delay(i) for i in range(4)]
+    [0.1, 0.2, 0.3, 0.3]
+    """
+
+    def __init__(self, max_retries=3, backoff=0.1, max_backoff=2.0,
+                 jitter=True, deadline=None, retry_infocodes=(),
+                 retry_http_status=tuple(range(500, 600)),
+                 clock=time.time):
+        """
+        :param max_retries: max retries of a call.
+        :param backoff: base backoff seconds.
+        :param max_backoff: max backoff seconds of one retry.
+        :param jitter: randomize backoff.
+        :param deadline: total seconds budget of a call, None for unlimited.
+        :param retry_infocodes: vendor infocodes to retry, e.g.
+         `thrall.amap.consts.QPS_LIMIT_INFOCODES`.
+        :param retry_http_status: http status codes to retry.
+        :param clock: time function, for test.
+        """
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.deadline = deadline
+        self.retry_infocodes = frozenset(retry_infocodes)
+        self.retry_http_status = frozenset(retry_http_status)
+        self._clock = clock
+
+    def __repr__(self):
+        return 'RetryPolicy(max_retries={}, backoff={}, deadline={})'.format(
+            self.max_retries, self.backoff, self.deadline)
+
+    def new_state(self):
+        """ retry state of a call, start its deadline now. """
+        return RetryState(self)
+
+    def backoff_delay(self, retries):
+        delay = min(self.max_backoff, self.backoff * (2 ** retries))
+        return random.uniform(0, delay) if self.jitter else delay
+
+    def is_retryable_error(self, err):
+        if isinstance(err, VendorConnectionError):
+            return True
+
+        if isinstance(err, VendorHTTPError):
+            return http_status_of(err) in self.retry_http_status
+
+        return False
+
+    def is_retryable_code(self, code):
+        return code in self.retry_infocodes
+
+    def is_retryable_status(self, status):
+        return status in self.retry_http_status
+
+
+class RetryState(object):
+    """ retries made by a call, not thread safe. """
+    __slots__ = ('policy', 'retries', 'start')
+
+    def __init__(self, policy):
+        self.policy = policy
+        self.retries = 0
+        self.start = policy._clock()
+
+    def next_delay(self, err=None, code=None, retryable=None):
+        """ backoff before next retry of a failure.
+
+        :param err: raised error.
+        :param code: vendor infocode of response.
+        :param retryable: failure is retryable, checked by err or code if
+         not given.
+        :return: seconds to wait, None if failure shouldn't be retried.
+        """
+        policy = self.policy
+
+        if retryable is None:
+            retryable = (policy.is_retryable_error(err) if err is not None
+                         else policy.is_retryable_code(code))
+
+        if not retryable or self.retries >= policy.max_retries:
+            return
+
+        delay = policy.backoff_delay(self.retries)
+
+        if (policy.deadline is not None and
+                policy._clock() + delay - self.start > policy.deadline):
+            return
+
+        self.retries += 1
+        return delay
@@ -0,0 +1,98 @@
+# coding: utf-8
+""" coalesce concurrent identical calls into one in-flight call. """
+from __future__ import absolute_import
+
+import threading
+
+from .utils import params_key
+
+__all__ = ['SingleFlight']
+
+
+class _Call(object):
+    __slots__ = ('event', 'value', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """ thread safe single flight group.
+
+    while a call of key is in flight, callers of the same key wait for it
+    and share its result (or error) instead of calling again.
+
+    >>> group = SingleFlight()
+    >>> group.do('a', lambda: 1)
+    (1, False)
+    """
+    IGNORED_PARAMS = frozenset(('key', 'sig'))
+
+    def __init__(self, routes=None):
+        """
+        :param routes: route keys to coalesce, None for all routes.
+        """
+        self.routes = (None if routes is None else
+                       frozenset(getattr(r, 'value', r) for r in routes))
+        self.shared = 0
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def __len__(self):
+        """ number of calls in flight. """
+        return len(self._calls)
+
+    def is_enabled(self, route_key):
+        return self.routes is None or route_key in self.routes
+
+    def make_key(self, route_key, params):
+        """ calls of same route and params (except key / sig) are
+        identical. """
+        return params_key(route_key, params, self.IGNORED_PARAMS)
+
+    def _join(self, key):
+        """ get call in flight of key, or start a new one.
+
+        :return: (call, is_leader)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+
+            if call is not None:
+                self.shared += 1
+                return call, False
+
+            call = self._calls[key] = _Call()
+            return call, True
+
+    def _leave(self, key):
+        with self._lock:
+            self._calls.pop(key, None)
+
+    def do(self, key, fn, *args, **kwargs):
+        """ call fn, or wait for the in-flight call of same key.
+
+        :return: (value, shared), shared is True if value was got by another
+         caller.
+        """
+        call, leader = self._join(key)
+
+        if not leader:
+            call.event.wait()
+
+            if call.error is not None:
+                raise call.error
+            return call.value, True
+
+        try:
+            call.value = fn(*args, **kwargs)
+        except BaseException as err:
+            call.error = err
+            raise
+        finally:
+            self._leave(key)
+            call.event.set()
+
+        return call.value, False
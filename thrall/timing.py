@@ -0,0 +1,94 @@
+# coding: utf-8
+""" phase timing record of a call. """
+from __future__ import absolute_import
+
+import time
+
+__all__ = ['PhaseTiming']
+
+now = getattr(time, 'perf_counter', time.time)
+
+
+class _NullTimer(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+NULL_TIMER = _NullTimer()
+
+
+class _PhaseTimer(object):
+    __slots__ = ('timing', 'phase', 'start')
+
+    def __init__(self, timing, phase):
+        self.timing = timing
+        self.phase = phase
+
+    def __enter__(self):
+        self.start = now()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        timing, phase = self.timing, self.phase
+        setattr(timing, phase, getattr(timing, phase) + now() - self.start)
+
+
+class PhaseTiming(object):
+    """ seconds spent in phases of a call, summed over retries.
+
+    - encode: params encoding.
+    - network: requests, include rate limiter waits, hedges and batch
+      dispatch waits.
+    - parse: json loading of responses.
+    - decode: decoding of data models, parse excluded.
+    - bytes_received / responses: size and number of responses received.
+
+    >>> timing = PhaseTiming()
+    >>> timing.decode_total, timing.parse = 0.3, 0.1
+    >>> round(timing.decode, 3)
+    0.2
+    """
+    __slots__ = ('encode', 'network', 'parse', 'decode_total',
+                 'bytes_received', 'responses')
+
+    def __init__(self):
+        self.encode = 0.0
+        self.network = 0.0
+        self.parse = 0.0
+        self.decode_total = 0.0
+        self.bytes_received = 0
+        self.responses = 0
+
+    def __repr__(self):
+        return ('PhaseTiming(encode={:.6f}, network={:.6f}, parse={:.6f}, '
+                'decode={:.6f}, bytes_received={}, responses={})'.format(
+                    self.encode, self.network, self.parse, self.decode,
+                    self.bytes_received, self.responses))
+
+    @property
+    def decode(self):
+        return max(self.decode_total - self.parse, 0.0)
+
+    @property
+    def total(self):
+        return self.encode + self.network + self.decode_total
+
+    def measure(self, phase):
+        """ context manager adds elapsed seconds to phase. """
+        return _PhaseTimer(self, phase)
+
+    def received(self, content):
+        """ count a response received. """
+        self.responses += 1
+        self.bytes_received += len(content)
+
+    def as_dict(self):
+        return {'encode': self.encode, 'network': self.network,
+                'parse': self.parse, 'decode': self.decode,
+                'bytes_received': self.bytes_received,
+                'responses': self.responses}
@@ -1,6 +1,9 @@
 # coding: utf-8
 import functools
+import inspect
 import re
+import threading
+from contextlib import contextmanager
 from operator import itemgetter
 
 from future.utils import python_2_unicode_compatible, as_native_str
@@ -14,6 +17,95 @@ builtin_names = frozenset(
 )
 
 
+class _ParamsValidation(object):
+    """ switch of `required_params` and `check_params_type`, `enable` and
+    `disable` are global, `skip` only affects current thread. """
+
+    def __init__(self):
+        self._enabled = True
+        self._local = threading.local()
+
+    @property
+    def enabled(self):
+        return self._enabled and not getattr(self._local, 'skipped', 0)
+
+    def enable(self):
+        self._enabled = True
+
+    def disable(self):
+        self._enabled = False
+
+    @contextmanager
+    def skip(self):
+        """ skip params validation of current thread in trusted hot paths,
+        can be nested. """
+        local = self._local
+        local.skipped = getattr(local, 'skipped', 0) + 1
+        try:
+            yield
+        finally:
+            local.skipped -= 1
+
+
+params_validation = _ParamsValidation()
+
+_MISSING = object()
+
+
+class _ParamsSpec(object):
+    """ function params resolved once at decoration time, used to lookup
+    call values like `inspect.getcallargs` without binding all params.
+
+    >>> spec = _ParamsSpec(lambda a, b=2, **kwargs: None)
+    >>> spec.value('a', (1,), {}), spec.value('b', (1,), {})
+    (1, 2)
+    >>> spec.value('c', (1,), {'c': 3}), spec.value('d', (1,), {})
+    (3, None)
+    >>> spec.value('a', (), {}) is _MISSING
+    True
+    """
+    __slots__ = ('positions', 'defaults', 'kw_only', 'kwargs_name')
+
+    def __init__(self, fn):
+        if hasattr(inspect, 'getfullargspec'):
+            spec = inspect.getfullargspec(fn)
+            kw_only = spec.kwonlyargs
+            kw_only_defaults = spec.kwonlydefaults or {}
+            var_kw = spec.varkw
+        else:  # pragma: no cover
+            spec = inspect.getargspec(fn)
+            kw_only, kw_only_defaults = [], {}
+            var_kw = spec.keywords
+
+        defaults = spec.defaults or ()
+
+        self.positions = dict((n, i) for i, n in enumerate(spec.args))
+        self.defaults = dict(zip(spec.args[len(spec.args) - len(defaults):],
+                                 defaults))
+        self.defaults.update(kw_only_defaults)
+        self.kw_only = frozenset(kw_only)
+        # same as `inspect.getcallargs(...).get('kwargs')`
+        self.kwargs_name = var_kw if var_kw == 'kwargs' else None
+
+    def is_named(self, name):
+        return name in self.positions or name in self.kw_only
+
+    def value(self, name, args, kwargs):
+        """ param value of call, `_MISSING` if named param is not given. """
+        i = self.positions.get(name)
+
+        if i is not None and i < len(args):
+            return args[i]
+
+        if i is not None or name in self.kw_only:
+            if name in kwargs:
+                return kwargs[name]
+            return self.defaults.get(name, _MISSING)
+
+        if self.kwargs_name:
+            return kwargs.get(name)
+
+
 def required_params(*params):
     """ decorator to check functions params required, exception raised if
     checked param is None.
@@ -21,31 +113,27 @@ def required_params(*params):
     :param params: checked params
     :type params: list params
     """
-    import inspect
-
-    _empty_dict = {}
 
     def _required_params(fn):
-
-        def __check_param(param, arg2value, kw):
-            if arg2value.get(param) is not None:
-                return
-            elif kw.get(param) is not None:
-                return
-            else:
-                raise RuntimeError(
-                    "Required param '{}' not found".format(param))
+        spec = _ParamsSpec(fn)
 
         @functools.wraps(fn)
         def __wrapper(*args, **kwargs):
-            d = inspect.getcallargs(fn, *args, **kwargs)
-            kw = d.get('kwargs', _empty_dict)
+            if params_validation.enabled:
+                for p in params:
+                    v = spec.value(p, args, kwargs)
+
+                    if v is _MISSING:
+                        # missing positional param, raise TypeError by call
+                        break
 
-            for p in params:
-                __check_param(p, d, kw)
+                    if v is None:
+                        raise RuntimeError(
+                            "Required param '{}' not found".format(p))
 
             return fn(*args, **kwargs)
 
+        __wrapper.required_params = params
         return __wrapper
 
     return _required_params
@@ -59,37 +147,29 @@ def check_params_type(enforce=False, **types):
     :param types: checked param and typed
     :type types: dict params
     """
-    import inspect
 
     def _check_params_type(fn):
-        def __enforce_check_type(key, type_list, arg2value, kw):
-            if key not in arg2value:
-                v = kw.get(key)
-            else:
-                v = arg2value.get(key)
-
-            if not isinstance(v, tuple(type_list)):
-                raise TypeError(
-                    'Check params "{}" type failed, {} --> {}'.format(
-                        key, type(v), type_list))
-
-        def __check_type(key, type_list, arg2value, kw):
-            if (key not in arg2value and kw.get(key) is None) or (
-                    arg2value.get(key) is None):
-                return
-
-            __enforce_check_type(key, type_list, arg2value, kw)
+        spec = _ParamsSpec(fn)
+        checked = [(key, spec.is_named(key), tuple(type_list), type_list)
+                   for key, type_list in iteritems(types)]
 
         @functools.wraps(fn)
         def __wrapper(*args, **kwargs):
-            d = inspect.getcallargs(fn, *args, **kwargs)
-            kw = d.get('kwargs', {})
+            if params_validation.enabled:
+                for key, named, type_tuple, type_list in checked:
+                    v = spec.value(key, args, kwargs)
+
+                    if v is _MISSING:
+                        # missing positional param, raise TypeError by call
+                        break
 
-            for key, checked_types in iteritems(types):
-                if enforce:
-                    __enforce_check_type(key, checked_types, d, kw)
-                else:
-                    __check_type(key, checked_types, d, kw)
+                    if not enforce and (v is None or not named):
+                        continue
+
+                    if not isinstance(v, type_tuple):
+                        raise TypeError(
+                            'Check params "{}" type failed, {} --> {}'.format(
+                                key, type(v), type_list))
 
             return fn(*args, **kwargs)
 
@@ -205,6 +285,114 @@ def camelcase_to_snakecase(name):
     return s3
 
 
+def chunked(iterable, size):
+    """ split iterable into lists of `size` items, the last one may be shorter.
+
+    >>> list(chunked(range(5), 2))
+    [[0, 1], [2, 3], [4]]
+    >>> list(chunked([], 2))
+    []
+
+    :param iterable: any iterable, consumed lazily.
+    :param size: max items per chunk.
+    """
+    chunk = []
+
+    for i in iterable:
+        chunk.append(i)
+
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def params_key(prefix, params, ignored=()):
+    """ stable key of params, items are sorted and `ignored` are skipped.
+
+    >>> params_key('geo_code', {'b': 1, 'a': 'x', 'key': 'k'}, ('key',))
+    'geo_code:a=x&b=1'
+    """
+    return u'{}:{}'.format(prefix, u'&'.join(
+        u'{}={}'.format(k, unicode(v)) for k, v in sorted(params.items())
+        if k not in ignored))
+
+
+class KeyTranslationTable(object):
+    """ bounded, thread safe memo table of key translation.
+
+    keys are translated once and cached, when table is full, new keys are
+    translated without caching.
+
+    >>> t = KeyTranslationTable(camelcase_to_snakecase, max_size=2)
+    >>> t('CamelCase'), t('aB'), t('xY')
+    ('camel_case', 'a_b', 'x_y')
+    >>> len(t)
+    2
+    >>> t.seed(['cD']); len(t)
+    2
+    """
+
+    def __init__(self, translate, max_size=4096):
+        self._translate = translate
+        self._table = {}
+        self._lock = threading.Lock()
+        self.max_size = max_size
+
+    def __call__(self, key):
+        try:
+            return self._table[key]
+        except KeyError:
+            return self._add(key)
+
+    def __len__(self):
+        return len(self._table)
+
+    def __contains__(self, key):
+        return key in self._table
+
+    @property
+    def size(self):
+        return len(self._table)
+
+    def _add(self, key):
+        value = self._translate(key)
+
+        with self._lock:
+            if len(self._table) < self.max_size:
+                self._table[key] = value
+
+        return value
+
+    def seed(self, keys):
+        """ pre-translate keys. """
+        for k in keys:
+            if k not in self._table:
+                self._add(k)
+
+    def clear(self):
+        with self._lock:
+            self._table.clear()
+
+
+def snakecase_to_camelcase(name):
+    """ Converts the snake_case name into lowerCamelCase style.
+
+    >>> snakecase_to_camelcase('address_component')
+    'addressComponent'
+    >>> snakecase_to_camelcase('name')
+    'name'
+    """
+    first, _, rest = name.partition('_')
+    return first + ''.join(i.capitalize() for i in rest.split('_'))
+
+
+# memo table used by amap json decoder, seeded with all model properties.
+snakecase_keys = KeyTranslationTable(camelcase_to_snakecase)
+
+
 class _PartialMethod(functools.partial):
     """ partial method in instance of object. """
 